@@ -1,33 +1,47 @@
-"""Benchmark the download speed of the dataset using python tools and the rust custom method"."""
+"""Benchmark the download speed of the dataset using python tools and the rust custom method".
+
+The files are downloaded from NCBI by default. To run offline with repeatable numbers, pass the path of a local mirror
+of `pubmed/baseline/` instead, e.g. `python bench_download.py /data/mirror/pubmed/baseline`.
+"""
 
 import asyncio
 import gzip
 import shutil
+import sys
 import time
 from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 import aiofiles
 import aiohttp
 
-from pmcollection._lowlevel import download_files as download_files_rust
+from pmcollection._lowlevel import download_files_sync as download_files_rust
 
 
-async def download_file(session, url, cache_folder):
+async def read_url(session, url):
+    if url.startswith("file://"):
+        async with aiofiles.open(url2pathname(urlparse(url).path), "rb") as f:
+            return await f.read()
     async with session.get(url) as response:
         response.raise_for_status()
-        content = await response.read()
+        return await response.read()
+
+
+async def download_file(session, url, cache_folder):
+    content = await read_url(session, url)
 
-        file_name = url.split("/")[-1]
-        file_path = Path(cache_folder) / file_name
+    file_name = url.split("/")[-1]
+    file_path = Path(cache_folder) / file_name
 
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
+    async with aiofiles.open(file_path, "wb") as f:
+        await f.write(content)
 
-        # Decompress the file
-        decompressed_file_path = file_path.with_suffix("")
-        with gzip.open(file_path, "rb") as f_in:
-            with open(decompressed_file_path, "wb") as f_out:
-                shutil.copyfileobj(f_in, f_out)
+    # Decompress the file
+    decompressed_file_path = file_path.with_suffix("")
+    with gzip.open(file_path, "rb") as f_in:
+        with open(decompressed_file_path, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
 
 
 async def download_files_python(urls, cache_folder, concurrency_limit):
@@ -49,13 +63,13 @@ async def benchmark_python(urls, cache_folder, concurrency_limit):
     await download_files_python(urls, cache_folder, concurrency_limit)
 
 
-async def benchmark_rust(urls, cache_folder, concurrency_limit):
-    await download_files_rust(urls, cache_folder, concurrency_limit)
+def benchmark_rust(urls, cache_folder, concurrency_limit):
+    download_files_rust(urls, cache_folder, concurrency_limit, resume=False)
 
 
-def run_benchmarks():
+def run_benchmarks(base_url="https://ftp.ncbi.nlm.nih.gov/pubmed/baseline"):
     urls = [
-        f"https://ftp.ncbi.nlm.nih.gov/pubmed/baseline/pubmed24n{i:04d}.xml.gz"
+        f"{base_url}/pubmed24n{i:04d}.xml.gz"
         for i in range(1, 21)  # Use the first 10 files for benchmarking
     ]
     cache_folder_python = "./tmp_python"
@@ -67,7 +81,7 @@ def run_benchmarks():
     python_times = []
     for _ in range(iterations):
         # Benchmark Rust implementation
-        rust_time = measure_time(lambda: asyncio.run(benchmark_rust(urls, cache_folder_rust, concurrency_limit)))
+        rust_time = measure_time(lambda: benchmark_rust(urls, cache_folder_rust, concurrency_limit))
         print(rust_time)
         rust_times.append(rust_time)
         # Benchmark Python implementation
@@ -82,4 +96,7 @@ def run_benchmarks():
 
 
 if __name__ == "__main__":
-    run_benchmarks()
+    if len(sys.argv) > 1:
+        run_benchmarks(Path(sys.argv[1]).resolve().as_uri())
+    else:
+        run_benchmarks()
@@ -0,0 +1,69 @@
+"""Benchmark the per-record cost of loading PubMed items, and how much of it goes to pydantic validation.
+
+`PubmedItem.from_xml` gathers the fields of a record in plain dicts with `fields_from_xml`, then validates the whole
+tree at once with `model_validate`. Both steps are timed on their own, along with building the model tree again from
+the same field values through the constructor of each nested model, as `from_xml` used to, and with `model_construct`,
+which skips validation. The native parser, `parse_file`, is timed on the same file as a reference. Run it on a file
+stored by the downloader, e.g. `python bench_from_xml.py tmp/pubmed24n0001.xml`.
+"""
+
+import sys
+import time
+
+from pydantic import BaseModel
+
+from pmcollection._lowlevel import parse_file
+from pmcollection.schemas import PubmedItem
+from pmcollection.utils import read_pubmed_file
+
+
+def rebuild(value, validate: bool):
+    """Build a model tree again from its field values, validating each model or not."""
+    if isinstance(value, list):
+        return [rebuild(item, validate) for item in value]
+    if not isinstance(value, BaseModel):
+        return value
+
+    model = type(value)
+    values = {name: rebuild(getattr(value, name), validate) for name in model.model_fields}
+    return model(**values) if validate else model.model_construct(**values)
+
+
+def measure(func, items, iterations: int) -> float:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        times.append(time.perf_counter() - start)
+    return min(times) / len(items)
+
+
+def run_benchmarks(file_path: str = "tmp/pubmed24n0001.xml", iterations: int = 5):
+    nodes = read_pubmed_file(file_path).children
+    items = [PubmedItem.from_xml(node) for node in nodes]
+    fields = [PubmedItem.fields_from_xml(node) for node in nodes]
+
+    from_xml_time = measure(PubmedItem.from_xml, nodes, iterations)
+    fields_time = measure(PubmedItem.fields_from_xml, nodes, iterations)
+    validate_time = measure(PubmedItem.model_validate, fields, iterations)
+    validated_time = measure(lambda item: rebuild(item, True), items, iterations)
+    constructed_time = measure(lambda item: rebuild(item, False), items, iterations)
+    parse_time = measure(parse_file, [file_path], iterations) / len(nodes)
+    records = parse_file(file_path)
+    parsed_time = measure(PubmedItem.model_validate, records, iterations)
+
+    print(f"{len(nodes)} records")
+    print(f"from_xml: {from_xml_time * 1e6:.0f} us/record")
+    print(f"  fields_from_xml: {fields_time * 1e6:.0f} us/record")
+    print(f"  model_validate of the fields: {validate_time * 1e6:.0f} us/record")
+    print(f"model tree with a constructor per model: {validated_time * 1e6:.0f} us/record")
+    print(f"model tree with model_construct: {constructed_time * 1e6:.0f} us/record")
+    print(f"parse_file: {parse_time * 1e6:.0f} us/record, then model_validate: {parsed_time * 1e6:.0f} us/record")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_benchmarks(sys.argv[1])
+    else:
+        run_benchmarks()
@@ -0,0 +1,117 @@
+"""Benchmark the inflation stage of the downloader on local files, single-member gzip vs BGZF.
+
+The files are served from a local HTTP server so the network is not the bottleneck, and also read directly from disk
+to leave HTTP out entirely. The deflate backend is chosen at
+build time, build and run this script once per backend to compare them:
+
+    maturin develop --release                        # miniz_oxide, the default
+    maturin develop --release --features zlib-ng     # zlib-ng, needs CMake and a C compiler
+
+Python's `gzip` module is timed on the same files as a reference.
+"""
+
+import gzip
+import http.server
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from functools import partial
+from pathlib import Path
+
+from pmcollection._lowlevel import download_files_sync
+
+
+BGZF_BLOCK_SIZE = 64 * 1024 - 256
+
+
+def make_xml(size: int) -> bytes:
+    """Build a PubMed-like XML document of about `size` bytes."""
+    article = (
+        b"<PubmedArticle><MedlineCitation><PMID>%d</PMID><Article><ArticleTitle>Effects of things on other things"
+        b"</ArticleTitle><Abstract><AbstractText>%s</AbstractText></Abstract></Article></MedlineCitation>"
+        b"</PubmedArticle>\n"
+    )
+    parts = [b"<?xml version='1.0' encoding='utf-8'?>\n<PubmedArticleSet>\n"]
+    total, pmid = 0, 0
+    while total < size:
+        words = b" ".join(b"word%d" % ((pmid * 7 + i) % 5000) for i in range(200))
+        parts.append(article % (pmid, words))
+        total += len(parts[-1])
+        pmid += 1
+    parts.append(b"</PubmedArticleSet>\n")
+    return b"".join(parts)
+
+
+def bgzf_compress(data: bytes) -> bytes:
+    """Compress `data` as BGZF: independent gzip members, each announcing its size in a `BC` extra subfield."""
+    members = []
+    for start in range(0, len(data), BGZF_BLOCK_SIZE):
+        block = data[start : start + BGZF_BLOCK_SIZE]
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        deflated = compressor.compress(block) + compressor.flush()
+        header = struct.pack("<4BI2BH2BHH", 0x1F, 0x8B, 8, 4, 0, 0, 255, 6, ord("B"), ord("C"), 2, 0)
+        size = len(header) + len(deflated) + 8
+        header = header[:-2] + struct.pack("<H", size - 1)
+        members.append(header + deflated + struct.pack("<II", zlib.crc32(block), len(block)))
+    # End-of-file marker, an empty member
+    members.append(bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000"))
+    return b"".join(members)
+
+
+def serve(directory: Path) -> http.server.ThreadingHTTPServer:
+    handler = partial(http.server.SimpleHTTPRequestHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(func, iterations: int) -> float:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmarks(xml_size: int = 256 * 1024 * 1024, iterations: int = 5):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        served = root / "served"
+        served.mkdir()
+
+        data = make_xml(xml_size)
+        (served / "single.xml.gz").write_bytes(gzip.compress(data, compresslevel=6))
+        (served / "bgzf.xml.gz").write_bytes(bgzf_compress(data))
+        server = serve(served)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        for name in ["single", "bgzf"]:
+            cache_folder = root / f"cache_{name}"
+
+            def download(source, cache_folder=cache_folder):
+                shutil.rmtree(cache_folder, ignore_errors=True)
+                [result] = download_files_sync([source], str(cache_folder), 1, resume=False)
+                assert result.ok, result.error
+
+            def inflate_python(name=name):
+                with gzip.open(served / f"{name}.xml.gz", "rb") as f_in:
+                    while f_in.read(1024 * 1024):
+                        pass
+
+            http_time = measure(partial(download, f"{base_url}/{name}.xml.gz"), iterations)
+            file_time = measure(partial(download, str(served / f"{name}.xml.gz")), iterations)
+            python_time = measure(inflate_python, iterations)
+            print(f"{name}: Rust download and inflate {len(data) / http_time / 1e6:.0f} MB/s")
+            print(f"{name}: Rust local copy and inflate {len(data) / file_time / 1e6:.0f} MB/s")
+            print(f"{name}: Python gzip inflate only {len(data) / python_time / 1e6:.0f} MB/s")
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    run_benchmarks()
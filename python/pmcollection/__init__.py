@@ -1,11 +1,43 @@
-from pmcollection._lowlevel import download_files
+from pmcollection._lowlevel import (
+    ArticleStream,
+    Downloader,
+    DownloadResult,
+    DownloadStream,
+    RecordIterator,
+    RetryPolicy,
+    download_files,
+    download_files_sync,
+    iter_download_files,
+    iter_records,
+    parse_bytes,
+    parse_file,
+    read_xml,
+    stream_articles,
+    sync_directory,
+)
 
 
-__all__ = ["download_files"]
+__all__ = [
+    "ArticleStream",
+    "Downloader",
+    "DownloadResult",
+    "DownloadStream",
+    "RecordIterator",
+    "RetryPolicy",
+    "download_files",
+    "download_files_sync",
+    "iter_download_files",
+    "iter_records",
+    "parse_bytes",
+    "parse_file",
+    "read_xml",
+    "stream_articles",
+    "sync_directory",
+]
 
 
 async def download_files_python(urls, cache_folder, concurrency_limit):
-    await download_files(urls, cache_folder, concurrency_limit)
+    return await download_files(urls, cache_folder, concurrency_limit)
 
 
 if __name__ == "__main__":
@@ -19,33 +51,17 @@ if __name__ == "__main__":
     # concurrency_limit = 20
 
     # asyncio.run(download_files_python(urls, cache_folder_python, concurrency_limit))
-    import time
     from pathlib import Path
 
     from rich.progress import track
-    from rxml import read_file
-
-    from pmcollection.schemas import PubmedItem
-
-    list_files = list(Path("tmp").glob("*.xml"))
-
-    for it, file in enumerate(list_files):
-        print(f"Processing file {it + 1}/{len(list_files)}")
-        root_node = read_file(str(file), "PubmedArticleSet")
-        for node in track(
-            root_node.children,
-            description="Loading items",
-            total=len(root_node.children),
-        ):
-            try:
-                item_load = time.time()
-                item = PubmedItem.from_xml(node)
-                item_load_end = time.time()
-            except Exception as err:
-                # kws = node.search(by=SearchType.Tag, value="GeneSymbolList")
-                # for k in kws:
-                #     print(k.children)
-                raise err from err
-
-    # print(f"Read file in {end - start:.2f} seconds")
-    # print(f"Load item in {item_load_end - item_load:.2f} seconds")
+
+    from pmcollection.pipeline import parse_files
+
+    list_files = sorted(Path("tmp").glob("*.xml"))
+
+    for _shard in track(
+        parse_files(list_files, "tmp/shards", ordered=False),
+        description="Loading files",
+        total=len(list_files),
+    ):
+        pass
@@ -0,0 +1,172 @@
+"""Type stubs for the Rust extension module."""
+
+from typing import Any, AsyncIterator, Awaitable, Iterator, TypedDict
+
+from typing_extensions import Unpack
+
+class ArticleStream(AsyncIterator[list[str]]):
+    """Async iterator over the `PubmedArticle` elements of a remote `.xml.gz` file, in batches of XML strings."""
+
+    def __aiter__(self) -> ArticleStream: ...
+    async def __anext__(self) -> list[str]: ...
+
+class DownloadOptions(TypedDict, total=False):
+    """Keyword arguments shared by the download functions, all optional.
+
+    Attributes:
+        verify_md5 (bool): Check each file against its `.md5` sidecar, `False` by default.
+        retry (RetryPolicy | None): When to try a failed download again, the default policy if `None`.
+        adaptive_concurrency (bool): Tune the number of concurrent downloads to the throughput, `False` by default.
+        max_bandwidth (float | None): The maximum total rate in bytes per second, unlimited if `None`.
+        max_requests_per_host (float | None): The maximum number of requests per second to a host, unlimited if `None`.
+        output_format (str): How the files are stored, `"xml"`, `"gzip"` or `"zstd"`, `"xml"` by default.
+        check_disk_space (bool): Fail early when the files cannot fit on the disk, `True` by default.
+        max_cache_size (int | None): The maximum size of the cache folder in bytes, unlimited if `None`.
+    """
+
+    verify_md5: bool
+    retry: RetryPolicy | None
+    adaptive_concurrency: bool
+    max_bandwidth: float | None
+    max_requests_per_host: float | None
+    output_format: str
+    check_disk_space: bool
+    max_cache_size: int | None
+
+class DownloadResult:
+    """Outcome of the download of one URL."""
+
+    url: str
+    path: str | None
+    status: str
+    bytes_transferred: int
+    decompressed_size: int
+    elapsed: float
+    retries: int
+    error: str | None
+    concurrency: int
+
+    @property
+    def ok(self) -> bool: ...
+
+class Downloader:
+    """Downloads files with a long-lived HTTP client on a dedicated tokio runtime.
+
+    Consecutive calls on the same downloader reuse the connections of its pool. Inflating and recompressing the files
+    run on `blocking_threads` threads of its own, one per core by default. The methods take the same arguments as the
+    module-level functions of the same name.
+    """
+
+    def __init__(
+        self,
+        worker_threads: int | None = None,
+        blocking_threads: int | None = None,
+        pool_max_idle_per_host: int = 32,
+        pool_idle_timeout: float | None = 90.0,
+        tcp_keepalive: float | None = 60.0,
+        connect_timeout: float | None = 30.0,
+        read_timeout: float | None = 120.0,
+        http2: bool = True,
+    ) -> None: ...
+    def download_files(
+        self,
+        urls: list[str],
+        cache_folder: str,
+        concurrency_limit: int,
+        resume: bool = True,
+        **options: Unpack[DownloadOptions],
+    ) -> Awaitable[list[DownloadResult]]: ...
+    def download_files_sync(
+        self,
+        urls: list[str],
+        cache_folder: str,
+        concurrency_limit: int,
+        resume: bool = True,
+        **options: Unpack[DownloadOptions],
+    ) -> list[DownloadResult]: ...
+    def iter_download_files(
+        self,
+        urls: list[str],
+        cache_folder: str,
+        concurrency_limit: int,
+        resume: bool = True,
+        **options: Unpack[DownloadOptions],
+    ) -> DownloadStream: ...
+    def stream_articles(self, url: str, retry: RetryPolicy | None = None) -> ArticleStream: ...
+    def sync_directory(
+        self,
+        url: str,
+        cache_folder: str,
+        concurrency_limit: int,
+        suffix: str = ".xml.gz",
+        **options: Unpack[DownloadOptions],
+    ) -> Awaitable[list[DownloadResult]]: ...
+    def close(self) -> None: ...
+
+class DownloadStream(AsyncIterator[DownloadResult]):
+    """Async iterator over the results of downloads, in the order they complete."""
+
+    def __aiter__(self) -> DownloadStream: ...
+    async def __anext__(self) -> DownloadResult: ...
+
+class RecordIterator(Iterator[dict[str, Any]]):
+    """Iterator over the `PubmedArticle` records of an XML file, parsed one at a time into dicts."""
+
+    def __iter__(self) -> RecordIterator: ...
+    def __next__(self) -> dict[str, Any]: ...
+
+class RetryPolicy:
+    """When and how long to wait before trying to download a file again."""
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        jitter: bool = True,
+        retry_statuses: list[int] | None = None,
+    ) -> None: ...
+    @property
+    def max_attempts(self) -> int: ...
+    @property
+    def base_delay(self) -> float: ...
+    @property
+    def max_delay(self) -> float: ...
+    @property
+    def jitter(self) -> bool: ...
+    @property
+    def retry_statuses(self) -> list[int]: ...
+
+def download_files(
+    urls: list[str],
+    cache_folder: str,
+    concurrency_limit: int,
+    resume: bool = True,
+    **options: Unpack[DownloadOptions],
+) -> Awaitable[list[DownloadResult]]: ...
+def download_files_sync(
+    urls: list[str],
+    cache_folder: str,
+    concurrency_limit: int,
+    resume: bool = True,
+    **options: Unpack[DownloadOptions],
+) -> list[DownloadResult]: ...
+def iter_download_files(
+    urls: list[str],
+    cache_folder: str,
+    concurrency_limit: int,
+    resume: bool = True,
+    **options: Unpack[DownloadOptions],
+) -> DownloadStream: ...
+def iter_records(path: str) -> RecordIterator: ...
+def parse_bytes(buf: bytes) -> list[dict[str, Any]]: ...
+def parse_file(path: str) -> list[dict[str, Any]]: ...
+def read_xml(path: str) -> str: ...
+def stream_articles(url: str, retry: RetryPolicy | None = None) -> ArticleStream: ...
+def sync_directory(
+    url: str,
+    cache_folder: str,
+    concurrency_limit: int,
+    suffix: str = ".xml.gz",
+    **options: Unpack[DownloadOptions],
+) -> Awaitable[list[DownloadResult]]: ...
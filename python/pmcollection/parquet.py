@@ -0,0 +1,133 @@
+"""Export PubMed files to Parquet, with the nested layout of the `PubmedItem` models as the Arrow schema."""
+
+import datetime
+import types
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Union, get_args, get_origin, get_type_hints
+
+from pydantic import BaseModel
+
+from pmcollection._lowlevel import iter_records
+from pmcollection.schemas import PubmedItem
+
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as err:
+    raise ImportError(
+        "Exporting to Parquet requires pyarrow, install it with `pip install pmcollection[parquet]`"
+    ) from err
+
+
+SCALAR_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    bool: pa.bool_(),
+    datetime.date: pa.date32(),
+}
+
+
+def arrow_type(annotation: Any) -> pa.DataType:
+    """Convert the annotation of a model field to an Arrow type.
+
+    Args:
+        annotation (Any): The annotation, a scalar type, a model, a `list` of them, optionally `| None`.
+
+    Returns:
+        pa.DataType: The Arrow type.
+    """
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin in (Union, types.UnionType):
+        [inner] = [arg for arg in args if arg is not type(None)]
+        return arrow_type(inner)
+    if origin is list:
+        return pa.list_(arrow_type(args[0]))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pa.struct(model_fields(annotation))
+    if annotation in SCALAR_TYPES:
+        return SCALAR_TYPES[annotation]
+
+    raise TypeError(f"No Arrow type for {annotation!r}")
+
+
+def model_fields(model: type[BaseModel]) -> list[pa.Field]:
+    """Convert the fields of a model to Arrow fields, nested models becoming structs.
+
+    All the fields are nullable, even the ones that are required in the model: the records are not validated before
+    being written, and the native parser gives `None` for any attribute or element that is missing or empty.
+    """
+    # The models refer to the ones defined after them by name, `get_type_hints` resolves these references
+    annotations = get_type_hints(model)
+    return [pa.field(name, arrow_type(annotations[name])) for name in model.model_fields]
+
+
+@lru_cache
+def pubmed_schema() -> pa.Schema:
+    """The Arrow schema of `PubmedItem`, one column for `citation` and one for `data`.
+
+    Authors, MeSH headings, references and the other lists are `list<struct>` columns, so the hierarchy of the models
+    is kept as is and can be queried with DuckDB or Spark without flattening it first.
+
+    Returns:
+        pa.Schema: The schema.
+    """
+    return pa.schema(model_fields(PubmedItem))
+
+
+def records_to_batch(records: list[dict[str, Any]]) -> pa.RecordBatch:
+    """Convert records of the native parser, see `iter_records`, to a record batch of `pubmed_schema`.
+
+    Args:
+        records (list[dict[str, Any]]): The records, with the same layout as `PubmedItem`.
+
+    Returns:
+        pa.RecordBatch: The batch, one row per record.
+    """
+    return pa.RecordBatch.from_pylist(records, schema=pubmed_schema())
+
+
+def write_parquet(
+    paths: Iterable[str | Path],
+    output_path: str | Path,
+    row_group_size: int = 10_000,
+    compression: str | None = "zstd",
+    compression_level: int | None = None,
+) -> int:
+    """Write the items of PubMed files to a single Parquet file.
+
+    The records are read from the native parser and converted to Arrow directly, without building `PubmedItem` models
+    nor going through `model_dump`. They are written one row group at a time, so memory is bounded by the size of a
+    row group whatever the number of files.
+
+    Args:
+        paths (Iterable[str | Path]): The paths of the `.xml`, `.xml.gz` or `.xml.zst` files.
+        output_path (str | Path): The path of the Parquet file to write.
+        row_group_size (int): The number of items per row group.
+        compression (str | None): The compression codec, e.g. `"zstd"`, `"snappy"` or `"gzip"`, `None` to disable it.
+        compression_level (int | None): The level of the codec, its default one if `None`.
+
+    Returns:
+        int: The number of items written.
+    """
+    count = 0
+    records = []
+    with pq.ParquetWriter(
+        str(output_path),
+        pubmed_schema(),
+        compression=compression or "none",
+        compression_level=compression_level,
+    ) as writer:
+        for path in paths:
+            for record in iter_records(str(path)):
+                records.append(record)
+                if len(records) == row_group_size:
+                    writer.write_batch(records_to_batch(records), row_group_size=row_group_size)
+                    count += len(records)
+                    records = []
+        if records:
+            writer.write_batch(records_to_batch(records), row_group_size=row_group_size)
+            count += len(records)
+
+    return count
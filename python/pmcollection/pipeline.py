@@ -0,0 +1,120 @@
+"""Pipelines that turn PubMed files into items one at a time, without holding a whole document in memory."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator
+
+from rxml import read_string
+
+from pmcollection._lowlevel import RetryPolicy, iter_records, stream_articles
+from pmcollection.schemas import PubmedItem
+
+
+async def stream_pubmed_items(url: str, retry: RetryPolicy | None = None) -> AsyncIterator[PubmedItem]:
+    """Download a `.xml.gz` file and yield its items while it is being transferred.
+
+    The body is inflated in memory and cut into `PubmedArticle` elements on the Rust side, each one is parsed as soon
+    as it is complete, so the decompressed XML is never written nor read back from disk.
+
+    Args:
+        url (str): The URL of the `.xml.gz` file to download.
+        retry (RetryPolicy | None): How to resume the transfer if the connection drops.
+
+    Yields:
+        PubmedItem: The items of the file, in document order.
+    """
+    async for articles in stream_articles(url, retry=retry):
+        for article in articles:
+            yield PubmedItem.from_xml(read_string(article, "PubmedArticle"))
+
+
+def iter_pubmed_items(path: str | Path) -> Iterator[PubmedItem]:
+    """Read a PubMed file stored by the downloader and yield its items one at a time.
+
+    Unlike `read_pubmed_file`, the document is never loaded as a whole: each `PubmedArticle` element is parsed on the
+    Rust side as the file is read, then dropped once its item is yielded, so memory stays flat whatever the size of the
+    file.
+
+    Args:
+        path (str | Path): The path of the `.xml`, `.xml.gz` or `.xml.zst` file.
+
+    Yields:
+        PubmedItem: The items of the file, in document order.
+    """
+    for record in iter_records(str(path)):
+        yield PubmedItem.model_validate(record)
+
+
+def shard_name(path: str | Path) -> str:
+    """The file name of the shard of a PubMed file, `.jsonl` in place of its `.xml`, `.xml.gz` or `.xml.zst` suffix."""
+    name = Path(path).name.removesuffix(".gz").removesuffix(".zst").removesuffix(".xml")
+    return f"{name}.jsonl"
+
+
+def write_shard(path: str | Path, output_folder: str | Path) -> Path:
+    """Parse a PubMed file and write its items to a JSON Lines shard named after it in `output_folder`.
+
+    Args:
+        path (str | Path): The path of the `.xml`, `.xml.gz` or `.xml.zst` file.
+        output_folder (str | Path): The folder to write the shard to.
+
+    Returns:
+        Path: The path of the shard, one JSON-encoded `PubmedItem` per line.
+    """
+    shard = Path(output_folder) / shard_name(path)
+    partial = shard.with_name(f"{shard.name}.part")
+    with partial.open("w", encoding="utf-8") as f_out:
+        for item in iter_pubmed_items(path):
+            f_out.write(item.model_dump_json())
+            f_out.write("\n")
+    partial.replace(shard)
+    return shard
+
+
+def parse_files(
+    paths: Iterable[str | Path],
+    output_folder: str | Path,
+    workers: int | None = None,
+    ordered: bool = True,
+) -> Iterator[Path]:
+    """Parse PubMed files in a pool of processes, writing the items of each one to its own shard.
+
+    The items stay in the worker that parsed them, only the path of each shard is sent back, so the parent does not
+    pay for pickling whole files of items. Shards are written to a `.part` file first, a shard that exists is complete.
+    When a file fails or the caller stops iterating, the files that are not being parsed yet are cancelled.
+
+    Args:
+        paths (Iterable[str | Path]): The paths of the `.xml`, `.xml.gz` or `.xml.zst` files.
+        output_folder (str | Path): The folder to write the shards to, created if needed.
+        workers (int | None): The number of processes, the number of CPUs by default.
+        ordered (bool): Whether to yield the shards in the order of `paths`, or as soon as each one is written.
+
+    Returns:
+        Iterator[Path]: The path of the shard of each file, see `write_shard`, the pool starts on the first `next`.
+
+    Raises:
+        ValueError: If two files would be written to the same shard, e.g. `a/x.xml.gz` and `b/x.xml.gz`.
+    """
+    paths = list(paths)
+    shards: dict[str, str | Path] = {}
+    for path in paths:
+        name = shard_name(path)
+        if name in shards:
+            raise ValueError(f"{shards[name]} and {path} would both be written to the shard {name}")
+        shards[name] = path
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    return _iter_shards(paths, output_folder, workers, ordered)
+
+
+def _iter_shards(paths: list[str | Path], output_folder: Path, workers: int, ordered: bool) -> Iterator[Path]:
+    """Run the pool of `parse_files`, shutting it down when the iteration ends or fails."""
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(write_shard, path, output_folder) for path in paths]
+        for future in futures if ordered else as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
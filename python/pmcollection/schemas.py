@@ -2,15 +2,44 @@
 
 from __future__ import annotations
 
+import abc
 import datetime
+from typing import Any, TypeVar
 
 from pydantic import BaseModel
-from rxml import Node, SearchType
+from rxml import Node
 
-from pmcollection.utils import define_datetime_from_node, find_tag_or_none
+from pmcollection.utils import children_by_tag, define_datetime_from_node, first_text, select, select_text
 
 
-class Article(BaseModel):
+_Model = TypeVar("_Model", bound="XmlModel")
+
+
+class XmlModel(BaseModel):
+    """A model that is loaded from a node of a PubMed XML file, each subclass implements `fields_from_xml`."""
+
+    @classmethod
+    def from_xml(cls: type[_Model], node: Node) -> _Model:
+        """Create the model from an XML node.
+
+        The fields of the whole tree of models are gathered in plain dicts first, then validated at once by
+        pydantic-core, instead of validating each nested model as it is created.
+
+        Args:
+            node (Node): The XML node to create the model from.
+
+        Returns:
+            _Model: The model created from the XML node.
+        """
+        return cls.model_validate(cls.fields_from_xml(node))
+
+    @classmethod
+    @abc.abstractmethod
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of the model from an XML node, nested models as dicts of their own fields."""
+
+
+class Article(XmlModel):
     """An article object that represents an article in a publication."""
 
     publication_model: str
@@ -29,42 +58,44 @@ class Article(BaseModel):
     copyright_information: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> Article:
-        """Create an Article from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an Article from an XML node.
 
         Args:
-            node (Node): The XML node to create the Article from.
+            node (Node): The XML node to read the Article from.
 
         Returns:
-            Article: The Article created from the XML node.
+            dict[str, Any]: The fields of the Article, nested models as dicts of their own fields.
         """
-        _grants = node.search(by=SearchType.Tag, value="Grant")
-        _elocation_id = node.search(by=SearchType.Tag, value="ELocationID")
-        _vernacular_title = node.search(by=SearchType.Tag, value="VernacularTitle")
-        _data_banks = node.search(by=SearchType.Tag, value="DataBank")
-        _copyright_information = node.search(by=SearchType.Tag, value="CopyrightInformation")
-
-        return cls(
-            publication_model=node.attrs.get("PubModel"),
-            journal=Journal.from_xml(node.search(by=SearchType.Tag, value="Journal")[0]),
-            title=node.search(by=SearchType.Tag, value="ArticleTitle")[0].text,
-            abstract=find_tag_or_none(node, "AbstractText"),
-            pagination=find_tag_or_none(node, "MedlinePgn"),
-            authors=[Author.from_xml(item) for item in node.search(by=SearchType.Tag, value="Author")],
-            language=node.search(by=SearchType.Tag, value="Language")[0].text,
-            date=define_datetime_from_node(node.search(by=SearchType.Tag, value="ArticleDate")),
-            grants=[Grant.from_xml(item) for item in _grants] if _grants else None,
-            publication_types=[
-                Publication.from_xml(item) for item in node.search(by=SearchType.Tag, value="PublicationType")
+        fields = children_by_tag(node)
+        _abstract = fields.get("Abstract", [])
+        _article_date = fields.get("ArticleDate")
+        _grants = select(fields.get("GrantList", []), "Grant")
+        _elocation_id = fields.get("ELocationID")
+        _data_banks = select(fields.get("DataBankList", []), "DataBank")
+
+        return {
+            "publication_model": node.attrs.get("PubModel"),
+            "journal": Journal.fields_from_xml(fields["Journal"][0]),
+            "title": fields["ArticleTitle"][0].text,
+            "abstract": select_text(_abstract, "AbstractText"),
+            "pagination": select_text(fields.get("Pagination", []), "MedlinePgn"),
+            "authors": [Author.fields_from_xml(item) for item in select(fields.get("AuthorList", []), "Author")],
+            "language": fields["Language"][0].text,
+            "date": define_datetime_from_node(_article_date[0].children) if _article_date else None,
+            "grants": [Grant.fields_from_xml(item) for item in _grants] if _grants else None,
+            "publication_types": [
+                Publication.fields_from_xml(item)
+                for item in select(fields.get("PublicationTypeList", []), "PublicationType")
             ],
-            elocation_id=ELocationId.from_xml(_elocation_id[0]) if _elocation_id else None,
-            vernacular_title=_vernacular_title[0].text if _vernacular_title else None,
-            data_banks=[DataBank.from_xml(item) for item in _data_banks] if _data_banks else None,
-            copyright_information=_copyright_information[0].text if _copyright_information else None,
-        )
+            "elocation_id": ELocationId.fields_from_xml(_elocation_id[0]) if _elocation_id else None,
+            "vernacular_title": first_text(fields, "VernacularTitle"),
+            "data_banks": [DataBank.fields_from_xml(item) for item in _data_banks] if _data_banks else None,
+            "copyright_information": select_text(_abstract, "CopyrightInformation"),
+        }
 
 
-class DataBank(BaseModel):
+class DataBank(XmlModel):
     """A data bank object that represents a data bank used in a publication."""
 
     name: str | None
@@ -72,27 +103,27 @@ class DataBank(BaseModel):
     complete: bool
 
     @classmethod
-    def from_xml(cls, node: Node) -> DataBank:
-        """Create a DataBank from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a DataBank from an XML node.
 
         Args:
-            node (Node): The XML node to create the DataBank from.
+            node (Node): The XML node to read the DataBank from.
 
         Returns:
-            DataBank: The DataBank created from the XML node.
+            dict[str, Any]: The fields of the DataBank, nested models as dicts of their own fields.
         """
-        return cls(
-            name=node.search(SearchType.Tag, "DataBankName")[0].text,
-            accession_numbers=[
+        return {
+            "name": select(node, "DataBankName")[0].text,
+            "accession_numbers": [
                 item.text
-                for item in node.search(by=SearchType.Tag, value="AccessionNumber")
+                for item in select(node, "AccessionNumberList/AccessionNumber")
                 if item is not None and item.text is not None
             ],
-            complete=True if node.attrs.get("CompleteYN") == "Y" else False,
-        )
+            "complete": True if node.attrs.get("CompleteYN") == "Y" else False,
+        }
 
 
-class ELocationId(BaseModel):
+class ELocationId(XmlModel):
     """An ELocation ID object that represents an ELocation ID of a publication."""
 
     id_type: str
@@ -100,23 +131,23 @@ class ELocationId(BaseModel):
     value: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> ELocationId:
-        """Create an ELocationId from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an ELocationId from an XML node.
 
         Args:
-            node (Node): The XML node to create the ELocationId from.
+            node (Node): The XML node to read the ELocationId from.
 
         Returns:
-            ELocationId: The ELocationId created from the XML node.
+            dict[str, Any]: The fields of the ELocationId, nested models as dicts of their own fields.
         """
-        return cls(
-            id_type=node.attrs.get("EIdType"),
-            valid=True if node.attrs.get("ValidYN") == "Y" else False,
-            value=node.text,
-        )
+        return {
+            "id_type": node.attrs.get("EIdType"),
+            "valid": True if node.attrs.get("ValidYN") == "Y" else False,
+            "value": node.text,
+        }
 
 
-class Journal(BaseModel):
+class Journal(XmlModel):
     """A journal object that represents a journal in a publication."""
 
     issn: Issn | None
@@ -125,26 +156,27 @@ class Journal(BaseModel):
     iso_abbreviation: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> Journal:
-        """Create a Journal from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Journal from an XML node.
 
         Args:
-            node (Node): The XML node to create the Journal from.
+            node (Node): The XML node to read the Journal from.
 
         Returns:
-            Journal: The Journal created from the XML node.
+            dict[str, Any]: The fields of the Journal, nested models as dicts of their own fields.
         """
-        _issn = node.search(by=SearchType.Tag, value="ISSN")
+        fields = children_by_tag(node)
+        _issn = fields.get("ISSN")
 
-        return cls(
-            issn=Issn.from_xml(_issn[0]) if _issn else None,
-            issue=JournalIssue.from_xml(node.search(SearchType.Tag, "JournalIssue")[0]),
-            title=node.search(SearchType.Tag, "Title")[0].text,
-            iso_abbreviation=node.search(SearchType.Tag, "ISOAbbreviation")[0].text,
-        )
+        return {
+            "issn": Issn.fields_from_xml(_issn[0]) if _issn else None,
+            "issue": JournalIssue.fields_from_xml(fields["JournalIssue"][0]),
+            "title": fields["Title"][0].text,
+            "iso_abbreviation": first_text(fields, "ISOAbbreviation"),
+        }
 
 
-class JournalIssue(BaseModel):
+class JournalIssue(XmlModel):
     """A journal issue object that represents an issue of a journal."""
 
     medium: str
@@ -155,85 +187,86 @@ class JournalIssue(BaseModel):
     medline_date: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> JournalIssue:
-        """Create a JournalIssue from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a JournalIssue from an XML node.
 
         Args:
-            node (Node): The XML node to create the JournalIssue from.
+            node (Node): The XML node to read the JournalIssue from.
 
         Returns:
-            JournalIssue: The JournalIssue created from the XML node.
+            dict[str, Any]: The fields of the JournalIssue, nested models as dicts of their own fields.
         """
-        _date = define_datetime_from_node(node.search(by=SearchType.Tag, value="PubDate"))
+        fields = children_by_tag(node)
+        _pub_date = fields.get("PubDate", [])
 
-        return cls(
-            medium=node.attrs.get("CitedMedium"),
-            volume=find_tag_or_none(node, "Volume"),
-            issue=find_tag_or_none(node, "Issue"),
-            date=_date,
-            season=find_tag_or_none(node, "Season"),
-            medline_date=find_tag_or_none(node, "MedlineDate"),
-        )
+        return {
+            "medium": node.attrs.get("CitedMedium"),
+            "volume": first_text(fields, "Volume"),
+            "issue": first_text(fields, "Issue"),
+            "date": define_datetime_from_node(_pub_date[0].children) if _pub_date else None,
+            "season": select_text(_pub_date, "Season"),
+            "medline_date": select_text(_pub_date, "MedlineDate"),
+        }
 
 
-class Issn(BaseModel):
+class Issn(XmlModel):
     """An ISSN object that represents an ISSN of a journal."""
 
     type: str
     value: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> Issn:
-        """Create an Issn from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an Issn from an XML node.
 
         Args:
-            node (Node): The XML node to create the Issn from.
+            node (Node): The XML node to read the Issn from.
 
         Returns:
-            Issn: The Issn created from the XML node.
+            dict[str, Any]: The fields of the Issn, nested models as dicts of their own fields.
         """
-        return cls(type=node.attrs.get("IssnType"), value=node.text)
+        return {"type": node.attrs.get("IssnType"), "value": node.text}
 
 
-class Publication(BaseModel):
+class Publication(XmlModel):
     """A publication object that represents a publication type of an article."""
 
     unique_identifier: str
     type: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> Publication:
-        """Create a Publication from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Publication from an XML node.
 
         Args:
-            node (Node): The XML node to create the Publication from.
+            node (Node): The XML node to read the Publication from.
 
         Returns:
-            Publication: The Publication created from the XML node.
+            dict[str, Any]: The fields of the Publication, nested models as dicts of their own fields.
         """
-        return cls(unique_identifier=node.attrs.get("UI"), type=node.text)
+        return {"unique_identifier": node.attrs.get("UI"), "type": node.text}
 
 
-class ArticleId(BaseModel):
+class ArticleId(XmlModel):
     """An article ID object that represents an article ID."""
 
     id: str | None
     id_type: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> ArticleId:
-        """Create an ArticleId from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an ArticleId from an XML node.
 
         Args:
-            node (Node): The XML node to create the ArticleId from.
+            node (Node): The XML node to read the ArticleId from.
 
         Returns:
-            ArticleId: The ArticleId created from the XML node.
+            dict[str, Any]: The fields of the ArticleId, nested models as dicts of their own fields.
         """
-        return cls(id=node.text, id_type=node.attrs.get("IdType"))
+        return {"id": node.text, "id_type": node.attrs.get("IdType")}
 
 
-class Author(BaseModel):
+class Author(XmlModel):
     """An author object that represents an author of a publication."""
 
     valid: bool
@@ -245,28 +278,30 @@ class Author(BaseModel):
     identifier: Identifier | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> Author:
-        """Create an Author from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an Author from an XML node.
 
         Args:
-            node (Node): The XML node to create the Author from.
+            node (Node): The XML node to read the Author from.
 
         Returns:
-            Author: The Author created from the XML node.
+            dict[str, Any]: The fields of the Author, nested models as dicts of their own fields.
         """
-        _identifier = node.search(by=SearchType.Tag, value="Identifier")
-        return cls(
-            valid=True if node.attrs.get("ValidYN") == "Y" else False,
-            last_name=find_tag_or_none(node, "LastName"),
-            fore_name=find_tag_or_none(node, "ForeName"),
-            initials=find_tag_or_none(node, "Initials"),
-            collective_name=find_tag_or_none(node, "CollectiveName"),
-            affiliation=find_tag_or_none(node, "Affiliation"),
-            identifier=Identifier.from_xml(_identifier[0]) if _identifier else None,
-        )
-
-
-class Chemical(BaseModel):
+        fields = children_by_tag(node)
+        _identifier = fields.get("Identifier")
+
+        return {
+            "valid": True if node.attrs.get("ValidYN") == "Y" else False,
+            "last_name": first_text(fields, "LastName"),
+            "fore_name": first_text(fields, "ForeName"),
+            "initials": first_text(fields, "Initials"),
+            "collective_name": first_text(fields, "CollectiveName"),
+            "affiliation": select_text(fields.get("AffiliationInfo", []), "Affiliation"),
+            "identifier": Identifier.fields_from_xml(_identifier[0]) if _identifier else None,
+        }
+
+
+class Chemical(XmlModel):
     """A chemical object that represents a chemical used in a publication."""
 
     registry_number: str
@@ -274,23 +309,26 @@ class Chemical(BaseModel):
     name_of_substance: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> Chemical:
-        """Create a Chemical from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Chemical from an XML node.
 
         Args:
-            node (Node): The XML node to create the Chemical from.
+            node (Node): The XML node to read the Chemical from.
 
         Returns:
-            Chemical: The Chemical created from the XML node.
+            dict[str, Any]: The fields of the Chemical, nested models as dicts of their own fields.
         """
-        return cls(
-            registry_number=node.search(SearchType.Tag, "RegistryNumber")[0].text,
-            unique_identifier=node.attrs.get("UI"),
-            name_of_substance=node.search(SearchType.Tag, "NameOfSubstance")[0].text,
-        )
+        fields = children_by_tag(node)
+        _name_of_substance = fields["NameOfSubstance"][0]
+
+        return {
+            "registry_number": fields["RegistryNumber"][0].text,
+            "unique_identifier": _name_of_substance.attrs.get("UI"),
+            "name_of_substance": _name_of_substance.text,
+        }
 
 
-class MedlineCitation(BaseModel):
+class MedlineCitation(XmlModel):
     """A citation object that represents a citation of a publication."""
 
     pmid: int
@@ -315,59 +353,66 @@ class MedlineCitation(BaseModel):
     coi_statement: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> MedlineCitation:
-        """Create a MedlineCitation from an XML node."""
-        _date_completed = define_datetime_from_node(node.search(by=SearchType.Tag, value="DateCompleted"))
-        _date_revised = define_datetime_from_node(node.search(by=SearchType.Tag, value="DateRevised")[0].children)
-
-        _keywords = node.search(by=SearchType.Tag, value="KeywordList")
-        _personal_name_subjects = node.search(by=SearchType.Tag, value="PersonalNameSubjectList")
-        _comments_corrections = node.search(by=SearchType.Tag, value="CommentsCorrectionsList")
-        _other_ids = node.search(by=SearchType.Tag, value="OtherID")
-        _other_abstracts = node.search(by=SearchType.Tag, value="OtherAbstract")
-        _general_note = node.search(by=SearchType.Tag, value="GeneralNote")
-        _space_flight_missions = node.search(by=SearchType.Tag, value="SpaceFlightMission")
-        _gene_symbols = node.search(by=SearchType.Tag, value="GeneSymbol")
-        _supplemental_meshs = node.search(by=SearchType.Tag, value="SupplMeshList")
-        _investigators = node.search(by=SearchType.Tag, value="InvestigatorList")
-
-        return cls(
-            pmid=int(node.children[0].text),
-            pmid_version=int(node.children[0].attrs.get("Version")),
-            completed=_date_completed,
-            revised=_date_revised,
-            article=Article.from_xml(node.search(by=SearchType.Tag, value="Article")[0]),
-            journal_info=MedlineJournalInfo.from_xml(node.search(by=SearchType.Tag, value="MedlineJournalInfo")[0]),
-            chemicals=[Chemical.from_xml(item) for item in node.search(by=SearchType.Tag, value="Chemical")],
-            subset=find_tag_or_none(node, "CitationSubset"),
-            mesh_headings=[MeshHeading.from_xml(item) for item in node.search(by=SearchType.Tag, value="MeshHeading")],
-            keywords=[Keyword.from_xml(item) for item in node.search(by=SearchType.Tag, value="Keyword")]
-            if _keywords
-            else None,
-            personal_name_subjects=[
-                Author.from_xml(item) for item in node.search(by=SearchType.Tag, value="PersonalNameSubject")
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a MedlineCitation from an XML node."""
+        fields = children_by_tag(node)
+        _pmid = fields["PMID"][0]
+        _date_completed = fields.get("DateCompleted")
+
+        _keywords = fields.get("KeywordList")
+        _personal_name_subjects = fields.get("PersonalNameSubjectList")
+        _comments_corrections = fields.get("CommentsCorrectionsList")
+        _other_ids = fields.get("OtherID")
+        _other_abstracts = fields.get("OtherAbstract")
+        _general_note = fields.get("GeneralNote")
+        _space_flight_missions = fields.get("SpaceFlightMission")
+        _gene_symbols = select(fields.get("GeneSymbolList", []), "GeneSymbol")
+        _supplemental_meshs = select(fields.get("SupplMeshList", []), "SupplMeshName")
+        _investigators = select(fields.get("InvestigatorList", []), "Investigator")
+
+        return {
+            "pmid": int(_pmid.text),
+            "pmid_version": int(_pmid.attrs.get("Version")),
+            "completed": define_datetime_from_node(_date_completed[0].children) if _date_completed else None,
+            "revised": define_datetime_from_node(fields["DateRevised"][0].children),
+            "article": Article.fields_from_xml(fields["Article"][0]),
+            "journal_info": MedlineJournalInfo.fields_from_xml(fields["MedlineJournalInfo"][0]),
+            "chemicals": [
+                Chemical.fields_from_xml(item) for item in select(fields.get("ChemicalList", []), "Chemical")
+            ],
+            "subset": first_text(fields, "CitationSubset"),
+            "mesh_headings": [
+                MeshHeading.fields_from_xml(item) for item in select(fields.get("MeshHeadingList", []), "MeshHeading")
+            ],
+            "keywords": [Keyword.fields_from_xml(item) for item in select(_keywords, "Keyword")] if _keywords else None,
+            "personal_name_subjects": [
+                Author.fields_from_xml(item) for item in select(_personal_name_subjects, "PersonalNameSubject")
             ]
             if _personal_name_subjects
             else None,
-            comments_corrections=[
-                CommentCorrection.from_xml(item) for item in node.search(by=SearchType.Tag, value="CommentsCorrections")
+            "comments_corrections": [
+                CommentCorrection.fields_from_xml(item) for item in select(_comments_corrections, "CommentsCorrections")
             ]
             if _comments_corrections
             else None,
-            other_ids=[Identifier.from_xml(item) for item in _other_ids] if _other_ids else None,
-            other_abstracts=[OtherAbstract.from_xml(item) for item in _other_abstracts] if _other_abstracts else None,
-            general_note=GeneralNote.from_xml(_general_note[0]) if _general_note else None,
-            space_flight_missions=[item.text for item in _space_flight_missions] if _space_flight_missions else None,
-            gene_symbols=[item.text for item in _gene_symbols] if _gene_symbols else None,
-            supplemental_meshs=[SupplementalMesh.from_xml(item) for item in _supplemental_meshs]
+            "other_ids": [Identifier.fields_from_xml(item) for item in _other_ids] if _other_ids else None,
+            "other_abstracts": [OtherAbstract.fields_from_xml(item) for item in _other_abstracts]
+            if _other_abstracts
+            else None,
+            "general_note": GeneralNote.fields_from_xml(_general_note[0]) if _general_note else None,
+            "space_flight_missions": [item.text for item in _space_flight_missions] if _space_flight_missions else None,
+            "gene_symbols": [item.text for item in _gene_symbols] if _gene_symbols else None,
+            "supplemental_meshs": [SupplementalMesh.fields_from_xml(item) for item in _supplemental_meshs]
             if _supplemental_meshs
             else None,
-            investigators=[Investigator.from_xml(item) for item in _investigators] if _investigators else None,
-            coi_statement=find_tag_or_none(node, "CoiStatement"),
-        )
+            "investigators": [Investigator.fields_from_xml(item) for item in _investigators]
+            if _investigators
+            else None,
+            "coi_statement": first_text(fields, "CoiStatement"),
+        }
 
 
-class Investigator(BaseModel):
+class Investigator(XmlModel):
     """An investigator object that represents an investigator of a publication."""
 
     last_name: str
@@ -379,23 +424,23 @@ class Investigator(BaseModel):
     valid: bool
 
     @classmethod
-    def from_xml(cls, node: Node) -> Investigator:
-        """Create an Investigator from an XML node."""
-        _affiliation = node.search(by=SearchType.Tag, value="Affiliation")
-        _identifier = node.search(by=SearchType.Tag, value="Identifier")
-
-        return cls(
-            last_name=node.search(SearchType.Tag, "LastName")[0].text,
-            fore_name=find_tag_or_none(node, "ForeName"),
-            initials=find_tag_or_none(node, "Initials"),
-            suffix=find_tag_or_none(node, "Suffix"),
-            affiliation=_affiliation[0].text if _affiliation else None,
-            identifier=Identifier.from_xml(_identifier[0]) if _identifier else None,
-            valid=True if node.attrs.get("ValidYN") == "Y" else False,
-        )
-
-
-class SupplementalMesh(BaseModel):
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an Investigator from an XML node."""
+        fields = children_by_tag(node)
+        _identifier = fields.get("Identifier")
+
+        return {
+            "last_name": fields["LastName"][0].text,
+            "fore_name": first_text(fields, "ForeName"),
+            "initials": first_text(fields, "Initials"),
+            "suffix": first_text(fields, "Suffix"),
+            "affiliation": select_text(fields.get("AffiliationInfo", []), "Affiliation"),
+            "identifier": Identifier.fields_from_xml(_identifier[0]) if _identifier else None,
+            "valid": True if node.attrs.get("ValidYN") == "Y" else False,
+        }
+
+
+class SupplementalMesh(XmlModel):
     """A supplemental mesh object that represents a supplemental mesh used in a publication."""
 
     type: str
@@ -403,16 +448,16 @@ class SupplementalMesh(BaseModel):
     name: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> SupplementalMesh:
-        """Create a SupplementalMesh from an XML node."""
-        return cls(
-            type=node.attrs.get("Type"),
-            ui=node.attrs.get("UI"),
-            name=node.text,
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a SupplementalMesh from an XML node."""
+        return {
+            "type": node.attrs.get("Type"),
+            "ui": node.attrs.get("UI"),
+            "name": node.text,
+        }
 
 
-class Grant(BaseModel):
+class Grant(XmlModel):
     """A grant object that represents a grant of a publication."""
 
     id: str | None
@@ -421,17 +466,19 @@ class Grant(BaseModel):
     country: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> Grant:
-        """Create a Grant from an XML node."""
-        return cls(
-            id=find_tag_or_none(node, "GrantID"),
-            acronym=find_tag_or_none(node, "Acronym"),
-            agency=find_tag_or_none(node, "Agency"),
-            country=find_tag_or_none(node, "Country"),
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Grant from an XML node."""
+        fields = children_by_tag(node)
 
+        return {
+            "id": first_text(fields, "GrantID"),
+            "acronym": first_text(fields, "Acronym"),
+            "agency": first_text(fields, "Agency"),
+            "country": first_text(fields, "Country"),
+        }
 
-class OtherAbstract(BaseModel):
+
+class OtherAbstract(XmlModel):
     """An other abstract object that represents an other abstract of a publication."""
 
     text: str
@@ -439,28 +486,28 @@ class OtherAbstract(BaseModel):
     language: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> OtherAbstract:
-        """Create an OtherAbstract from an XML node."""
-        return cls(
-            text=node.search(SearchType.Tag, "AbstractText")[0].text,
-            source=node.attrs.get("Source"),
-            language=node.attrs.get("Language"),
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an OtherAbstract from an XML node."""
+        return {
+            "text": select(node, "AbstractText")[0].text,
+            "source": node.attrs.get("Source"),
+            "language": node.attrs.get("Language"),
+        }
 
 
-class Identifier(BaseModel):
+class Identifier(XmlModel):
     """An identifier object that represents an identifier of a publication or an author."""
 
     id: str
     source: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> Identifier:
-        """Create an Identifier from an XML node."""
-        return cls(id=node.text, source=node.attrs.get("Source"))
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of an Identifier from an XML node."""
+        return {"id": node.text, "source": node.attrs.get("Source")}
 
 
-class MedlineJournalInfo(BaseModel):
+class MedlineJournalInfo(XmlModel):
     """A journal info object that represents information about a journal."""
 
     country: str | None
@@ -469,17 +516,19 @@ class MedlineJournalInfo(BaseModel):
     issn_linking: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> MedlineJournalInfo:
-        """Create a MedlineJournalInfo from an XML node."""
-        return cls(
-            country=find_tag_or_none(node, "Country"),
-            title_abbreviation=find_tag_or_none(node, "MedlineTA"),
-            nlm_unique_id=node.search(SearchType.Tag, "NlmUniqueID")[0].text,
-            issn_linking=find_tag_or_none(node, "ISSNLinking"),
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a MedlineJournalInfo from an XML node."""
+        fields = children_by_tag(node)
+
+        return {
+            "country": first_text(fields, "Country"),
+            "title_abbreviation": first_text(fields, "MedlineTA"),
+            "nlm_unique_id": fields["NlmUniqueID"][0].text,
+            "issn_linking": first_text(fields, "ISSNLinking"),
+        }
 
 
-class CommentCorrection(BaseModel):
+class CommentCorrection(XmlModel):
     """A comment correction object that represents a comment or correction of a publication."""
 
     pmid: int | None
@@ -488,65 +537,65 @@ class CommentCorrection(BaseModel):
     ref_type: str | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> CommentCorrection:
-        """Create a CommentCorrection from an XML node."""
-        _pmid = node.search(SearchType.Tag, "PMID")
-        _ref_source = node.search(SearchType.Tag, "RefSource")
-        _ref_type = node.search(SearchType.Attr, "RefType")
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a CommentCorrection from an XML node."""
+        fields = children_by_tag(node)
+        _pmid = fields.get("PMID")
 
-        return cls(
-            pmid=int(_pmid[0].text) if _pmid else None,
-            pmid_version=int(_pmid[0].attrs.get("Version")) if _pmid else None,
-            ref_source=_ref_source[0].text if _ref_source else None,
-            ref_type=_ref_type[0].text if _ref_type else None,
-        )
+        return {
+            "pmid": int(_pmid[0].text) if _pmid else None,
+            "pmid_version": int(_pmid[0].attrs.get("Version")) if _pmid else None,
+            "ref_source": first_text(fields, "RefSource"),
+            "ref_type": node.attrs.get("RefType"),
+        }
 
 
-class MeshHeading(BaseModel):
+class MeshHeading(XmlModel):
     """A mesh heading object that represents a mesh heading used in a publication."""
 
     descriptor: Topic
     qualifier: Topic | None
 
     @classmethod
-    def from_xml(cls, node: Node) -> MeshHeading:
-        """Create a MeshHeading from an XML node."""
-        _qualifier = node.search(SearchType.Tag, "QualifierName")
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a MeshHeading from an XML node."""
+        fields = children_by_tag(node)
+        _qualifier = fields.get("QualifierName")
 
-        return cls(
-            descriptor=Topic.from_xml(node.search(SearchType.Tag, "DescriptorName")[0]),
-            qualifier=Topic.from_xml(_qualifier[0]) if _qualifier else None,
-        )
+        return {
+            "descriptor": Topic.fields_from_xml(fields["DescriptorName"][0]),
+            "qualifier": Topic.fields_from_xml(_qualifier[0]) if _qualifier else None,
+        }
 
 
-class GeneralNote(BaseModel):
+class GeneralNote(XmlModel):
     """A general note object that represents a general note of a publication."""
 
     owner: str
     note: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> GeneralNote:
-        """Create a GeneralNote from an XML node."""
-        return cls(owner=node.attrs.get("Owner"), note=node.text)
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a GeneralNote from an XML node."""
+        return {"owner": node.attrs.get("Owner"), "note": node.text}
 
 
-class Keyword(BaseModel):
+class Keyword(XmlModel):
     """A keyword object that represents a keyword used in a publication."""
 
     major_topic: bool
     text: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> Keyword:
-        """Create a Keyword from an XML node."""
-        return cls(
-            major_topic=True if node.attrs.get("MajorTopicYN") == "Y" else False,
-            text=node.text,
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Keyword from an XML node."""
+        return {
+            "major_topic": True if node.attrs.get("MajorTopicYN") == "Y" else False,
+            "text": node.text,
+        }
 
 
-class Topic(BaseModel):
+class Topic(XmlModel):
     """A descriptor object that represents a descriptor used in a publication."""
 
     major_topic: bool
@@ -554,38 +603,38 @@ class Topic(BaseModel):
     name: str
 
     @classmethod
-    def from_xml(cls, node: Node) -> Topic:
-        """Create a Topic from an XML node."""
-        return cls(
-            major_topic=True if node.attrs.get("MajorTopicYN") == "Y" else False,
-            unique_identifier=node.attrs.get("UI"),
-            name=node.text,
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Topic from an XML node."""
+        return {
+            "major_topic": True if node.attrs.get("MajorTopicYN") == "Y" else False,
+            "unique_identifier": node.attrs.get("UI"),
+            "name": node.text,
+        }
 
 
-class PubMedPubDate(BaseModel):
+class PubMedPubDate(XmlModel):
     """A PubMed publication date object that represents a publication date."""
 
     publication_status: str
     date: datetime.date
 
     @classmethod
-    def from_xml(cls, node: Node) -> PubMedPubDate:
-        """Create a PubMedPubDate from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a PubMedPubDate from an XML node.
 
         Args:
-            node (Node): The XML node to create the PubMedPubDate from.
+            node (Node): The XML node to read the PubMedPubDate from.
 
         Returns:
-            PubMedPubDate: The PubMedPubDate created from the XML node.
+            dict[str, Any]: The fields of the PubMedPubDate, nested models as dicts of their own fields.
         """
-        return cls(
-            publication_status=node.attrs.get("PubStatus"),
-            date=define_datetime_from_node(node.children),
-        )
+        return {
+            "publication_status": node.attrs.get("PubStatus"),
+            "date": define_datetime_from_node(node.children),
+        }
 
 
-class PubmedData(BaseModel):
+class PubmedData(XmlModel):
     """A PubMed data object that represents the data of a publication."""
 
     article_ids: list[ArticleId]
@@ -594,61 +643,79 @@ class PubmedData(BaseModel):
     references: list[Reference]
 
     @classmethod
-    def from_xml(cls, node: Node) -> PubmedData:
-        """Create a PubmedData from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a PubmedData from an XML node.
 
         Args:
-            node (Node): The XML node to create the PubmedData from.
+            node (Node): The XML node to read the PubmedData from.
 
         Returns:
-            PubmedData: The PubmedData created from the XML node.
+            dict[str, Any]: The fields of the PubmedData, nested models as dicts of their own fields.
         """
-        _article_ids = [ArticleId.from_xml(item) for item in node.search(by=SearchType.Tag, value="ArticleId")]
-        _history = [PubMedPubDate.from_xml(item) for item in node.search(by=SearchType.Tag, value="PubMedPubDate")]
-        _references = [Reference.from_xml(item) for item in node.search(by=SearchType.Tag, value="Reference", depth=4)]
-
-        return cls(
-            article_ids=_article_ids,
-            publication_status=node.search(SearchType.Tag, "PublicationStatus")[0].text,
-            history=_history,
-            references=_references,
-        )
-
-
-class PubmedItem(BaseModel):
+        fields = children_by_tag(node)
+        _article_ids = [
+            ArticleId.fields_from_xml(item) for item in select(fields.get("ArticleIdList", []), "ArticleId")
+        ]
+        _history = [PubMedPubDate.fields_from_xml(item) for item in select(fields.get("History", []), "PubMedPubDate")]
+        _references = [Reference.fields_from_xml(item) for item in _reference_items(fields.get("ReferenceList", []))]
+
+        return {
+            "article_ids": _article_ids,
+            "publication_status": fields["PublicationStatus"][0].text,
+            "history": _history,
+            "references": _references,
+        }
+
+
+class PubmedItem(XmlModel):
     """A PubMed item object that represents a publication in PubMed."""
 
     citation: MedlineCitation
     data: PubmedData
 
     @classmethod
-    def from_xml(cls, node: Node) -> PubmedItem:
-        """Create a PubmedItem from an XML node.
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a PubmedItem from an XML node.
 
         Args:
-            node (Node): The XML node to create the PubmedItem from.
+            node (Node): The XML node to read the PubmedItem from.
 
         Returns:
-            PubmedItem: The PubmedItem created from the XML node.
+            dict[str, Any]: The fields of the PubmedItem, nested models as dicts of their own fields.
         """
-        _citation = MedlineCitation.from_xml(node.children[0])
-        _data = PubmedData.from_xml(node.children[1])
+        _citation = MedlineCitation.fields_from_xml(select(node, "MedlineCitation")[0])
+        _data = PubmedData.fields_from_xml(select(node, "PubmedData")[0])
 
-        return cls(citation=_citation, data=_data)
+        return {"citation": _citation, "data": _data}
 
 
-class Reference(BaseModel):
+class Reference(XmlModel):
     """A reference object that represents a reference in a publication."""
 
     citation: str
     article_ids: list[ArticleId]
 
     @classmethod
-    def from_xml(cls, node: Node) -> Reference:
-        """Create a Reference from an XML node."""
-        _article_ids = [ArticleId.from_xml(item) for item in node.search(by=SearchType.Tag, value="ArticleId")]
-
-        return cls(
-            citation=node.search(SearchType.Tag, "Citation")[0].text,
-            article_ids=_article_ids,
-        )
+    def fields_from_xml(cls, node: Node) -> dict[str, Any]:
+        """Get the fields of a Reference from an XML node."""
+        fields = children_by_tag(node)
+        _article_ids = [
+            ArticleId.fields_from_xml(item) for item in select(fields.get("ArticleIdList", []), "ArticleId")
+        ]
+
+        return {
+            "citation": fields["Citation"][0].text,
+            "article_ids": _article_ids,
+        }
+
+
+def _reference_items(reference_lists: list[Node]) -> list[Node]:
+    """Get the `Reference` nodes of `ReferenceList` nodes, including those of the lists nested in them."""
+    references = []
+    for reference_list in reference_lists:
+        for item in reference_list.children:
+            if item.name == "Reference":
+                references.append(item)
+            elif item.name == "ReferenceList":
+                references.extend(_reference_items([item]))
+    return references
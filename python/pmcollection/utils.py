@@ -1,19 +1,108 @@
 """Utility functions for pmcollection package."""
 
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 from typing import Union
 
-from rxml import Node, SearchType
+from rxml import Node, SearchType, read_string
+
+from pmcollection._lowlevel import read_xml
+from pmcollection.constants import MONTHS
+
+
+def read_pubmed_file(path: str | Path) -> Node:
+    """Read a PubMed file stored by the downloader, either raw XML or compressed with gzip or zstd.
+
+    Args:
+        path (str | Path): The path of the `.xml`, `.xml.gz` or `.xml.zst` file.
+
+    Returns:
+        Node: The `PubmedArticleSet` root node of the file.
+    """
+    return read_string(read_xml(str(path)), "PubmedArticleSet")
 
 
 def find_tag_or_none(node: Node, tag: str) -> str | None:
-    """Find a child element or return None."""
+    """Find an element at any depth below a node or return None, see `select_text` for a fixed path."""
     _node = node.search(SearchType.Tag, tag)
     return _node[0].text if _node else None
 
 
+def children_by_tag(node: Node) -> dict[str, list[Node]]:
+    """Group the children of a node by tag, in a single pass over them.
+
+    Unlike `Node.search`, only the direct children are looked at, so a schema reads all of its fields for the cost of
+    one walk over its element.
+
+    Args:
+        node (Node): The node whose children to group.
+
+    Returns:
+        dict[str, list[Node]]: The children of the node by tag, in document order.
+    """
+    fields: dict[str, list[Node]] = {}
+    for child in node.children:
+        fields.setdefault(child.name, []).append(child)
+    return fields
+
+
+def first_text(fields: dict[str, list[Node]], tag: str) -> str | None:
+    """Get the text of the first child with the given tag or return None."""
+    nodes = fields.get(tag)
+    return nodes[0].text if nodes else None
+
+
+@lru_cache(maxsize=256)
+def compile_path(path: str) -> tuple[str, ...]:
+    """Split a path like `Journal/JournalIssue/Volume` into its tags, once per distinct path.
+
+    Args:
+        path (str): The tags to follow, separated by `/`.
+
+    Returns:
+        tuple[str, ...]: The tags of the path, in order.
+
+    Raises:
+        ValueError: If the path has an empty step.
+    """
+    tags = tuple(path.split("/"))
+    if not all(tags):
+        raise ValueError(f"Invalid path: {path!r}")
+    return tags
+
+
+def select(nodes: Node | list[Node], path: str) -> list[Node]:
+    """Select the nodes at the end of a path of tags, walking only the children named by each step.
+
+    Unlike `Node.search`, the path is anchored to the starting nodes: `Journal/Title` only matches the `Title`
+    children of their `Journal` children, never a `Title` nested at another level.
+
+    Args:
+        nodes (Node | list[Node]): The node to start from, or several ones, e.g. the nodes of a tag from
+            `children_by_tag`.
+        path (str): The tags to follow, separated by `/`.
+
+    Returns:
+        list[Node]: The selected nodes, in document order.
+    """
+    selected = [nodes] if isinstance(nodes, Node) else nodes
+    for tag in compile_path(path):
+        selected = [child for node in selected for child in node.children if child.name == tag]
+    return selected
+
+
+def select_text(nodes: Node | list[Node], path: str) -> str | None:
+    """Get the text of the first node at the end of a path or return None."""
+    selected = select(nodes, path)
+    return selected[0].text if selected else None
+
+
 def define_datetime_from_node(nodes: list[Node]) -> Union[datetime, None]:
-    """Get datetime string from a child element."""
+    """Get datetime string from a child element, the month being either a number or an abbreviated name.
+
+    Like the native record parser, a date that does not exist, e.g. with a `Spring` or `Dec-Jan` month, is None.
+    """
     _year, _month, _day = None, None, None
     for node in nodes:
         match node.name:
@@ -26,9 +115,12 @@ def define_datetime_from_node(nodes: list[Node]) -> Union[datetime, None]:
 
     if not _year:
         return None
-    elif not _month:
-        return datetime(int(_year), 1, 1)
-    elif not _day:
-        return datetime(int(_year), int(_month), 1)
-    else:
-        return datetime(int(_year), int(_month), int(_day))
+    try:
+        if not _month:
+            return datetime(int(_year), 1, 1)
+        elif not _day:
+            return datetime(int(_year), int(MONTHS.get(_month, _month)), 1)
+        else:
+            return datetime(int(_year), int(MONTHS.get(_month, _month)), int(_day))
+    except ValueError:
+        return None
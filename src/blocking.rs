@@ -0,0 +1,78 @@
+use std::io;
+use std::panic::{self, AssertUnwindSafe};
+use std::sync::mpsc::{self, Receiver, Sender};
+use std::sync::{Arc, Mutex};
+use std::thread;
+use tokio::sync::oneshot;
+
+
+type Job = Box<dyn FnOnce() + Send>;
+
+
+/// A fixed set of threads running the CPU-bound and blocking parts of the transfers, such as inflating and
+/// recompressing the files, so they never hold up the runtime workers driving the network I/O.
+///
+/// The threads stop once the pool is dropped and the jobs already queued are done.
+pub struct BlockingPool {
+    sender: Mutex<Sender<Job>>,
+}
+
+impl BlockingPool {
+    /// Start a pool of `threads` threads, at least one.
+    pub fn new(threads: usize) -> io::Result<Self> {
+        let threads = threads.max(1);
+        let (sender, receiver) = mpsc::channel::<Job>();
+        let receiver = Arc::new(Mutex::new(receiver));
+
+        for index in 0..threads {
+            let receiver = Arc::clone(&receiver);
+            thread::Builder::new().name(format!("pmcollection-blocking-{}", index)).spawn(move || work(&receiver))?;
+        }
+
+        Ok(Self { sender: Mutex::new(sender) })
+    }
+
+    /// A pool with one thread per core.
+    pub fn with_available_parallelism() -> io::Result<Self> {
+        Self::new(thread::available_parallelism().map_or(1, |threads| threads.get()))
+    }
+
+    /// Queue `job` and wait for its result.
+    ///
+    /// The job is queued right away, not when the result is awaited, so the caller can keep doing I/O while it runs.
+    pub fn spawn<T: Send + 'static>(&self, job: impl FnOnce() -> T + Send + 'static) -> BlockingJob<T> {
+        let (sender, receiver) = oneshot::channel();
+        let job: Job = Box::new(move || {
+            let _ = sender.send(job());
+        });
+        // The threads only stop once the sender is dropped, with the pool
+        let _ = self.sender.lock().unwrap().send(job);
+
+        BlockingJob { receiver }
+    }
+}
+
+
+/// The result of a job queued on a `BlockingPool`.
+pub struct BlockingJob<T> {
+    receiver: oneshot::Receiver<T>,
+}
+
+impl<T> BlockingJob<T> {
+    pub async fn join(self) -> io::Result<T> {
+        self.receiver.await.map_err(|_| io::Error::other("blocking job panicked"))
+    }
+}
+
+
+fn work(receiver: &Mutex<Receiver<Job>>) {
+    loop {
+        // The lock is released as soon as a job is taken, before running it
+        let job = match receiver.lock().unwrap().recv() {
+            Ok(job) => job,
+            Err(_) => return,
+        };
+        // A panicking job drops its result sender, which its caller sees as an error, the thread keeps serving
+        let _ = panic::catch_unwind(AssertUnwindSafe(job));
+    }
+}
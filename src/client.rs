@@ -0,0 +1,54 @@
+use reqwest::Client;
+use std::time::Duration;
+
+
+/// Settings of the HTTP client shared by the transfers of a downloader.
+#[derive(Clone, Debug)]
+pub struct ClientConfig {
+    /// Idle connections kept open per host, ready for the next request.
+    pub pool_max_idle_per_host: usize,
+    /// How long an idle connection stays in the pool, forever if `None`.
+    pub pool_idle_timeout: Option<Duration>,
+    /// Interval of the TCP keep-alive probes, disabled if `None`.
+    pub tcp_keepalive: Option<Duration>,
+    pub connect_timeout: Option<Duration>,
+    /// Longest wait for the next bytes of a response, the transfer of a large file is not bounded as a whole.
+    pub read_timeout: Option<Duration>,
+    /// Negotiate HTTP/2 when the server offers it, otherwise stick to HTTP/1.1.
+    pub http2: bool,
+}
+
+impl Default for ClientConfig {
+    fn default() -> Self {
+        Self {
+            pool_max_idle_per_host: 32,
+            pool_idle_timeout: Some(Duration::from_secs(90)),
+            tcp_keepalive: Some(Duration::from_secs(60)),
+            connect_timeout: Some(Duration::from_secs(30)),
+            read_timeout: Some(Duration::from_secs(120)),
+            http2: true,
+        }
+    }
+}
+
+impl ClientConfig {
+    pub fn build(&self) -> reqwest::Result<Client> {
+        let mut builder = Client::builder()
+            .pool_max_idle_per_host(self.pool_max_idle_per_host)
+            .pool_idle_timeout(self.pool_idle_timeout)
+            .tcp_keepalive(self.tcp_keepalive);
+
+        if let Some(timeout) = self.connect_timeout {
+            builder = builder.connect_timeout(timeout);
+        }
+        if let Some(timeout) = self.read_timeout {
+            builder = builder.read_timeout(timeout);
+        }
+        builder = match self.http2 {
+            true => builder.http2_adaptive_window(true),
+            false => builder.http1_only(),
+        };
+
+        builder.build()
+    }
+}
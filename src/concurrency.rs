@@ -0,0 +1,341 @@
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::Mutex;
+use std::time::Duration;
+use tokio::sync::{Semaphore, SemaphorePermit};
+use tokio::time::Instant;
+
+
+/// Length of the windows over which the throughput of all the transfers is measured.
+const WINDOW: Duration = Duration::from_secs(2);
+
+/// Relative throughput gain over the previous window needed to add one more transfer.
+const MIN_GAIN: f64 = 0.05;
+
+/// Ratio of the mean time to first byte of a window over the best one seen that is treated as congestion.
+const MAX_LATENCY_RATIO: f64 = 2.0;
+
+/// Number of transfers an adaptive limiter starts with.
+const INITIAL_ADAPTIVE_LIMIT: usize = 2;
+
+
+/// Limits the number of transfers running at a time.
+///
+/// A fixed limiter is a plain semaphore. An adaptive one changes its limit AIMD style: every `WINDOW` it compares the
+/// aggregate throughput to the previous window and adds one transfer while it keeps improving, and halves the limit
+/// when a transfer fails or when the time to first byte rises well above the best one seen.
+pub struct ConcurrencyLimiter {
+    semaphore: Semaphore,
+    limit: AtomicUsize,
+    /// Permits to forget instead of releasing, the pending part of a decrease.
+    shrink: AtomicUsize,
+    controller: Option<Mutex<Controller>>,
+}
+
+impl ConcurrencyLimiter {
+    pub fn fixed(limit: usize) -> Self {
+        Self {
+            semaphore: Semaphore::new(limit),
+            limit: AtomicUsize::new(limit),
+            shrink: AtomicUsize::new(0),
+            controller: None,
+        }
+    }
+
+    /// An adaptive limiter staying between 1 and `max_limit` transfers.
+    pub fn adaptive(max_limit: usize) -> Self {
+        let max_limit = max_limit.max(1);
+        let limit = INITIAL_ADAPTIVE_LIMIT.min(max_limit);
+
+        Self {
+            semaphore: Semaphore::new(limit),
+            limit: AtomicUsize::new(limit),
+            shrink: AtomicUsize::new(0),
+            controller: Some(Mutex::new(Controller::new(max_limit))),
+        }
+    }
+
+    /// Current number of transfers allowed at a time.
+    pub fn limit(&self) -> usize {
+        self.limit.load(Ordering::Relaxed)
+    }
+
+    pub async fn acquire(&self) -> Permit<'_> {
+        let permit = self.semaphore.acquire().await.expect("the semaphore is never closed");
+        Permit { permit: Some(permit), limiter: self }
+    }
+
+    /// Account for bytes received by a transfer.
+    pub fn record_bytes(&self, bytes: u64) {
+        self.with_controller(|controller| {
+            controller.bytes += bytes;
+            controller.evaluate(self.limit())
+        });
+    }
+
+    /// Account for the time a request took to get its response headers.
+    pub fn record_latency(&self, latency: Duration) {
+        self.with_controller(|controller| {
+            controller.latencies += latency;
+            controller.requests += 1;
+            None
+        });
+    }
+
+    /// Account for a transfer that failed because of the network or the server.
+    pub fn record_error(&self) {
+        self.with_controller(|controller| controller.decrease(self.limit()));
+    }
+
+    fn with_controller(&self, f: impl FnOnce(&mut Controller) -> Option<usize>) {
+        let Some(controller) = &self.controller else {
+            return;
+        };
+        // The lock is held while resizing, so the next evaluation sees the new limit
+        let mut controller = controller.lock().unwrap();
+        if let Some(new_limit) = f(&mut controller) {
+            self.resize(new_limit);
+        }
+    }
+
+    fn resize(&self, new_limit: usize) {
+        let limit = self.limit.swap(new_limit, Ordering::Relaxed);
+
+        if new_limit > limit {
+            let mut grow = new_limit - limit;
+            // Cancel the part of a previous decrease that has not happened yet before adding permits
+            while grow > 0 && self.try_take_shrink() {
+                grow -= 1;
+            }
+            self.semaphore.add_permits(grow);
+        } else {
+            self.shrink.fetch_add(limit - new_limit, Ordering::Relaxed);
+        }
+    }
+
+    fn try_take_shrink(&self) -> bool {
+        self.shrink
+            .fetch_update(Ordering::Relaxed, Ordering::Relaxed, |shrink| shrink.checked_sub(1))
+            .is_ok()
+    }
+}
+
+
+/// A transfer slot, given back to the limiter when dropped unless the limit went down in the meantime.
+pub struct Permit<'a> {
+    permit: Option<SemaphorePermit<'a>>,
+    limiter: &'a ConcurrencyLimiter,
+}
+
+impl Drop for Permit<'_> {
+    fn drop(&mut self) {
+        if let Some(permit) = self.permit.take() {
+            if self.limiter.try_take_shrink() {
+                permit.forget();
+            }
+        }
+    }
+}
+
+
+/// State of the AIMD controller of an adaptive limiter.
+struct Controller {
+    max_limit: usize,
+    window_start: Instant,
+    bytes: u64,
+    latencies: Duration,
+    requests: u32,
+    previous_throughput: f64,
+    best_latency: Option<Duration>,
+    last_decrease: Option<Instant>,
+}
+
+impl Controller {
+    fn new(max_limit: usize) -> Self {
+        Self {
+            max_limit,
+            window_start: Instant::now(),
+            bytes: 0,
+            latencies: Duration::ZERO,
+            requests: 0,
+            previous_throughput: 0.0,
+            best_latency: None,
+            last_decrease: None,
+        }
+    }
+
+    /// Close the current window if it is over, returning the new limit if it changes.
+    fn evaluate(&mut self, limit: usize) -> Option<usize> {
+        let elapsed = self.window_start.elapsed();
+        if elapsed < WINDOW {
+            return None;
+        }
+
+        let throughput = self.bytes as f64 / elapsed.as_secs_f64();
+        let latency = (self.requests > 0).then(|| self.latencies / self.requests);
+        let congested = match (latency, self.best_latency) {
+            (Some(latency), Some(best)) => latency.as_secs_f64() > best.as_secs_f64() * MAX_LATENCY_RATIO,
+            _ => false,
+        };
+        if let Some(latency) = latency {
+            self.best_latency = Some(self.best_latency.map_or(latency, |best| best.min(latency)));
+        }
+        let improved = throughput > self.previous_throughput * (1.0 + MIN_GAIN);
+
+        self.previous_throughput = throughput;
+        self.window_start = Instant::now();
+        self.bytes = 0;
+        self.latencies = Duration::ZERO;
+        self.requests = 0;
+
+        if congested {
+            self.decrease(limit)
+        } else if improved && limit < self.max_limit {
+            Some(limit + 1)
+        } else {
+            None
+        }
+    }
+
+    fn decrease(&mut self, limit: usize) -> Option<usize> {
+        // A burst of failures is one congestion event, the limit is halved at most once per window
+        if self.last_decrease.is_some_and(|at| at.elapsed() < WINDOW) {
+            return None;
+        }
+        self.last_decrease = Some(Instant::now());
+
+        let new_limit = (limit / 2).max(1);
+        // The next window measures the new limit from scratch
+        self.previous_throughput = 0.0;
+        self.window_start = Instant::now();
+        self.bytes = 0;
+
+        (new_limit != limit).then_some(new_limit)
+    }
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use futures::future::join_all;
+
+    /// Let a window go by on the paused clock and close it with `bytes` received.
+    async fn close_window(limiter: &ConcurrencyLimiter, bytes: u64) {
+        tokio::time::advance(WINDOW).await;
+        limiter.record_bytes(bytes);
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn adds_one_transfer_per_window_while_the_throughput_improves() {
+        let limiter = ConcurrencyLimiter::adaptive(8);
+        assert_eq!(limiter.limit(), INITIAL_ADAPTIVE_LIMIT);
+
+        // Bytes only count once the window is over
+        limiter.record_bytes(1000);
+        assert_eq!(limiter.limit(), 2);
+        close_window(&limiter, 1000).await;
+        assert_eq!(limiter.limit(), 3);
+
+        // A gain below MIN_GAIN keeps the limit, one above it adds a transfer
+        close_window(&limiter, 2080).await;
+        assert_eq!(limiter.limit(), 3);
+        close_window(&limiter, 2200).await;
+        assert_eq!(limiter.limit(), 4);
+        assert_eq!(limiter.semaphore.available_permits(), 4);
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn stays_between_one_and_the_concurrency_limit() {
+        let limiter = ConcurrencyLimiter::adaptive(3);
+        for bytes in [1000, 2000, 3000] {
+            close_window(&limiter, bytes).await;
+        }
+        assert_eq!(limiter.limit(), 3);
+        assert_eq!(limiter.semaphore.available_permits(), 3);
+
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 1);
+        tokio::time::advance(WINDOW).await;
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 1);
+
+        assert_eq!(ConcurrencyLimiter::adaptive(0).limit(), 1);
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn halves_on_errors_at_most_once_per_window() {
+        let limiter = ConcurrencyLimiter::adaptive(16);
+        limiter.resize(16);
+
+        limiter.record_error();
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 8);
+        tokio::time::advance(WINDOW / 2).await;
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 8);
+        tokio::time::advance(WINDOW / 2).await;
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 4);
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn halves_when_the_latency_doubles() {
+        let limiter = ConcurrencyLimiter::adaptive(16);
+        limiter.record_latency(Duration::from_millis(100));
+        close_window(&limiter, 1000).await;
+        assert_eq!(limiter.limit(), 3);
+
+        // Below twice the best latency seen is not congestion
+        limiter.record_latency(Duration::from_millis(150));
+        limiter.record_latency(Duration::from_millis(230));
+        close_window(&limiter, 2000).await;
+        assert_eq!(limiter.limit(), 4);
+
+        limiter.record_latency(Duration::from_millis(250));
+        close_window(&limiter, 3000).await;
+        assert_eq!(limiter.limit(), 2);
+
+        // The decrease counts for the whole window, errors right after it are the same congestion event
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 2);
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn running_transfers_absorb_a_decrease_when_they_end() {
+        let limiter = ConcurrencyLimiter::adaptive(4);
+        close_window(&limiter, 1000).await;
+        close_window(&limiter, 2000).await;
+        let mut permits = join_all((0..4).map(|_| limiter.acquire())).await;
+
+        limiter.record_error();
+        assert_eq!(limiter.limit(), 2);
+        assert_eq!(limiter.semaphore.available_permits(), 0);
+
+        // The first two permits dropped are forgotten, the next ones go back to the semaphore
+        permits.pop();
+        permits.pop();
+        assert_eq!(limiter.semaphore.available_permits(), 0);
+        permits.pop();
+        assert_eq!(limiter.semaphore.available_permits(), 1);
+        // The semaphore stays open, the freed slot can be taken again
+        drop(limiter.acquire().await);
+        permits.clear();
+        assert_eq!(limiter.semaphore.available_permits(), 2);
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn an_increase_cancels_the_pending_part_of_a_decrease() {
+        let limiter = ConcurrencyLimiter::adaptive(4);
+        close_window(&limiter, 1000).await;
+        close_window(&limiter, 2000).await;
+        let permits = join_all((0..4).map(|_| limiter.acquire())).await;
+
+        limiter.record_error();
+        close_window(&limiter, 1000).await;
+        assert_eq!(limiter.limit(), 3);
+        assert_eq!(limiter.semaphore.available_permits(), 0);
+
+        drop(permits);
+        assert_eq!(limiter.semaphore.available_permits(), 3);
+    }
+}
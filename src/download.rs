@@ -0,0 +1,523 @@
+use reqwest::Client;
+use std::error::Error;
+use std::fmt;
+use std::future::Future;
+use std::io::{self, SeekFrom};
+use std::path::{Path, PathBuf};
+use std::pin::Pin;
+use std::sync::Arc;
+use std::task::{Context, Poll};
+use std::time::{Duration, Instant};
+use tokio::fs::{File, OpenOptions};
+use tokio::io::{AsyncReadExt, AsyncSeekExt, AsyncWriteExt, BufWriter};
+use tokio::runtime::Handle;
+use tokio::task::JoinHandle;
+
+use crate::blocking::BlockingPool;
+use crate::concurrency::ConcurrencyLimiter;
+use crate::inflate::{PooledInflater, Transfer};
+use crate::manifest::{FileStatus, Manifest, ManifestEntry};
+use crate::output::OutputFormat;
+use crate::retry::{is_corrupt_data, RetryPolicy};
+use crate::source::{self, Source};
+use crate::space::DiskSpace;
+use crate::throttle::Throttle;
+
+
+/// Capacity of the buffers used to inflate and write the decompressed files.
+pub const WRITE_BUFFER_SIZE: usize = 256 * 1024;
+
+
+pub type BoxError = Box<dyn Error + Send + Sync>;
+
+
+/// How `fetch_and_save` handles a file.
+#[derive(Clone, Default)]
+pub struct FetchOptions {
+    /// Continue interrupted transfers and skip the files that are already complete.
+    pub resume: bool,
+    /// Check the compressed bytes against the `.md5` sidecar published next to the file.
+    pub verify: bool,
+    pub retry: RetryPolicy,
+    /// How the files are stored in the cache folder.
+    pub format: OutputFormat,
+    /// Limits shared with the other transfers of the same call.
+    pub throttle: Arc<Throttle>,
+    /// Free space and size cap of the cache folder, shared with the other transfers of the same call.
+    pub space: Arc<DiskSpace>,
+}
+
+
+/// The compressed bytes of a file do not match its `.md5` sidecar.
+#[derive(Debug)]
+pub struct ChecksumMismatch {
+    pub expected: String,
+    pub actual: String,
+}
+
+impl fmt::Display for ChecksumMismatch {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        write!(f, "MD5 mismatch: expected {}, got {}", self.expected, self.actual)
+    }
+}
+
+impl Error for ChecksumMismatch {}
+
+
+/// What happened to a file handed to `fetch_and_save`.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum FetchStatus {
+    Downloaded,
+    Skipped,
+    Failed,
+}
+
+impl FetchStatus {
+    pub fn as_str(&self) -> &'static str {
+        match self {
+            FetchStatus::Downloaded => "downloaded",
+            FetchStatus::Skipped => "skipped",
+            FetchStatus::Failed => "failed",
+        }
+    }
+}
+
+
+/// Outcome of `fetch_and_save` for one URL.
+#[derive(Clone, Debug)]
+pub struct FetchReport {
+    pub url: String,
+    /// Path of the stored file, `None` if the URL does not name a `.gz` file.
+    pub path: Option<PathBuf>,
+    pub status: FetchStatus,
+    /// Compressed bytes received over the network, over all the attempts.
+    pub bytes_transferred: u64,
+    pub decompressed_size: u64,
+    pub elapsed: Duration,
+    /// Number of attempts made after the first one.
+    pub retries: u32,
+    pub error: Option<String>,
+    /// Number of transfers allowed at a time when the file was done.
+    pub concurrency: usize,
+}
+
+impl FetchReport {
+    pub fn new(url: &str) -> Self {
+        Self {
+            url: url.to_string(),
+            path: None,
+            status: FetchStatus::Failed,
+            bytes_transferred: 0,
+            decompressed_size: 0,
+            elapsed: Duration::ZERO,
+            retries: 0,
+            error: None,
+            concurrency: 0,
+        }
+    }
+
+    /// Report of a URL whose download could not run at all.
+    pub fn failed(url: &str, error: String) -> Self {
+        Self { error: Some(error), ..Self::new(url) }
+    }
+}
+
+
+/// A running `fetch_and_save` task, resolving to its report.
+///
+/// The task is aborted when this handle is dropped before completion, so cancelling the Python awaitable or dropping
+/// an iterator stops the transfers it started.
+pub struct DownloadTask {
+    url: String,
+    handle: JoinHandle<FetchReport>,
+}
+
+impl Future for DownloadTask {
+    type Output = FetchReport;
+
+    fn poll(mut self: Pin<&mut Self>, cx: &mut Context<'_>) -> Poll<FetchReport> {
+        let task = &mut *self;
+        match Pin::new(&mut task.handle).poll(cx) {
+            Poll::Ready(Ok(report)) => Poll::Ready(report),
+            Poll::Ready(Err(err)) => Poll::Ready(FetchReport::failed(&task.url, err.to_string())),
+            Poll::Pending => Poll::Pending,
+        }
+    }
+}
+
+impl Drop for DownloadTask {
+    fn drop(&mut self) {
+        self.handle.abort();
+    }
+}
+
+
+/// Create `cache_folder` if needed and load its manifest.
+pub async fn open_cache(cache_folder: &Path) -> io::Result<Arc<Manifest>> {
+    tokio::fs::create_dir_all(cache_folder).await?;
+    Ok(Arc::new(Manifest::load(cache_folder).await?))
+}
+
+
+/// Open `cache_folder` to download `urls` into it, refusing to start if they do not fit according to `options.space`.
+pub async fn prepare_cache(
+    client: &Client,
+    urls: &[String],
+    cache_folder: &Path,
+    options: &FetchOptions,
+) -> io::Result<Arc<Manifest>> {
+    let manifest = open_cache(cache_folder).await?;
+    options.space.preflight(client, urls, cache_folder, &manifest, options.format, &options.throttle).await?;
+    Ok(manifest)
+}
+
+
+/// Start one `fetch_and_save` task per URL on `runtime`, as many of them transferring at a time as `limiter` allows.
+///
+/// The tasks are returned in the order of `urls`.
+#[allow(clippy::too_many_arguments)]
+pub fn spawn_downloads(
+    runtime: &Handle,
+    client: &Client,
+    pool: &Arc<BlockingPool>,
+    urls: Vec<String>,
+    cache_folder: &Path,
+    manifest: Arc<Manifest>,
+    limiter: Arc<ConcurrencyLimiter>,
+    options: FetchOptions,
+) -> Vec<DownloadTask> {
+    let options = Arc::new(options);
+
+    urls.into_iter()
+        .map(|url| {
+            let client = client.clone();
+            let pool = Arc::clone(pool);
+            let manifest = Arc::clone(&manifest);
+            let limiter = Arc::clone(&limiter);
+            let options = Arc::clone(&options);
+            let cache_folder = cache_folder.to_path_buf();
+            let task_url = url.clone();
+
+            let handle = runtime.spawn(async move {
+                fetch_and_save(&client, &pool, &task_url, &cache_folder, &manifest, &limiter, &options).await
+            });
+
+            DownloadTask { url, handle }
+        })
+        .collect()
+}
+
+
+/// Download a `.gz` file, or copy a local one as described by `Source`, and store it into `cache_folder` in the format
+/// of `options.format`.
+///
+/// The compressed bytes are kept in a `<name>.gz.part` file while the transfer is running, its length being the
+/// offset to resume from. When `options.resume` is set, an interrupted transfer continues with a `Range` request and
+/// the bytes already on disk are replayed through the decoder, and files that are already complete are skipped.
+///
+/// The output is written to a `.tmp` file, synced and renamed into place once complete, and the manifest is updated
+/// after that, so a file under its final name is always a complete one, even after a crash.
+///
+/// When `options.verify` is set, the compressed bytes are hashed as they stream and compared to the `.md5` sidecar of
+/// the file, a mismatching file is downloaded again from scratch. Completed files are recorded in the manifest, so
+/// verified files are skipped on later runs without being hashed again.
+///
+/// Failed attempts are retried according to `options.retry`. A permit of `limiter` is held during each attempt and
+/// released while backing off, so a waiting task does not hold back the other transfers. Requests and received bytes
+/// go through `options.throttle`. Room for the file is reserved with `options.space` once the permit is acquired.
+///
+/// Inflating and recompressing run on `pool`, overlapping with the network transfer.
+pub async fn fetch_and_save(
+    client: &Client,
+    pool: &BlockingPool,
+    url: &str,
+    cache_folder: &Path,
+    manifest: &Manifest,
+    limiter: &ConcurrencyLimiter,
+    options: &FetchOptions,
+) -> FetchReport {
+    let start = Instant::now();
+    let mut report = FetchReport::new(url);
+
+    match fetch(client, pool, url, cache_folder, manifest, limiter, options, &mut report).await {
+        Ok(status) => report.status = status,
+        Err(err) => report.error = Some(err.to_string()),
+    }
+    report.elapsed = start.elapsed();
+    report.concurrency = limiter.limit();
+
+    report
+}
+
+
+#[allow(clippy::too_many_arguments)]
+async fn fetch(
+    client: &Client,
+    pool: &BlockingPool,
+    url: &str,
+    cache_folder: &Path,
+    manifest: &Manifest,
+    limiter: &ConcurrencyLimiter,
+    options: &FetchOptions,
+    report: &mut FetchReport,
+) -> Result<FetchStatus, BoxError> {
+    let source = Source::parse(url)?;
+    let file_name = source::file_name(url);
+    let Some(decompressed_file_name) = file_name.strip_suffix(".gz") else {
+        return Err(io::Error::new(io::ErrorKind::InvalidInput, "URL does not point to a .gz file").into());
+    };
+    let output_file_name = options.format.file_name(decompressed_file_name);
+    let paths = FilePaths {
+        file_name,
+        output: cache_folder.join(&output_file_name),
+        temp: temp_path(cache_folder, &output_file_name),
+        part: part_path(cache_folder, file_name),
+    };
+    report.path = Some(paths.output.clone());
+
+    if options.resume {
+        if let Some(size) = complete_size(&paths, manifest, options.verify).await {
+            report.decompressed_size = size;
+            return Ok(FetchStatus::Skipped);
+        }
+    }
+
+    let mut expected_md5 = None;
+    let mut resume = options.resume;
+    loop {
+        let result = {
+            let _permit = limiter.acquire().await;
+            let _reservation = options.space.reserve(url, cache_folder, manifest, options.format).await?;
+            attempt(client, pool, &source, &paths, manifest, limiter, options, resume, &mut expected_md5, report).await
+        };
+
+        let err = match result {
+            Ok(()) => return Ok(FetchStatus::Downloaded),
+            Err(err) => err,
+        };
+        let retryable = options.retry.should_retry(&*err);
+        if retryable {
+            limiter.record_error();
+        }
+        if report.retries + 1 >= options.retry.max_attempts || !retryable {
+            return Err(err);
+        }
+
+        // The bytes on disk are the culprit, start the file over
+        if err.is::<ChecksumMismatch>() || err.downcast_ref::<io::Error>().is_some_and(is_corrupt_data) {
+            resume = false;
+        }
+        report.retries += 1;
+        tokio::time::sleep(options.retry.backoff(report.retries)).await;
+    }
+}
+
+
+/// Paths of the files of one download in the cache folder.
+struct FilePaths<'a> {
+    /// Name of the remote `.gz` file, the key of the file in the manifest.
+    file_name: &'a str,
+    /// The stored file, in the output format.
+    output: PathBuf,
+    /// Where the output is written until it is complete and synced.
+    temp: PathBuf,
+    part: PathBuf,
+}
+
+
+/// One attempt at downloading, checking and recording a file.
+#[allow(clippy::too_many_arguments)]
+async fn attempt(
+    client: &Client,
+    pool: &BlockingPool,
+    source: &Source,
+    paths: &FilePaths<'_>,
+    manifest: &Manifest,
+    limiter: &ConcurrencyLimiter,
+    options: &FetchOptions,
+    resume: bool,
+    expected_md5: &mut Option<String>,
+    report: &mut FetchReport,
+) -> Result<(), BoxError> {
+    if options.verify && expected_md5.is_none() {
+        *expected_md5 = Some(fetch_md5(client, source, &options.throttle).await?);
+    }
+
+    let bytes_transferred = &mut report.bytes_transferred;
+    let transfer = transfer(client, pool, source, paths, limiter, options, resume, bytes_transferred).await?;
+    report.decompressed_size = transfer.decompressed_size;
+
+    if let (Some(expected), Some(actual)) = (expected_md5.as_ref(), transfer.md5.as_ref()) {
+        if expected != actual {
+            let _ = tokio::fs::remove_file(&paths.part).await;
+            let _ = tokio::fs::remove_file(&paths.temp).await;
+            return Err(ChecksumMismatch { expected: expected.clone(), actual: actual.clone() }.into());
+        }
+    }
+
+    // The output only ever appears complete under its name, and the manifest is updated last, so a crash at any point
+    // leaves either a complete file or one that is downloaded again
+    match options.format {
+        // The compressed bytes are the stored file when keeping the gzip
+        OutputFormat::Gzip => tokio::fs::rename(&paths.part, &paths.output).await?,
+        _ => {
+            tokio::fs::rename(&paths.temp, &paths.output).await?;
+            tokio::fs::remove_file(&paths.part).await?;
+        },
+    }
+    if let Some(cache_folder) = paths.output.parent() {
+        sync_dir(cache_folder).await?;
+    }
+
+    let entry = ManifestEntry {
+        size: transfer.size,
+        decompressed_size: transfer.decompressed_size,
+        stored_size: Some(tokio::fs::metadata(&paths.output).await?.len()),
+        status: if transfer.md5.is_some() { FileStatus::Verified } else { FileStatus::Downloaded },
+        md5: transfer.md5,
+        mtime: None,
+    };
+    manifest.record(paths.file_name, entry).await?;
+
+    Ok(())
+}
+
+
+/// Stream `source` into its `.part` file and through the decoder into the temporary output file, both synced to disk.
+#[allow(clippy::too_many_arguments)]
+async fn transfer(
+    client: &Client,
+    pool: &BlockingPool,
+    source: &Source,
+    paths: &FilePaths<'_>,
+    limiter: &ConcurrencyLimiter,
+    options: &FetchOptions,
+    resume: bool,
+    bytes_transferred: &mut u64,
+) -> Result<Transfer, BoxError> {
+    let (part_path, throttle) = (&paths.part, &options.throttle);
+    let offset = match tokio::fs::metadata(part_path).await {
+        Ok(metadata) if resume => metadata.len(),
+        _ => 0,
+    };
+
+    if let Source::Http(url) = source {
+        throttle.request(url).await;
+    }
+    let sent = Instant::now();
+    // Back to zero when the source cannot resume, without a body when the `.part` file already holds the whole file
+    let (body, offset) = source.open(client, offset).await?;
+    limiter.record_latency(sent.elapsed());
+
+    // The `.part` file is created before the output so an interrupted transfer is never taken for a complete one
+    let mut part_file = OpenOptions::new().write(true).create(true).open(part_path).await?;
+    part_file.set_len(offset).await?;
+    part_file.seek(SeekFrom::Start(offset)).await?;
+    let mut part_writer = BufWriter::with_capacity(WRITE_BUFFER_SIZE, part_file);
+
+    let mut inflater = PooledInflater::new(pool, options.format, &paths.temp, options.verify);
+
+    let result = async {
+        if offset > 0 {
+            replay(part_path, offset, &mut inflater).await?;
+        }
+        if let Some(mut body) = body {
+            while let Some(chunk) = body.chunk().await? {
+                *bytes_transferred += chunk.len() as u64;
+                limiter.record_bytes(chunk.len() as u64);
+                throttle.receive(chunk.len()).await;
+                part_writer.write_all(&chunk).await?;
+                inflater.write(&chunk).await?;
+            }
+        }
+        part_writer.flush().await?;
+        if options.format == OutputFormat::Gzip {
+            part_writer.get_ref().sync_all().await?;
+        }
+        Ok::<Transfer, BoxError>(inflater.finish().await?)
+    }
+    .await;
+
+    if let Err(err) = &result {
+        // The output is rebuilt from the `.part` file on resume
+        let _ = tokio::fs::remove_file(&paths.temp).await;
+        // Bytes that cannot be inflated are not worth resuming from, a network error keeps them
+        if err.downcast_ref::<io::Error>().is_some_and(is_corrupt_data) {
+            let _ = tokio::fs::remove_file(part_path).await;
+        }
+    }
+
+    result
+}
+
+
+/// Decompressed size of a file if it is already complete in the cache folder and does not need to be downloaded.
+///
+/// A file is complete when its output exists without a `.part` file next to it, outputs only being renamed into place
+/// once complete. When `verify` is set, the manifest must also record it as verified, with the size of the output
+/// unchanged since then.
+async fn complete_size(paths: &FilePaths<'_>, manifest: &Manifest, verify: bool) -> Option<u64> {
+    let size = tokio::fs::metadata(&paths.output).await.ok()?.len();
+    if tokio::fs::try_exists(&paths.part).await.unwrap_or(true) {
+        return None;
+    }
+
+    let entry = manifest.get(paths.file_name).await;
+    // Entries written before the output formats existed describe a raw XML file
+    let recorded = entry.filter(|entry| entry.stored_size.unwrap_or(entry.decompressed_size) == size);
+    match verify {
+        true => recorded.filter(|entry| entry.status == FileStatus::Verified).map(|entry| entry.decompressed_size),
+        false => Some(recorded.map_or(size, |entry| entry.decompressed_size)),
+    }
+}
+
+
+/// Fetch the digest published in the `.md5` sidecar of a file, formatted as `MD5(<file name>)= <hex digest>`.
+async fn fetch_md5(client: &Client, source: &Source, throttle: &Throttle) -> Result<String, BoxError> {
+    if let Source::Http(url) = source {
+        throttle.request(url).await;
+    }
+    let body = source.read_sidecar(client, ".md5").await?;
+
+    body.split(|c: char| c.is_whitespace() || c == '=')
+        .find(|token| token.len() == 32 && token.chars().all(|c| c.is_ascii_hexdigit()))
+        .map(|token| token.to_ascii_lowercase())
+        .ok_or_else(|| io::Error::new(io::ErrorKind::InvalidData, "no MD5 digest in the .md5 sidecar").into())
+}
+
+
+/// Make the renames done in `directory` durable.
+pub async fn sync_dir(directory: &Path) -> io::Result<()> {
+    // Directories cannot be opened as files on Windows, where renames are durable once done
+    #[cfg(unix)]
+    tokio::fs::File::open(directory).await?.sync_all().await?;
+    Ok(())
+}
+
+
+/// Path of the file holding the compressed bytes of an unfinished transfer.
+pub fn part_path(cache_folder: &Path, file_name: &str) -> PathBuf {
+    cache_folder.join(format!("{}.part", file_name))
+}
+
+
+/// Path the output named `output_file_name` is written to until it is complete.
+pub fn temp_path(cache_folder: &Path, output_file_name: &str) -> PathBuf {
+    cache_folder.join(format!("{}.tmp", output_file_name))
+}
+
+
+/// Feed the first `length` bytes of a `.part` file to the decoder.
+async fn replay(part_path: &Path, length: u64, inflater: &mut PooledInflater<'_>) -> io::Result<()> {
+    let mut file = File::open(part_path).await?.take(length);
+    let mut buffer = vec![0; WRITE_BUFFER_SIZE];
+
+    loop {
+        let read = file.read(&mut buffer).await?;
+        if read == 0 {
+            return Ok(());
+        }
+        inflater.write(&buffer[..read]).await?;
+    }
+}
+
@@ -0,0 +1,365 @@
+use flate2::{read, write};
+use md5::{Digest, Md5};
+use std::collections::VecDeque;
+use std::io::{self, Read, Write};
+use std::path::Path;
+
+use crate::blocking::{BlockingJob, BlockingPool};
+use crate::download::WRITE_BUFFER_SIZE;
+use crate::output::{Output, OutputFormat};
+
+
+/// Compressed bytes of BGZF members inflated together by one job.
+const MEMBER_BATCH_SIZE: usize = 1024 * 1024;
+
+/// Batches of members being inflated ahead of the output before the transfer waits for them.
+const MAX_BATCHES_IN_FLIGHT: usize = 8;
+
+/// Length of the header of a BGZF member, up to its block size.
+const BGZF_HEADER_SIZE: usize = 18;
+
+/// Flag of the gzip header announcing an extra field.
+const FEXTRA: u8 = 0x04;
+
+
+/// Sizes and digest of a completed transfer.
+pub struct Transfer {
+    pub size: u64,
+    pub decompressed_size: u64,
+    pub md5: Option<String>,
+}
+
+
+/// Inflates a gzip stream chunk by chunk into an output, optionally hashing the compressed bytes on the way.
+///
+/// Everything it does is CPU-bound or blocking, it only runs on the blocking pool.
+struct Inflater {
+    decoder: write::MultiGzDecoder<Vec<u8>>,
+    output: Output,
+    hasher: Option<Md5>,
+    size: u64,
+    decompressed_size: u64,
+    /// Whether the stream is inflated by member batches rather than by the decoder.
+    members: bool,
+}
+
+impl Inflater {
+    fn new(output: Output, hash: bool) -> Self {
+        Self {
+            decoder: write::MultiGzDecoder::new(Vec::with_capacity(WRITE_BUFFER_SIZE)),
+            output,
+            hasher: if hash { Some(Md5::new()) } else { None },
+            size: 0,
+            decompressed_size: 0,
+            members: false,
+        }
+    }
+
+    fn write(&mut self, chunk: &[u8]) -> io::Result<()> {
+        self.account(chunk);
+
+        // The decoder only ever holds the output of the current chunk
+        self.decoder.write_all(chunk)?;
+        self.decompressed_size += self.decoder.get_ref().len() as u64;
+        self.output.write(self.decoder.get_ref())?;
+        self.decoder.get_mut().clear();
+        Ok(())
+    }
+
+    /// Take whole members of the stream along with their inflated bytes.
+    fn write_members(&mut self, members: &[u8], inflated: &[u8]) -> io::Result<()> {
+        self.account(members);
+        self.members = true;
+
+        self.decompressed_size += inflated.len() as u64;
+        self.output.write(inflated)
+    }
+
+    fn finish(mut self) -> io::Result<Transfer> {
+        // Fails if the stream was truncated, the gzip trailer holds the checksum of the data
+        if !self.members {
+            self.decoder.try_finish()?;
+            self.decompressed_size += self.decoder.get_ref().len() as u64;
+            self.output.write(self.decoder.get_ref())?;
+        }
+        self.output.finish()?;
+
+        Ok(Transfer {
+            size: self.size,
+            decompressed_size: self.decompressed_size,
+            md5: self.hasher.map(|hasher| format!("{:x}", hasher.finalize())),
+        })
+    }
+
+    fn account(&mut self, chunk: &[u8]) {
+        if let Some(hasher) = self.hasher.as_mut() {
+            hasher.update(chunk);
+        }
+        self.size += chunk.len() as u64;
+    }
+}
+
+
+/// How the members of a gzip stream can be inflated.
+enum Layout {
+    /// One decoder goes through the whole stream, in order.
+    Stream,
+    /// Every member announces its size in a BGZF extra field, so they can be cut apart and inflated in parallel.
+    Bgzf,
+}
+
+
+/// Feeds an `Inflater` running on the blocking pool from an async transfer.
+///
+/// A plain gzip stream is gathered into blocks of `WRITE_BUFFER_SIZE` bytes, a block being inflated while the next one
+/// is received, whatever its number of members. A BGZF stream, as written by `bgzip`, is cut into batches of whole
+/// members that are inflated in parallel on the pool, their output being written back in order. Other multi-member
+/// streams, such as the output of `pigz`, carry no member sizes and go through the single decoder. Errors surface when
+/// the next bytes are written or when finishing.
+pub struct PooledInflater<'a> {
+    pool: &'a BlockingPool,
+    /// The job holding the inflater, writing the previous block to the output.
+    running: Option<BlockingJob<io::Result<Inflater>>>,
+    block: Vec<u8>,
+    /// Unknown until the first header has been received.
+    layout: Option<Layout>,
+    /// Member batches being inflated, with their compressed bytes, in stream order.
+    batches: VecDeque<BlockingJob<io::Result<(Vec<u8>, Vec<u8>)>>>,
+}
+
+impl<'a> PooledInflater<'a> {
+    /// An inflater writing to a new output file at `path`, created from the pool.
+    pub fn new(pool: &'a BlockingPool, format: OutputFormat, path: &Path, hash: bool) -> Self {
+        let path = path.to_path_buf();
+        let create = pool.spawn(move || Ok(Inflater::new(Output::create(format, &path)?, hash)));
+
+        Self {
+            pool,
+            running: Some(create),
+            block: Vec::with_capacity(WRITE_BUFFER_SIZE),
+            layout: None,
+            batches: VecDeque::new(),
+        }
+    }
+
+    pub async fn write(&mut self, chunk: &[u8]) -> io::Result<()> {
+        self.block.extend_from_slice(chunk);
+
+        if self.layout.is_none() {
+            if self.block.len() < BGZF_HEADER_SIZE {
+                return Ok(());
+            }
+            self.layout = Some(match bgzf_member_size(&self.block) {
+                Some(_) => Layout::Bgzf,
+                None => Layout::Stream,
+            });
+        }
+
+        match self.layout {
+            Some(Layout::Bgzf) => {
+                while let Some(members) = take_members(&mut self.block, MEMBER_BATCH_SIZE)? {
+                    self.inflate_members(members).await?;
+                }
+            },
+            _ => {
+                if self.block.len() >= WRITE_BUFFER_SIZE {
+                    let block = std::mem::replace(&mut self.block, Vec::with_capacity(WRITE_BUFFER_SIZE));
+                    let mut inflater = self.wait().await?;
+                    self.running = Some(self.pool.spawn(move || inflater.write(&block).map(|()| inflater)));
+                }
+            },
+        }
+        Ok(())
+    }
+
+    pub async fn finish(mut self) -> io::Result<Transfer> {
+        let block = match self.layout {
+            Some(Layout::Bgzf) => {
+                if let Some(members) = take_members(&mut self.block, 0)? {
+                    self.inflate_members(members).await?;
+                }
+                if !self.block.is_empty() {
+                    return Err(io::Error::new(io::ErrorKind::UnexpectedEof, "stream ended inside a BGZF member"));
+                }
+                while !self.batches.is_empty() {
+                    self.write_batch().await?;
+                }
+                Vec::new()
+            },
+            _ => std::mem::take(&mut self.block),
+        };
+
+        let mut inflater = self.wait().await?;
+        self.pool.spawn(move || inflater.write(&block).and_then(|()| inflater.finish())).join().await?
+    }
+
+    /// Start inflating a batch of whole members, waiting for the oldest batch if too many are in flight.
+    async fn inflate_members(&mut self, members: Vec<u8>) -> io::Result<()> {
+        let job = self.pool.spawn(move || {
+            let mut inflated = Vec::with_capacity(members.len() * 4);
+            read::MultiGzDecoder::new(members.as_slice()).read_to_end(&mut inflated)?;
+            Ok((members, inflated))
+        });
+        self.batches.push_back(job);
+
+        if self.batches.len() > MAX_BATCHES_IN_FLIGHT {
+            self.write_batch().await?;
+        }
+        Ok(())
+    }
+
+    /// Wait for the oldest batch of members and hand it to the inflater.
+    async fn write_batch(&mut self) -> io::Result<()> {
+        let Some(job) = self.batches.pop_front() else {
+            return Ok(());
+        };
+        let (members, inflated) = job.join().await??;
+        let mut inflater = self.wait().await?;
+        self.running = Some(self.pool.spawn(move || inflater.write_members(&members, &inflated).map(|()| inflater)));
+        Ok(())
+    }
+
+    /// Wait for the job holding the inflater and take it back.
+    async fn wait(&mut self) -> io::Result<Inflater> {
+        self.running.take().expect("the inflater is always held by a job").join().await?
+    }
+}
+
+
+/// Total size of the BGZF member starting `data`, `None` if it does not start with a BGZF header.
+fn bgzf_member_size(data: &[u8]) -> Option<usize> {
+    let header = data.get(..BGZF_HEADER_SIZE)?;
+    let is_bgzf = header[..3] == [0x1f, 0x8b, 8] && header[3] & FEXTRA != 0 && header[12..16] == [b'B', b'C', 2, 0];
+    is_bgzf.then(|| u16::from_le_bytes([header[16], header[17]]) as usize + 1)
+}
+
+
+/// Split the whole BGZF members at the start of `buffer` off it, once they add up to at least `min_size` bytes.
+fn take_members(buffer: &mut Vec<u8>, min_size: usize) -> io::Result<Option<Vec<u8>>> {
+    let mut end = 0;
+    while end < buffer.len() {
+        if buffer.len() - end < BGZF_HEADER_SIZE {
+            break;
+        }
+        let Some(size) = bgzf_member_size(&buffer[end..]) else {
+            return Err(io::Error::new(io::ErrorKind::InvalidData, "gzip member without a BGZF block size"));
+        };
+        if end + size > buffer.len() {
+            break;
+        }
+        end += size;
+    }
+
+    if end == 0 || end < min_size {
+        return Ok(None);
+    }
+    let rest = buffer.split_off(end);
+    Ok(Some(std::mem::replace(buffer, rest)))
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use flate2::write::GzEncoder;
+    use flate2::{Compression, GzBuilder};
+
+    use crate::retry::is_corrupt_data;
+
+    /// A BGZF member holding `data`, its block size patched in once the member is compressed.
+    fn bgzf_member(data: &[u8]) -> Vec<u8> {
+        let mut encoder = GzBuilder::new().extra(vec![b'B', b'C', 2, 0, 0, 0]).write(Vec::new(), Compression::fast());
+        encoder.write_all(data).unwrap();
+        let mut member = encoder.finish().unwrap();
+        let block_size = (member.len() - 1) as u16;
+        member[16..18].copy_from_slice(&block_size.to_le_bytes());
+        member
+    }
+
+    fn gzip_member(data: &[u8]) -> Vec<u8> {
+        let mut encoder = GzEncoder::new(Vec::new(), Compression::fast());
+        encoder.write_all(data).unwrap();
+        encoder.finish().unwrap()
+    }
+
+    fn sample(size: usize) -> Vec<u8> {
+        (0..size).map(|i| b"<PubmedArticle>0123456789</PubmedArticle>\n"[i % 42]).collect()
+    }
+
+    #[test]
+    fn reads_the_size_of_bgzf_members() {
+        let member = bgzf_member(b"hello");
+        assert_eq!(bgzf_member_size(&member), Some(member.len()));
+        assert_eq!(bgzf_member_size(&gzip_member(b"hello")), None);
+        assert_eq!(bgzf_member_size(&member[..BGZF_HEADER_SIZE - 1]), None);
+    }
+
+    #[test]
+    fn takes_whole_members_only() {
+        let members: Vec<Vec<u8>> = (0..4).map(|i| bgzf_member(&sample(1000 * (i + 1)))).collect();
+        let three = members[0].len() + members[1].len() + members[2].len();
+        let mut buffer = members.concat();
+        buffer.truncate(three + 10);
+
+        // Not enough bytes yet
+        assert_eq!(take_members(&mut buffer, three + 1).unwrap(), None);
+        assert_eq!(buffer.len(), three + 10);
+
+        assert_eq!(take_members(&mut buffer, three).unwrap(), Some(members[..3].concat()));
+        assert_eq!(buffer, &members[3][..10]);
+        // The header of the next member is not complete
+        assert_eq!(take_members(&mut buffer, 0).unwrap(), None);
+
+        let mut plain = gzip_member(b"hello");
+        assert_eq!(take_members(&mut plain, 0).unwrap_err().kind(), io::ErrorKind::InvalidData);
+    }
+
+    /// Inflate `stream` through a `PooledInflater`, received in chunks of `chunk_size` bytes.
+    async fn inflate(stream: &[u8], chunk_size: usize) -> io::Result<(Transfer, Vec<u8>)> {
+        let pool = BlockingPool::new(4)?;
+        let path = std::env::temp_dir().join(format!("pmcollection-inflate-{}-{}.xml", std::process::id(), chunk_size));
+        let mut inflater = PooledInflater::new(&pool, OutputFormat::Xml, &path, true);
+        let result = async {
+            for chunk in stream.chunks(chunk_size) {
+                inflater.write(chunk).await?;
+            }
+            inflater.finish().await
+        }
+        .await;
+        let output = std::fs::read(&path);
+        let _ = std::fs::remove_file(&path);
+        Ok((result?, output?))
+    }
+
+    #[tokio::test]
+    async fn inflates_every_member_of_a_stream() {
+        let data = sample(3 * MEMBER_BATCH_SIZE);
+        let parts: Vec<&[u8]> = data.chunks(64 * 1024 - 1000).collect();
+        let bgzf: Vec<u8> = parts.iter().flat_map(|part| bgzf_member(part)).collect();
+        // As written by `cat a.gz b.gz`, members without a block size
+        let multi_member: Vec<u8> = data.chunks(MEMBER_BATCH_SIZE / 3).flat_map(gzip_member).collect();
+
+        for stream in [&bgzf, &multi_member] {
+            for chunk_size in [1000, 65536, stream.len()] {
+                let (transfer, output) = inflate(stream, chunk_size).await.unwrap();
+                assert_eq!(output, data);
+                assert_eq!(transfer.size, stream.len() as u64);
+                assert_eq!(transfer.decompressed_size, data.len() as u64);
+                assert!(transfer.md5.is_some());
+            }
+        }
+    }
+
+    #[tokio::test]
+    async fn rejects_truncated_streams() {
+        let data = sample(200_000);
+        let bgzf: Vec<u8> = data.chunks(50_000).flat_map(bgzf_member).collect();
+        let gzip = gzip_member(&data);
+
+        for stream in [&bgzf[..bgzf.len() - 10], &gzip[..gzip.len() - 10]] {
+            let err = inflate(stream, 4096).await.err().expect("a truncated stream is an error");
+            // So that the `.part` file is started over rather than resumed
+            assert!(is_corrupt_data(&err), "{:?}", err);
+        }
+    }
+}
@@ -1,96 +1,878 @@
+mod blocking;
+mod client;
+mod concurrency;
+mod download;
+mod inflate;
+mod manifest;
+mod output;
+mod pipeline;
+mod read;
+mod records;
+mod retry;
+mod source;
+mod space;
+mod sync;
+mod throttle;
+
+use futures::future::join_all;
+use futures::stream::{FuturesUnordered, StreamExt};
+use pyo3::exceptions::{PyIOError, PyRuntimeError, PyStopAsyncIteration, PyTypeError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::types::{PyDate, PyDict, PyList};
 use pyo3::wrap_pyfunction;
-use pyo3_asyncio::tokio::future_into_py;
-use tokio::sync::Semaphore;
+use pyo3_asyncio::tokio::{future_into_py, get_runtime};
 use reqwest::Client;
-use std::fs;
-use std::io::Read;
+use std::io::{self, BufReader, Read};
 use std::path::Path;
-use std::sync::Arc;
-use tokio::io::AsyncWriteExt;
-use flate2::read::GzDecoder;
+use std::sync::{Arc, OnceLock};
+use std::time::Duration;
+use tokio::runtime::{self, Handle, Runtime};
+use tokio::sync::{mpsc, Mutex};
+use tokio::task::{AbortHandle, JoinHandle};
 
+use blocking::BlockingPool;
+use client::ClientConfig;
+use concurrency::ConcurrencyLimiter;
+use download::{prepare_cache, spawn_downloads, BoxError, DownloadTask, FetchOptions, FetchReport};
+use manifest::Manifest;
+use output::OutputFormat;
+use pipeline::spawn_article_stream;
+use records::{RecordReader, Value};
+use retry::{RetryPolicy, DEFAULT_RETRY_STATUSES};
+use space::DiskSpace;
+use throttle::Throttle;
 
-#[pyfunction]
-fn download_files(py: Python, urls: Vec<String>, cache_folder: String, concurrency_limit: usize) -> PyResult<&PyAny> {
-    future_into_py(py, async move {
-        let client = Arc::new(Client::new());
-        let semaphore = Arc::new(Semaphore::new(concurrency_limit));
-        let cache_folder = Path::new(&cache_folder);
-        fs::create_dir_all(cache_folder).unwrap();
 
-        let mut handles = vec![];
+/// Outcome of the download of one URL.
+#[pyclass(get_all, frozen)]
+#[derive(Clone)]
+struct DownloadResult {
+    url: String,
+    path: Option<String>,
+    /// One of `downloaded`, `skipped` or `failed`.
+    status: String,
+    bytes_transferred: u64,
+    decompressed_size: u64,
+    /// Wall time spent on the file, in seconds.
+    elapsed: f64,
+    retries: u32,
+    error: Option<String>,
+    /// Number of transfers allowed at a time when the file was done, the level an adaptive limit settled on.
+    concurrency: usize,
+}
 
-        for url in urls {
-            let client = Arc::clone(&client);
-            let semaphore = Arc::clone(&semaphore);
-            let cache_folder = cache_folder.to_path_buf();
+#[pymethods]
+impl DownloadResult {
+    #[getter]
+    fn ok(&self) -> bool {
+        self.error.is_none()
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "DownloadResult(url={:?}, status={:?}, bytes_transferred={}, elapsed={:.3}, retries={}, error={:?})",
+            self.url, self.status, self.bytes_transferred, self.elapsed, self.retries, self.error,
+        )
+    }
+}
+
+impl From<FetchReport> for DownloadResult {
+    fn from(report: FetchReport) -> Self {
+        Self {
+            url: report.url,
+            path: report.path.map(|path| path.to_string_lossy().into_owned()),
+            status: report.status.as_str().to_string(),
+            bytes_transferred: report.bytes_transferred,
+            decompressed_size: report.decompressed_size,
+            elapsed: report.elapsed.as_secs_f64(),
+            retries: report.retries,
+            error: report.error,
+            concurrency: report.concurrency,
+        }
+    }
+}
+
+
+/// When and how long to wait before trying to download a file again.
+///
+/// The delay before the n-th retry is `base_delay * 2^(n - 1)` seconds, capped at `max_delay`. With `jitter`, the
+/// delay is drawn uniformly between zero and that value.
+#[pyclass(name = "RetryPolicy", frozen)]
+#[derive(Clone)]
+struct PyRetryPolicy {
+    inner: RetryPolicy,
+}
+
+#[pymethods]
+impl PyRetryPolicy {
+    #[new]
+    #[pyo3(signature = (max_attempts=5, base_delay=1.0, max_delay=60.0, jitter=true, retry_statuses=None))]
+    fn new(
+        max_attempts: u32,
+        base_delay: f64,
+        max_delay: f64,
+        jitter: bool,
+        retry_statuses: Option<Vec<u16>>,
+    ) -> PyResult<Self> {
+        if max_attempts == 0 {
+            return Err(PyValueError::new_err("max_attempts must be at least 1"));
+        }
+        if !(base_delay >= 0.0 && max_delay >= 0.0 && base_delay.is_finite() && max_delay.is_finite()) {
+            return Err(PyValueError::new_err("base_delay and max_delay must be finite and non-negative"));
+        }
+
+        Ok(Self {
+            inner: RetryPolicy {
+                max_attempts,
+                base_delay: Duration::from_secs_f64(base_delay),
+                max_delay: Duration::from_secs_f64(max_delay),
+                jitter,
+                retry_statuses: retry_statuses.unwrap_or_else(|| DEFAULT_RETRY_STATUSES.to_vec()),
+            },
+        })
+    }
+
+    #[getter]
+    fn max_attempts(&self) -> u32 {
+        self.inner.max_attempts
+    }
+
+    #[getter]
+    fn base_delay(&self) -> f64 {
+        self.inner.base_delay.as_secs_f64()
+    }
+
+    #[getter]
+    fn max_delay(&self) -> f64 {
+        self.inner.max_delay.as_secs_f64()
+    }
+
+    #[getter]
+    fn jitter(&self) -> bool {
+        self.inner.jitter
+    }
+
+    #[getter]
+    fn retry_statuses(&self) -> Vec<u16> {
+        self.inner.retry_statuses.clone()
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "RetryPolicy(max_attempts={}, base_delay={}, max_delay={}, jitter={}, retry_statuses={:?})",
+            self.max_attempts(), self.base_delay(), self.max_delay(), self.inner.jitter, self.inner.retry_statuses,
+        )
+    }
+}
+
+
+/// Downloads of a `DownloadStream`.
+enum Downloads {
+    /// The task opening the cache folder and checking the disk space, resolving to the started downloads.
+    Starting(JoinHandle<io::Result<Vec<DownloadTask>>>),
+    Running(FuturesUnordered<DownloadTask>),
+}
+
+impl Drop for Downloads {
+    fn drop(&mut self) {
+        if let Downloads::Starting(handle) = self {
+            handle.abort();
+        }
+    }
+}
+
+
+/// Async iterator over the results of downloads, in the order they complete.
+///
+/// The cache folder is opened and the disk space checked by a task of the runtime, the first `__anext__` awaiting it,
+/// so creating the iterator never blocks the event loop.
+#[pyclass]
+struct DownloadStream {
+    downloads: Arc<Mutex<Downloads>>,
+}
+
+#[pymethods]
+impl DownloadStream {
+    fn __aiter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __anext__(&self, py: Python) -> PyResult<Option<PyObject>> {
+        let downloads = Arc::clone(&self.downloads);
+        let next = future_into_py(py, async move {
+            let mut downloads = downloads.lock().await;
+            if let Downloads::Starting(handle) = &mut *downloads {
+                let started = handle.await;
+                // The iteration stops after an error, as there is nothing left to download
+                *downloads = Downloads::Running(FuturesUnordered::new());
+                let tasks = started
+                    .map_err(|err| PyRuntimeError::new_err(err.to_string()))?
+                    .map_err(|err| PyIOError::new_err(err.to_string()))?;
+                *downloads = Downloads::Running(tasks.into_iter().collect());
+            }
+            let Downloads::Running(pending) = &mut *downloads else {
+                unreachable!("the downloads are started above");
+            };
+
+            match pending.next().await {
+                Some(report) => Ok(DownloadResult::from(report)),
+                None => Err(PyStopAsyncIteration::new_err(())),
+            }
+        })?;
+
+        Ok(Some(next.into()))
+    }
+}
 
-            let handle = tokio::spawn(async move {
-                let _permit = semaphore.acquire().await.unwrap();
-                match fetch_and_save(&client, &url, &cache_folder).await {
-                    Ok(_) => 1,
-                    Err(_) => 0,
-                }
-            });
 
-            handles.push(handle);
+/// Async iterator over the `<PubmedArticle>` elements of a remote `.xml.gz` file, in batches of XML strings.
+#[pyclass]
+struct ArticleStream {
+    receiver: Arc<Mutex<mpsc::Receiver<Result<Vec<String>, BoxError>>>>,
+}
+
+#[pymethods]
+impl ArticleStream {
+    fn __aiter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __anext__(&self, py: Python) -> PyResult<Option<PyObject>> {
+        let receiver = Arc::clone(&self.receiver);
+        let next = future_into_py(py, async move {
+            match receiver.lock().await.recv().await {
+                Some(Ok(articles)) => Ok(articles),
+                Some(Err(err)) => Err(PyIOError::new_err(err.to_string())),
+                None => Err(PyStopAsyncIteration::new_err(())),
+            }
+        })?;
+
+        Ok(Some(next.into()))
+    }
+}
+
+
+/// Iterator over the `<PubmedArticle>` records of an XML file, parsed one at a time into dicts holding the fields of
+/// `PubmedItem`.
+#[pyclass]
+struct RecordIterator {
+    reader: RecordReader<BufReader<Box<dyn Read + Send>>>,
+}
+
+#[pymethods]
+impl RecordIterator {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(mut slf: PyRefMut<'_, Self>, py: Python) -> PyResult<Option<PyObject>> {
+        let reader = &mut slf.reader;
+        match py.allow_threads(|| reader.next_record())? {
+            Some(record) => Ok(Some(value_to_py(py, &record)?)),
+            None => Ok(None),
+        }
+    }
+}
+
+
+/// Options of the transfers shared by the download functions and the methods of `Downloader`, given to them as keyword
+/// arguments.
+struct DownloadOptions {
+    verify_md5: bool,
+    retry: Option<PyRetryPolicy>,
+    adaptive_concurrency: bool,
+    max_bandwidth: Option<f64>,
+    max_requests_per_host: Option<f64>,
+    output_format: String,
+    check_disk_space: bool,
+    max_cache_size: Option<u64>,
+}
+
+impl Default for DownloadOptions {
+    fn default() -> Self {
+        Self {
+            verify_md5: false,
+            retry: None,
+            adaptive_concurrency: false,
+            max_bandwidth: None,
+            max_requests_per_host: None,
+            output_format: "xml".to_string(),
+            check_disk_space: true,
+            max_cache_size: None,
+        }
+    }
+}
+
+impl<'source> FromPyObject<'source> for DownloadOptions {
+    /// Read the options from a dict of keyword arguments, the missing ones keeping their default value.
+    fn extract(kwargs: &'source PyAny) -> PyResult<Self> {
+        let mut options = Self::default();
+        for (key, value) in kwargs.downcast::<PyDict>()? {
+            let name: &str = key.extract()?;
+            let invalid = |err: PyErr| PyTypeError::new_err(format!("argument '{}': {}", name, err));
+            match name {
+                "verify_md5" => options.verify_md5 = value.extract().map_err(invalid)?,
+                "retry" => options.retry = value.extract().map_err(invalid)?,
+                "adaptive_concurrency" => options.adaptive_concurrency = value.extract().map_err(invalid)?,
+                "max_bandwidth" => options.max_bandwidth = value.extract().map_err(invalid)?,
+                "max_requests_per_host" => options.max_requests_per_host = value.extract().map_err(invalid)?,
+                "output_format" => options.output_format = value.extract().map_err(invalid)?,
+                "check_disk_space" => options.check_disk_space = value.extract().map_err(invalid)?,
+                "max_cache_size" => options.max_cache_size = value.extract().map_err(invalid)?,
+                _ => return Err(PyTypeError::new_err(format!("unexpected keyword argument '{}'", name))),
+            }
         }
+        Ok(options)
+    }
+}
 
-        let mut success_count = 0;
-        let mut failure_count = 0;
-
-        for handle in handles {
-            match handle.await {
-                Ok(result) => {
-                    if result == 1 {
-                        success_count += 1;
-                    } else {
-                        failure_count += 1;
-                    }
-                },
-                Err(_) => failure_count += 1,
+impl DownloadOptions {
+    fn from_kwargs(kwargs: Option<&PyDict>) -> PyResult<Self> {
+        match kwargs {
+            Some(kwargs) => kwargs.extract(),
+            None => Ok(Self::default()),
+        }
+    }
+
+    /// Limiter of `concurrency_limit` transfers, or of up to that many with `adaptive_concurrency`, and the options of
+    /// the transfers.
+    fn build(self, concurrency_limit: usize, resume: bool) -> PyResult<(Arc<ConcurrencyLimiter>, FetchOptions)> {
+        let Some(format) = OutputFormat::parse(&self.output_format) else {
+            return Err(PyValueError::new_err("output_format must be one of 'xml', 'gzip' or 'zstd'"));
+        };
+        let rates = [("max_bandwidth", self.max_bandwidth), ("max_requests_per_host", self.max_requests_per_host)];
+        for (name, value) in rates {
+            if value.is_some_and(|value| !(value.is_finite() && value > 0.0)) {
+                return Err(PyValueError::new_err(format!("{} must be a positive number", name)));
             }
         }
 
-        println!("Downloaded {} | Failed {}", success_count, failure_count);
+        let limiter = Arc::new(match self.adaptive_concurrency {
+            true => ConcurrencyLimiter::adaptive(concurrency_limit),
+            false => ConcurrencyLimiter::fixed(concurrency_limit),
+        });
+        let options = FetchOptions {
+            resume,
+            verify: self.verify_md5,
+            retry: self.retry.map(|policy| policy.inner).unwrap_or_default(),
+            format,
+            throttle: Arc::new(Throttle::new(self.max_bandwidth, self.max_requests_per_host)),
+            space: Arc::new(DiskSpace::new(self.check_disk_space, self.max_cache_size)),
+        };
+        Ok((limiter, options))
+    }
+}
+
 
-        Ok(())
-    })
+/// Aborts the task of an async call when the Python awaitable is dropped or cancelled before it completes.
+struct AbortOnDrop(AbortHandle);
+
+impl Drop for AbortOnDrop {
+    fn drop(&mut self) {
+        self.0.abort();
+    }
 }
 
-async fn fetch_and_save(client: &Client, url: &str, cache_folder: &Path) -> Result<(), Box<dyn std::error::Error>> {
-    let response = client.get(url).send().await?.bytes().await?;
-    let file_name = url.split('/').last().unwrap();
-    let file_path = cache_folder.join(file_name);
 
-    let mut file = tokio::fs::File::create(&file_path).await?;
-    file.write_all(&response).await?;
-    file.flush().await?;
+/// Runtime, HTTP client and blocking pool the transfers of a call run on.
+#[derive(Clone)]
+struct Backend {
+    runtime: Handle,
+    client: Client,
+    pool: Arc<BlockingPool>,
+}
 
-    // Decompress the file
-    let decompressed_file_name = file_name.trim_end_matches(".gz");
-    let decompressed_file_path = cache_folder.join(decompressed_file_name);
+/// How often a blocking call takes the GIL back to check for `KeyboardInterrupt`.
+const SIGNAL_CHECK_INTERVAL: Duration = Duration::from_millis(100);
 
-    let mut gz_decoder = GzDecoder::new(&response[..]);
-    let mut decompressed_data = Vec::new();
-    gz_decoder.read_to_end(&mut decompressed_data)?;
+/// Client shared by the module-level functions, so that consecutive calls reuse its connections.
+static SHARED_CLIENT: OnceLock<Client> = OnceLock::new();
 
-    let mut decompressed_file = tokio::fs::File::create(decompressed_file_path).await?;
-    decompressed_file.write_all(&decompressed_data).await?;
-    decompressed_file.flush().await?;
+/// Blocking pool shared by the module-level functions, one thread per core.
+static SHARED_POOL: OnceLock<Arc<BlockingPool>> = OnceLock::new();
 
-    // Delete the compressed file
-    fs::remove_file(file_path)?;
+impl Backend {
+    /// The runtime of `pyo3_asyncio` with the shared client and blocking pool.
+    fn shared() -> PyResult<Self> {
+        let client = match SHARED_CLIENT.get() {
+            Some(client) => client.clone(),
+            None => {
+                let client = ClientConfig::default().build().map_err(|err| PyIOError::new_err(err.to_string()))?;
+                SHARED_CLIENT.get_or_init(|| client).clone()
+            },
+        };
 
-    Ok(())
+        let pool = match SHARED_POOL.get() {
+            Some(pool) => Arc::clone(pool),
+            None => {
+                let pool = Arc::new(BlockingPool::with_available_parallelism()?);
+                Arc::clone(SHARED_POOL.get_or_init(|| pool))
+            },
+        };
+
+        Ok(Self { runtime: get_runtime().handle().clone(), client, pool })
+    }
+
+    fn download_files<'py>(
+        self,
+        py: Python<'py>,
+        urls: Vec<String>,
+        cache_folder: String,
+        limiter: Arc<ConcurrencyLimiter>,
+        options: FetchOptions,
+    ) -> PyResult<&'py PyAny> {
+        let runtime = self.runtime.clone();
+        let handle = runtime.spawn(async move {
+            let tasks = self.start_downloads(urls, cache_folder, limiter, options).await?;
+            Ok::<_, io::Error>(join_all(tasks).await)
+        });
+
+        future_into_py(py, async move {
+            let _abort = AbortOnDrop(handle.abort_handle());
+            let reports = handle.await.map_err(|err| PyRuntimeError::new_err(err.to_string()))??;
+
+            Ok(reports.into_iter().map(DownloadResult::from).collect::<Vec<_>>())
+        })
+    }
+
+    /// Run the downloads to completion without holding the GIL, waking up regularly to let Python handle signals.
+    fn download_files_blocking(
+        self,
+        py: Python,
+        urls: Vec<String>,
+        cache_folder: String,
+        limiter: Arc<ConcurrencyLimiter>,
+        options: FetchOptions,
+    ) -> PyResult<Vec<DownloadResult>> {
+        let runtime = self.runtime.clone();
+        // Dropping the join aborts the downloads it owns, so an interrupt stops them all, even while they are starting
+        let mut downloads = runtime.spawn(async move {
+            let tasks = self.start_downloads(urls, cache_folder, limiter, options).await?;
+            Ok::<_, io::Error>(join_all(tasks).await)
+        });
+
+        loop {
+            let reports = py.allow_threads(|| {
+                runtime.block_on(async { tokio::time::timeout(SIGNAL_CHECK_INTERVAL, &mut downloads).await })
+            });
+            match reports {
+                Ok(Ok(Ok(reports))) => return Ok(reports.into_iter().map(DownloadResult::from).collect()),
+                Ok(Ok(Err(err))) => return Err(PyIOError::new_err(err.to_string())),
+                Ok(Err(err)) => return Err(PyRuntimeError::new_err(err.to_string())),
+                Err(_) => {},
+            }
+            if let Err(err) = py.check_signals() {
+                downloads.abort();
+                return Err(err);
+            }
+        }
+    }
+
+    fn iter_download_files(
+        self,
+        urls: Vec<String>,
+        cache_folder: String,
+        limiter: Arc<ConcurrencyLimiter>,
+        options: FetchOptions,
+    ) -> DownloadStream {
+        let runtime = self.runtime.clone();
+        let starting = runtime.spawn(self.start_downloads(urls, cache_folder, limiter, options));
+
+        DownloadStream { downloads: Arc::new(Mutex::new(Downloads::Starting(starting))) }
+    }
+
+    fn sync_directory<'py>(
+        self,
+        py: Python<'py>,
+        url: String,
+        cache_folder: String,
+        suffix: String,
+        limiter: Arc<ConcurrencyLimiter>,
+        options: FetchOptions,
+    ) -> PyResult<&'py PyAny> {
+        let runtime = self.runtime.clone();
+        let handle = runtime.spawn(async move {
+            let cache_folder = Path::new(&cache_folder);
+            let (runtime, client, pool) = (&self.runtime, &self.client, &self.pool);
+            sync::sync_directory(runtime, client, pool, &url, cache_folder, &suffix, limiter, options).await
+        });
+
+        future_into_py(py, async move {
+            let _abort = AbortOnDrop(handle.abort_handle());
+            let reports = handle
+                .await
+                .map_err(|err| PyRuntimeError::new_err(err.to_string()))?
+                .map_err(|err| PyIOError::new_err(err.to_string()))?;
+
+            Ok(reports.into_iter().map(DownloadResult::from).collect::<Vec<_>>())
+        })
+    }
+
+    /// Open `cache_folder`, refusing to start if the files do not fit, then start one download per URL.
+    async fn start_downloads(
+        self,
+        urls: Vec<String>,
+        cache_folder: String,
+        limiter: Arc<ConcurrencyLimiter>,
+        options: FetchOptions,
+    ) -> io::Result<Vec<DownloadTask>> {
+        let cache_folder = Path::new(&cache_folder);
+        let manifest = prepare_cache(&self.client, &urls, cache_folder, &options).await?;
+
+        Ok(self.spawn_downloads(urls, cache_folder, manifest, limiter, options))
+    }
+
+    fn spawn_downloads(
+        &self,
+        urls: Vec<String>,
+        cache_folder: &Path,
+        manifest: Arc<Manifest>,
+        limiter: Arc<ConcurrencyLimiter>,
+        options: FetchOptions,
+    ) -> Vec<DownloadTask> {
+        spawn_downloads(&self.runtime, &self.client, &self.pool, urls, cache_folder, manifest, limiter, options)
+    }
+
+    fn stream_articles(self, url: String, retry: RetryPolicy) -> ArticleStream {
+        let receiver = spawn_article_stream(&self.runtime, self.client, url, retry);
+
+        ArticleStream { receiver: Arc::new(Mutex::new(receiver)) }
+    }
+}
+
+
+/// Downloads files with a long-lived HTTP client on a dedicated tokio runtime.
+///
+/// Consecutive calls on the same downloader reuse the connections and TLS sessions of its pool, instead of paying the
+/// handshakes again like the module-level functions do on their first call. Inflating and recompressing the files run
+/// on `blocking_threads` threads of its own, one per core by default. The methods take the same arguments as the
+/// functions of the same name.
+#[pyclass]
+struct Downloader {
+    runtime: Option<Runtime>,
+    client: Client,
+    pool: Arc<BlockingPool>,
+}
+
+#[pymethods]
+impl Downloader {
+    #[new]
+    #[pyo3(signature = (
+        worker_threads=None,
+        blocking_threads=None,
+        pool_max_idle_per_host=32,
+        pool_idle_timeout=Some(90.0),
+        tcp_keepalive=Some(60.0),
+        connect_timeout=Some(30.0),
+        read_timeout=Some(120.0),
+        http2=true
+    ))]
+    fn new(
+        worker_threads: Option<usize>,
+        blocking_threads: Option<usize>,
+        pool_max_idle_per_host: usize,
+        pool_idle_timeout: Option<f64>,
+        tcp_keepalive: Option<f64>,
+        connect_timeout: Option<f64>,
+        read_timeout: Option<f64>,
+        http2: bool,
+    ) -> PyResult<Self> {
+        let config = ClientConfig {
+            pool_max_idle_per_host,
+            pool_idle_timeout: seconds(pool_idle_timeout, "pool_idle_timeout")?,
+            tcp_keepalive: seconds(tcp_keepalive, "tcp_keepalive")?,
+            connect_timeout: seconds(connect_timeout, "connect_timeout")?,
+            read_timeout: seconds(read_timeout, "read_timeout")?,
+            http2,
+        };
+
+        let mut builder = runtime::Builder::new_multi_thread();
+        builder.enable_all().thread_name("pmcollection-downloader");
+        if let Some(worker_threads) = worker_threads {
+            if worker_threads == 0 {
+                return Err(PyValueError::new_err("worker_threads must be at least 1"));
+            }
+            builder.worker_threads(worker_threads);
+        }
+        let runtime = builder.build()?;
+
+        let client = config.build().map_err(|err| PyIOError::new_err(err.to_string()))?;
+        let pool = match blocking_threads {
+            Some(0) => return Err(PyValueError::new_err("blocking_threads must be at least 1")),
+            Some(threads) => BlockingPool::new(threads)?,
+            None => BlockingPool::with_available_parallelism()?,
+        };
+
+        Ok(Self { runtime: Some(runtime), client, pool: Arc::new(pool) })
+    }
+
+    #[pyo3(signature = (urls, cache_folder, concurrency_limit, resume=true, **options))]
+    fn download_files<'py>(
+        &self,
+        py: Python<'py>,
+        urls: Vec<String>,
+        cache_folder: String,
+        concurrency_limit: usize,
+        resume: bool,
+        options: Option<&PyDict>,
+    ) -> PyResult<&'py PyAny> {
+        let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, resume)?;
+        self.backend()?.download_files(py, urls, cache_folder, limiter, options)
+    }
+
+    #[pyo3(signature = (urls, cache_folder, concurrency_limit, resume=true, **options))]
+    fn download_files_sync(
+        &self,
+        py: Python,
+        urls: Vec<String>,
+        cache_folder: String,
+        concurrency_limit: usize,
+        resume: bool,
+        options: Option<&PyDict>,
+    ) -> PyResult<Vec<DownloadResult>> {
+        let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, resume)?;
+        self.backend()?.download_files_blocking(py, urls, cache_folder, limiter, options)
+    }
+
+    #[pyo3(signature = (urls, cache_folder, concurrency_limit, resume=true, **options))]
+    fn iter_download_files(
+        &self,
+        urls: Vec<String>,
+        cache_folder: String,
+        concurrency_limit: usize,
+        resume: bool,
+        options: Option<&PyDict>,
+    ) -> PyResult<DownloadStream> {
+        let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, resume)?;
+        Ok(self.backend()?.iter_download_files(urls, cache_folder, limiter, options))
+    }
+
+    #[pyo3(signature = (url, cache_folder, concurrency_limit, suffix=".xml.gz".to_string(), **options))]
+    fn sync_directory<'py>(
+        &self,
+        py: Python<'py>,
+        url: String,
+        cache_folder: String,
+        concurrency_limit: usize,
+        suffix: String,
+        options: Option<&PyDict>,
+    ) -> PyResult<&'py PyAny> {
+        let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, true)?;
+        self.backend()?.sync_directory(py, url, cache_folder, suffix, limiter, options)
+    }
+
+    #[pyo3(signature = (url, retry=None))]
+    fn stream_articles(&self, url: String, retry: Option<PyRetryPolicy>) -> PyResult<ArticleStream> {
+        let retry = retry.map(|policy| policy.inner).unwrap_or_default();
+        Ok(self.backend()?.stream_articles(url, retry))
+    }
+
+    /// Stop the runtime of the downloader, the transfers still running are dropped.
+    fn close(&mut self) {
+        if let Some(runtime) = self.runtime.take() {
+            runtime.shutdown_background();
+        }
+    }
+}
+
+impl Downloader {
+    fn backend(&self) -> PyResult<Backend> {
+        match &self.runtime {
+            Some(runtime) => Ok(Backend {
+                runtime: runtime.handle().clone(),
+                client: self.client.clone(),
+                pool: Arc::clone(&self.pool),
+            }),
+            None => Err(PyRuntimeError::new_err("the downloader is closed")),
+        }
+    }
+}
+
+impl Drop for Downloader {
+    fn drop(&mut self) {
+        self.close();
+    }
+}
+
+
+/// Duration of an optional number of seconds given from Python.
+fn seconds(value: Option<f64>, name: &str) -> PyResult<Option<Duration>> {
+    value
+        .map(|value| {
+            Duration::try_from_secs_f64(value)
+                .map_err(|_| PyValueError::new_err(format!("{} must be a finite, non-negative number of seconds", name)))
+        })
+        .transpose()
+}
+
+
+#[pyfunction]
+#[pyo3(signature = (urls, cache_folder, concurrency_limit, resume=true, **options))]
+fn download_files<'py>(
+    py: Python<'py>,
+    urls: Vec<String>,
+    cache_folder: String,
+    concurrency_limit: usize,
+    resume: bool,
+    options: Option<&PyDict>,
+) -> PyResult<&'py PyAny> {
+    let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, resume)?;
+    Backend::shared()?.download_files(py, urls, cache_folder, limiter, options)
+}
+
+
+/// Same as `download_files`, but blocks until all the files are done instead of returning an awaitable.
+///
+/// The GIL is released for the whole transfer, so other Python threads keep running, e.g. to parse the files of a
+/// previous call, and it can be used outside of an asyncio event loop.
+#[pyfunction]
+#[pyo3(signature = (urls, cache_folder, concurrency_limit, resume=true, **options))]
+fn download_files_sync(
+    py: Python,
+    urls: Vec<String>,
+    cache_folder: String,
+    concurrency_limit: usize,
+    resume: bool,
+    options: Option<&PyDict>,
+) -> PyResult<Vec<DownloadResult>> {
+    let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, resume)?;
+    Backend::shared()?.download_files_blocking(py, urls, cache_folder, limiter, options)
+}
+
+
+/// Same as `download_files`, but yields each result as soon as its file is done instead of waiting for all of them.
+#[pyfunction]
+#[pyo3(signature = (urls, cache_folder, concurrency_limit, resume=true, **options))]
+fn iter_download_files(
+    urls: Vec<String>,
+    cache_folder: String,
+    concurrency_limit: usize,
+    resume: bool,
+    options: Option<&PyDict>,
+) -> PyResult<DownloadStream> {
+    let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, resume)?;
+    Ok(Backend::shared()?.iter_download_files(urls, cache_folder, limiter, options))
+}
+
+
+/// Download the files of a remote directory, or of a local mirror, that are not in the manifest of `cache_folder` yet,
+/// or that changed.
+///
+/// Meant to follow `pubmed/updatefiles/` from a cron job: files already downloaded are only compared to the listing,
+/// and an interrupted run is resumed by the next one. A run that starts while another one is still working on the same
+/// cache folder waits for it to finish.
+#[pyfunction]
+#[pyo3(signature = (url, cache_folder, concurrency_limit, suffix=".xml.gz".to_string(), **options))]
+fn sync_directory<'py>(
+    py: Python<'py>,
+    url: String,
+    cache_folder: String,
+    concurrency_limit: usize,
+    suffix: String,
+    options: Option<&PyDict>,
+) -> PyResult<&'py PyAny> {
+    let (limiter, options) = DownloadOptions::from_kwargs(options)?.build(concurrency_limit, true)?;
+    Backend::shared()?.sync_directory(py, url, cache_folder, suffix, limiter, options)
+}
+
+
+/// Download a `.xml.gz` file and yield its `<PubmedArticle>` elements as XML strings while it is being inflated,
+/// without writing anything to disk.
+#[pyfunction]
+#[pyo3(signature = (url, retry=None))]
+fn stream_articles(url: String, retry: Option<PyRetryPolicy>) -> PyResult<ArticleStream> {
+    let retry = retry.map(|policy| policy.inner).unwrap_or_default();
+    Ok(Backend::shared()?.stream_articles(url, retry))
+}
+
+
+/// Read an XML file stored by the downloader in any output format, decompressing `.gz` and `.zst` files.
+///
+/// The GIL is released while the file is read and decompressed.
+#[pyfunction]
+fn read_xml(py: Python, path: String) -> PyResult<String> {
+    Ok(py.allow_threads(|| read::read_xml(Path::new(&path)))?)
+}
+
+
+/// Parse the `<PubmedArticle>` records of an XML file stored by the downloader in any output format into dicts
+/// holding the fields of `PubmedItem`, ready for `PubmedItem.model_validate`.
+///
+/// The file is read with a streaming pull parser, with the GIL released. It is only held to build the dicts.
+#[pyfunction]
+fn parse_file(py: Python, path: String) -> PyResult<PyObject> {
+    let records = py.allow_threads(|| records::parse_file(Path::new(&path)))?;
+    records_to_py(py, &records)
+}
+
+
+/// Iterate over the `<PubmedArticle>` records of an XML file stored by the downloader in any output format, parsing
+/// them one at a time into dicts holding the fields of `PubmedItem`.
+///
+/// Only the record being read is held in memory, whatever the size of the file. The GIL is released while parsing.
+#[pyfunction]
+fn iter_records(py: Python, path: String) -> PyResult<RecordIterator> {
+    let reader = py.allow_threads(|| RecordReader::open(Path::new(&path)))?;
+    Ok(RecordIterator { reader })
+}
+
+
+/// Parse the `<PubmedArticle>` records of an XML document into dicts holding the fields of `PubmedItem`.
+///
+/// The GIL is released while the document is parsed, it is only held to build the dicts.
+#[pyfunction]
+fn parse_bytes(py: Python, buf: &[u8]) -> PyResult<PyObject> {
+    let records = py.allow_threads(|| records::parse_reader(buf))?;
+    records_to_py(py, &records)
+}
+
+
+fn records_to_py(py: Python, records: &[Value]) -> PyResult<PyObject> {
+    let list = PyList::empty(py);
+    for record in records {
+        list.append(value_to_py(py, record)?)?;
+    }
+    Ok(list.to_object(py))
+}
+
+
+fn value_to_py(py: Python, value: &Value) -> PyResult<PyObject> {
+    Ok(match value {
+        Value::None => py.None(),
+        Value::Bool(value) => value.to_object(py),
+        Value::Int(value) => value.to_object(py),
+        Value::Str(value) => value.to_object(py),
+        Value::Date { year, month, day } => PyDate::new(py, *year, *month, *day)?.to_object(py),
+        Value::List(items) => records_to_py(py, items)?,
+        Value::Map(fields) => {
+            let dict = PyDict::new(py);
+            for (key, field) in fields {
+                dict.set_item(key, value_to_py(py, field)?)?;
+            }
+            dict.to_object(py)
+        },
+    })
 }
 
 
 #[pymodule]
 #[pyo3(name="_lowlevel")]
 fn pmcollection(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
+    m.add_class::<ArticleStream>()?;
+    m.add_class::<DownloadResult>()?;
+    m.add_class::<DownloadStream>()?;
+    m.add_class::<Downloader>()?;
+    m.add_class::<PyRetryPolicy>()?;
+    m.add_class::<RecordIterator>()?;
     m.add_function(wrap_pyfunction!(download_files, m)?)?;
+    m.add_function(wrap_pyfunction!(download_files_sync, m)?)?;
+    m.add_function(wrap_pyfunction!(iter_download_files, m)?)?;
+    m.add_function(wrap_pyfunction!(iter_records, m)?)?;
+    m.add_function(wrap_pyfunction!(parse_bytes, m)?)?;
+    m.add_function(wrap_pyfunction!(parse_file, m)?)?;
+    m.add_function(wrap_pyfunction!(read_xml, m)?)?;
+    m.add_function(wrap_pyfunction!(stream_articles, m)?)?;
+    m.add_function(wrap_pyfunction!(sync_directory, m)?)?;
 
     Ok(())
 }
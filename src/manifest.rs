@@ -0,0 +1,207 @@
+use serde::{Deserialize, Serialize};
+use std::collections::BTreeMap;
+use std::io;
+use std::path::{Path, PathBuf};
+use tokio::fs::File;
+use tokio::io::AsyncWriteExt;
+use tokio::sync::Mutex;
+
+use crate::download::sync_dir;
+
+
+/// Name of the manifest file in the cache folder.
+pub const MANIFEST_FILE_NAME: &str = "manifest.json";
+
+/// Name of the file locked by the call working on the cache folder.
+const LOCK_FILE_NAME: &str = "manifest.lock";
+
+
+/// State of a file recorded in the manifest.
+#[derive(Serialize, Deserialize, Clone, Copy, Debug, PartialEq, Eq)]
+#[serde(rename_all = "lowercase")]
+pub enum FileStatus {
+    /// Downloaded without checking its integrity.
+    Downloaded,
+    /// Downloaded and matching its `.md5` sidecar.
+    Verified,
+}
+
+
+/// A file that has been downloaded into the cache folder.
+#[derive(Serialize, Deserialize, Clone, Debug)]
+pub struct ManifestEntry {
+    /// Size of the compressed file, in bytes.
+    pub size: u64,
+    /// Size of the decompressed file, in bytes.
+    pub decompressed_size: u64,
+    /// Size of the file stored in the cache folder, in bytes, `None` when it is the decompressed file.
+    #[serde(default)]
+    pub stored_size: Option<u64>,
+    /// Hex digest of the compressed file.
+    #[serde(default)]
+    pub md5: Option<String>,
+    /// Modification time of the remote file, as shown in its directory listing.
+    #[serde(default)]
+    pub mtime: Option<String>,
+    pub status: FileStatus,
+}
+
+
+#[derive(Serialize, Deserialize, Default)]
+struct ManifestContent {
+    files: BTreeMap<String, ManifestEntry>,
+}
+
+
+/// Record of the files downloaded into a cache folder, keyed by the name of the remote file.
+///
+/// The whole manifest is rewritten to a temporary file, synced and renamed over the previous one on every update, so a
+/// crash never leaves it half written.
+///
+/// The cache folder is locked from the time the manifest is loaded until it is dropped, once every task of the call is
+/// done with it. Overlapping calls on the same folder, e.g. two cron runs, take turns instead of each rewriting the
+/// manifest from its own copy and dropping the entries recorded by the other.
+pub struct Manifest {
+    path: PathBuf,
+    content: Mutex<ManifestContent>,
+    /// Released when closed.
+    _lock: std::fs::File,
+}
+
+impl Manifest {
+    /// Lock `cache_folder` and load its manifest, an empty one is used if it does not exist yet.
+    ///
+    /// Waits for the calls holding the lock, in this process or in another one, to be done with the folder.
+    pub async fn load(cache_folder: &Path) -> io::Result<Self> {
+        let lock = lock_folder(cache_folder).await?;
+        let path = cache_folder.join(MANIFEST_FILE_NAME);
+        let content = match tokio::fs::read(&path).await {
+            Ok(data) => serde_json::from_slice(&data)?,
+            Err(err) if err.kind() == io::ErrorKind::NotFound => ManifestContent::default(),
+            Err(err) => return Err(err),
+        };
+
+        Ok(Self { path, content: Mutex::new(content), _lock: lock })
+    }
+
+    pub async fn get(&self, file_name: &str) -> Option<ManifestEntry> {
+        self.content.lock().await.files.get(file_name).cloned()
+    }
+
+    /// Names of the files recorded, in order.
+    pub async fn file_names(&self) -> Vec<String> {
+        self.content.lock().await.files.keys().cloned().collect()
+    }
+
+    /// Insert or replace the entry of `file_name` and persist the manifest.
+    pub async fn record(&self, file_name: &str, entry: ManifestEntry) -> io::Result<()> {
+        let mut content = self.content.lock().await;
+        content.files.insert(file_name.to_string(), entry);
+        self.persist(&content).await
+    }
+
+    /// Modify the entry of `file_name`, if there is one, and persist the manifest.
+    pub async fn update(&self, file_name: &str, f: impl FnOnce(&mut ManifestEntry)) -> io::Result<()> {
+        let mut content = self.content.lock().await;
+        match content.files.get_mut(file_name) {
+            Some(entry) => f(entry),
+            None => return Ok(()),
+        }
+        self.persist(&content).await
+    }
+
+    /// Forget the entry of `file_name`, if there is one, and persist the manifest.
+    pub async fn remove(&self, file_name: &str) -> io::Result<()> {
+        let mut content = self.content.lock().await;
+        if content.files.remove(file_name).is_none() {
+            return Ok(());
+        }
+        self.persist(&content).await
+    }
+
+    async fn persist(&self, content: &ManifestContent) -> io::Result<()> {
+        let data = serde_json::to_vec_pretty(content)?;
+        let tmp_path = self.path.with_extension("json.tmp");
+
+        let mut file = File::create(&tmp_path).await?;
+        file.write_all(&data).await?;
+        file.sync_all().await?;
+        tokio::fs::rename(&tmp_path, &self.path).await?;
+        match self.path.parent() {
+            Some(cache_folder) => sync_dir(cache_folder).await,
+            None => Ok(()),
+        }
+    }
+}
+
+
+/// Take an exclusive lock on the lock file of `cache_folder`, held until the returned file is closed.
+async fn lock_folder(cache_folder: &Path) -> io::Result<std::fs::File> {
+    let path = cache_folder.join(LOCK_FILE_NAME);
+
+    // Waiting for the lock blocks the thread
+    tokio::task::spawn_blocking(move || {
+        let file = std::fs::OpenOptions::new().create(true).truncate(false).write(true).open(path)?;
+        lock_exclusive(&file)?;
+        Ok(file)
+    })
+    .await?
+}
+
+
+/// Wait for an exclusive `flock` on `file`, a no-op where it is not available.
+fn lock_exclusive(file: &std::fs::File) -> io::Result<()> {
+    #[cfg(unix)]
+    {
+        use std::os::unix::io::AsRawFd;
+
+        while unsafe { libc::flock(file.as_raw_fd(), libc::LOCK_EX) } != 0 {
+            let err = io::Error::last_os_error();
+            if err.kind() != io::ErrorKind::Interrupted {
+                return Err(err);
+            }
+        }
+        Ok(())
+    }
+    #[cfg(not(unix))]
+    {
+        let _ = file;
+        Ok(())
+    }
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::time::Duration;
+
+    #[tokio::test]
+    async fn waits_for_the_call_holding_the_folder() {
+        let cache_folder = std::env::temp_dir().join(format!("pmcollection-lock-{}", std::process::id()));
+        tokio::fs::create_dir_all(&cache_folder).await.unwrap();
+
+        let first = Manifest::load(&cache_folder).await.unwrap();
+        let second = tokio::spawn({
+            let cache_folder = cache_folder.clone();
+            async move { Manifest::load(&cache_folder).await.unwrap().file_names().await }
+        });
+        tokio::time::sleep(Duration::from_millis(200)).await;
+        assert!(!second.is_finished());
+
+        let entry = ManifestEntry {
+            size: 1,
+            decompressed_size: 2,
+            stored_size: None,
+            md5: None,
+            mtime: None,
+            status: FileStatus::Downloaded,
+        };
+        first.record("a.xml.gz", entry).await.unwrap();
+        drop(first);
+        // The second call starts from the entries of the first one
+        assert_eq!(second.await.unwrap(), ["a.xml.gz"]);
+
+        tokio::fs::remove_dir_all(&cache_folder).await.unwrap();
+    }
+}
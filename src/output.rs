@@ -0,0 +1,214 @@
+use std::fs::File;
+use std::io::{self, BufWriter, Write};
+use std::path::Path;
+use zstd::bulk::Compressor;
+
+use crate::download::WRITE_BUFFER_SIZE;
+
+
+/// Decompressed bytes per zstd frame, the granularity at which a reader can seek into a file.
+const ZSTD_FRAME_SIZE: usize = 1024 * 1024;
+
+const ZSTD_LEVEL: i32 = 3;
+
+/// Magic number of the skippable frame holding the seek table of a seekable zstd file.
+const SEEK_TABLE_FRAME_MAGIC: u32 = 0x184D2A5E;
+
+/// Magic number ending the seek table.
+const SEEKABLE_MAGIC: u32 = 0x8F92EAB1;
+
+
+/// How a downloaded `.xml.gz` file is stored in the cache folder.
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub enum OutputFormat {
+    /// Inflated to a raw `.xml` file.
+    #[default]
+    Xml,
+    /// Kept as the original `.xml.gz` file.
+    Gzip,
+    /// Transcoded to a seekable `.xml.zst` file.
+    Zstd,
+}
+
+impl OutputFormat {
+    pub fn parse(name: &str) -> Option<Self> {
+        match name {
+            "xml" => Some(OutputFormat::Xml),
+            "gzip" => Some(OutputFormat::Gzip),
+            "zstd" => Some(OutputFormat::Zstd),
+            _ => None,
+        }
+    }
+
+    /// Name of the stored file for a remote file named `xml_file_name` once decompressed.
+    pub fn file_name(&self, xml_file_name: &str) -> String {
+        match self {
+            OutputFormat::Xml => xml_file_name.to_string(),
+            OutputFormat::Gzip => format!("{}.gz", xml_file_name),
+            OutputFormat::Zstd => format!("{}.zst", xml_file_name),
+        }
+    }
+}
+
+
+/// Destination of the inflated bytes of a transfer, written from a blocking thread.
+pub enum Output {
+    Xml(BufWriter<File>),
+    Zstd(SeekableZstdWriter),
+    /// The compressed bytes are the output, the inflated ones are only checked.
+    Discard,
+}
+
+impl Output {
+    /// Create the output file at `path`, nothing is written there for `OutputFormat::Gzip`.
+    pub fn create(format: OutputFormat, path: &Path) -> io::Result<Self> {
+        Ok(match format {
+            OutputFormat::Xml => Output::Xml(BufWriter::with_capacity(WRITE_BUFFER_SIZE, File::create(path)?)),
+            OutputFormat::Zstd => Output::Zstd(SeekableZstdWriter::new(File::create(path)?)?),
+            OutputFormat::Gzip => Output::Discard,
+        })
+    }
+
+    pub fn write(&mut self, data: &[u8]) -> io::Result<()> {
+        match self {
+            Output::Xml(writer) => writer.write_all(data),
+            Output::Zstd(writer) => writer.write(data),
+            Output::Discard => Ok(()),
+        }
+    }
+
+    /// Flush the output and sync it to disk.
+    pub fn finish(self) -> io::Result<()> {
+        match self {
+            Output::Xml(mut writer) => {
+                writer.flush()?;
+                writer.get_ref().sync_all()
+            },
+            Output::Zstd(writer) => writer.finish(),
+            Output::Discard => Ok(()),
+        }
+    }
+}
+
+
+/// Writes a zstd file in the seekable format: independent frames of `ZSTD_FRAME_SIZE` decompressed bytes, followed by
+/// a skippable frame holding the compressed and decompressed size of each of them.
+///
+/// Plain zstd decoders read the file as usual and skip the seek table, readers aware of the format can decompress any
+/// range by locating its frames in the table.
+pub struct SeekableZstdWriter {
+    writer: BufWriter<File>,
+    compressor: Compressor<'static>,
+    frame: Vec<u8>,
+    /// Compressed and decompressed size of the frames written so far.
+    seek_table: Vec<(u32, u32)>,
+}
+
+impl SeekableZstdWriter {
+    fn new(file: File) -> io::Result<Self> {
+        Ok(Self {
+            writer: BufWriter::with_capacity(WRITE_BUFFER_SIZE, file),
+            compressor: Compressor::new(ZSTD_LEVEL)?,
+            frame: Vec::with_capacity(ZSTD_FRAME_SIZE),
+            seek_table: Vec::new(),
+        })
+    }
+
+    fn write(&mut self, mut data: &[u8]) -> io::Result<()> {
+        while !data.is_empty() {
+            let taken = data.len().min(ZSTD_FRAME_SIZE - self.frame.len());
+            self.frame.extend_from_slice(&data[..taken]);
+            data = &data[taken..];
+
+            if self.frame.len() == ZSTD_FRAME_SIZE {
+                self.write_frame()?;
+            }
+        }
+        Ok(())
+    }
+
+    fn finish(mut self) -> io::Result<()> {
+        if !self.frame.is_empty() {
+            self.write_frame()?;
+        }
+
+        let mut table = Vec::with_capacity(8 * self.seek_table.len() + 17);
+        table.extend_from_slice(&SEEK_TABLE_FRAME_MAGIC.to_le_bytes());
+        table.extend_from_slice(&(8 * self.seek_table.len() as u32 + 9).to_le_bytes());
+        for (compressed_size, decompressed_size) in &self.seek_table {
+            table.extend_from_slice(&compressed_size.to_le_bytes());
+            table.extend_from_slice(&decompressed_size.to_le_bytes());
+        }
+        table.extend_from_slice(&(self.seek_table.len() as u32).to_le_bytes());
+        // Seek table descriptor, no per-frame checksums
+        table.push(0);
+        table.extend_from_slice(&SEEKABLE_MAGIC.to_le_bytes());
+
+        self.writer.write_all(&table)?;
+        self.writer.flush()?;
+        self.writer.get_ref().sync_all()
+    }
+
+    fn write_frame(&mut self) -> io::Result<()> {
+        let compressed = self.compressor.compress(&self.frame)?;
+        self.writer.write_all(&compressed)?;
+        self.seek_table.push((compressed.len() as u32, self.frame.len() as u32));
+        self.frame.clear();
+        Ok(())
+    }
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn read_u32(data: &[u8], position: usize) -> u32 {
+        u32::from_le_bytes(data[position..position + 4].try_into().unwrap())
+    }
+
+    #[test]
+    fn writes_independent_frames_and_their_seek_table() {
+        let path = std::env::temp_dir().join(format!("pmcollection-seekable-{}.xml.zst", std::process::id()));
+        let data: Vec<u8> = (0..ZSTD_FRAME_SIZE * 5 / 2).map(|i| (i % 251) as u8).collect();
+        let mut writer = SeekableZstdWriter::new(File::create(&path).unwrap()).unwrap();
+        // Writes that do not line up with the frames
+        for chunk in data.chunks(300_001) {
+            writer.write(chunk).unwrap();
+        }
+        writer.finish().unwrap();
+        let file = std::fs::read(&path).unwrap();
+        std::fs::remove_file(&path).unwrap();
+
+        // Plain decoders skip the seek table
+        assert_eq!(zstd::decode_all(file.as_slice()).unwrap(), data);
+
+        // The table ends with the number of frames, the descriptor and the magic number
+        let footer = file.len() - 9;
+        assert_eq!(read_u32(&file, footer + 5), SEEKABLE_MAGIC);
+        assert_eq!(file[footer + 4], 0);
+        let frames = read_u32(&file, footer) as usize;
+        assert_eq!(frames, 3);
+
+        // A skippable frame holding one entry per frame
+        let table = footer - 8 * frames - 8;
+        assert_eq!(read_u32(&file, table), SEEK_TABLE_FRAME_MAGIC);
+        assert_eq!(read_u32(&file, table + 4) as usize, 8 * frames + 9);
+
+        let mut offset = 0;
+        let mut decompressed = Vec::new();
+        for frame in 0..frames {
+            let compressed_size = read_u32(&file, table + 8 + 8 * frame) as usize;
+            let decompressed_size = read_u32(&file, table + 12 + 8 * frame) as usize;
+            let expected_size = if frame < 2 { ZSTD_FRAME_SIZE } else { ZSTD_FRAME_SIZE / 2 };
+            assert_eq!(decompressed_size, expected_size);
+
+            // Each frame can be decompressed on its own
+            let frame_data = &file[offset..offset + compressed_size];
+            decompressed.extend(zstd::bulk::decompress(frame_data, decompressed_size).unwrap());
+            offset += compressed_size;
+        }
+        assert_eq!(offset, table);
+        assert_eq!(decompressed, data);
+    }
+}
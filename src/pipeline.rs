@@ -0,0 +1,277 @@
+use flate2::write::MultiGzDecoder;
+use memchr::memmem;
+use reqwest::Client;
+use std::io::{self, Write};
+use tokio::runtime::Handle;
+use tokio::sync::mpsc;
+
+use crate::download::BoxError;
+use crate::retry::{is_corrupt_data, RetryPolicy};
+use crate::source::Source;
+
+
+/// Number of article batches buffered ahead of the consumer before the transfer waits for it.
+const STREAM_BUFFER_BATCHES: usize = 8;
+
+const ARTICLE_START_TAG: &[u8] = b"<PubmedArticle";
+const ARTICLE_END_TAG: &[u8] = b"</PubmedArticle>";
+
+
+/// Cuts the `<PubmedArticle>` elements out of a decompressed XML stream fed in arbitrary chunks.
+///
+/// Only the bytes of the article being read are kept, everything between articles is dropped. PubMed escapes `<` in
+/// text content and does not use CDATA sections, so the tags can be matched on the raw bytes.
+pub struct ArticleSplitter {
+    buffer: Vec<u8>,
+    /// Whether `buffer` starts with the start tag of an article.
+    in_article: bool,
+    /// Position in `buffer` from which to look for the end tag, the bytes before it have already been searched.
+    scan_from: usize,
+}
+
+impl ArticleSplitter {
+    pub fn new() -> Self {
+        Self { buffer: Vec::new(), in_article: false, scan_from: 0 }
+    }
+
+    /// Append `data` to the stream and move the articles it completes to `articles`.
+    pub fn push(&mut self, data: &[u8], articles: &mut Vec<String>) -> io::Result<()> {
+        self.buffer.extend_from_slice(data);
+
+        loop {
+            if !self.in_article {
+                match find_start_tag(&self.buffer) {
+                    Some(start) => {
+                        self.buffer.drain(..start);
+                        self.in_article = true;
+                        self.scan_from = ARTICLE_START_TAG.len();
+                    },
+                    None => {
+                        // Keep what could be the beginning of a start tag cut by the chunk boundary
+                        let keep = self.buffer.len().min(ARTICLE_START_TAG.len());
+                        self.buffer.drain(..self.buffer.len() - keep);
+                        return Ok(());
+                    },
+                }
+            }
+
+            match memmem::find(&self.buffer[self.scan_from..], ARTICLE_END_TAG) {
+                Some(position) => {
+                    let end = self.scan_from + position + ARTICLE_END_TAG.len();
+                    let article = String::from_utf8(self.buffer.drain(..end).collect())
+                        .map_err(|err| io::Error::new(io::ErrorKind::InvalidData, err))?;
+                    articles.push(article);
+                    self.in_article = false;
+                },
+                None => {
+                    self.scan_from = self.buffer.len().saturating_sub(ARTICLE_END_TAG.len() - 1).max(self.scan_from);
+                    return Ok(());
+                },
+            }
+        }
+    }
+
+    /// Check that the stream did not end in the middle of an article.
+    pub fn finish(&self) -> io::Result<()> {
+        match self.in_article {
+            true => Err(io::Error::new(io::ErrorKind::UnexpectedEof, "stream ended inside a PubmedArticle")),
+            false => Ok(()),
+        }
+    }
+}
+
+
+/// Position of the first `<PubmedArticle>` start tag, which must not be confused with `<PubmedArticleSet>`.
+fn find_start_tag(buffer: &[u8]) -> Option<usize> {
+    let mut from = 0;
+    while let Some(position) = memmem::find(&buffer[from..], ARTICLE_START_TAG) {
+        let start = from + position;
+        match buffer.get(start + ARTICLE_START_TAG.len()) {
+            Some(b'>' | b' ' | b'\t' | b'\r' | b'\n') => return Some(start),
+            // The start tag may be cut by the end of the buffer, wait for more data
+            None => return None,
+            Some(_) => from = start + 1,
+        }
+    }
+    None
+}
+
+
+/// Download a `.xml.gz` file, or read a local one, and send its `<PubmedArticle>` elements to the returned channel as
+/// they are inflated.
+///
+/// Nothing is written to disk. The articles come in batches, one per chunk of the body, and the transfer waits when the
+/// consumer is `STREAM_BUFFER_BATCHES` batches behind. A connection that drops is resumed with a `Range` request
+/// according to `retry`, the decoder keeping its state in between. The stream ends with an error item if the download
+/// fails, and the transfer stops when the receiver is dropped.
+pub fn spawn_article_stream(
+    runtime: &Handle,
+    client: Client,
+    url: String,
+    retry: RetryPolicy,
+) -> mpsc::Receiver<Result<Vec<String>, BoxError>> {
+    let (sender, receiver) = mpsc::channel(STREAM_BUFFER_BATCHES);
+
+    runtime.spawn(async move {
+        if let Err(err) = stream_articles(&client, &url, &retry, &sender).await {
+            let _ = sender.send(Err(err)).await;
+        }
+    });
+
+    receiver
+}
+
+
+async fn stream_articles(
+    client: &Client,
+    url: &str,
+    retry: &RetryPolicy,
+    sender: &mpsc::Sender<Result<Vec<String>, BoxError>>,
+) -> Result<(), BoxError> {
+    let mut decoder = MultiGzDecoder::new(Vec::new());
+    let mut splitter = ArticleSplitter::new();
+    let source = Source::parse(url)?;
+    let mut offset = 0;
+    let mut retries = 0;
+
+    loop {
+        match read_body(client, &source, &mut offset, &mut decoder, &mut splitter, sender).await {
+            Ok(()) => break,
+            Err(err) => {
+                // The decoder cannot start over once articles have been sent
+                let corrupt = err.downcast_ref::<io::Error>().is_some_and(is_corrupt_data);
+                if corrupt || retries + 1 >= retry.max_attempts || !retry.should_retry(&*err) {
+                    return Err(err);
+                }
+                retries += 1;
+                tokio::time::sleep(retry.backoff(retries)).await;
+            },
+        }
+    }
+    if sender.is_closed() {
+        return Ok(());
+    }
+
+    decoder.try_finish()?;
+    let mut articles = Vec::new();
+    splitter.push(decoder.get_ref(), &mut articles)?;
+    splitter.finish()?;
+    if !articles.is_empty() {
+        let _ = sender.send(Ok(articles)).await;
+    }
+
+    Ok(())
+}
+
+
+/// Stream the body of `source` from `offset` through the decoder and the splitter, sending the articles it completes.
+async fn read_body(
+    client: &Client,
+    source: &Source,
+    offset: &mut u64,
+    decoder: &mut MultiGzDecoder<Vec<u8>>,
+    splitter: &mut ArticleSplitter,
+    sender: &mpsc::Sender<Result<Vec<String>, BoxError>>,
+) -> Result<(), BoxError> {
+    let (body, start) = source.open(client, *offset).await?;
+    if start != *offset {
+        return Err(io::Error::new(io::ErrorKind::Unsupported, "the server does not support resuming the transfer").into());
+    }
+    let Some(mut body) = body else {
+        return Ok(());
+    };
+
+    while let Some(chunk) = body.chunk().await? {
+        *offset += chunk.len() as u64;
+        decoder.write_all(&chunk)?;
+
+        let mut articles = Vec::new();
+        splitter.push(decoder.get_ref(), &mut articles)?;
+        decoder.get_mut().clear();
+
+        if !articles.is_empty() && sender.send(Ok(articles)).await.is_err() {
+            // Nobody is listening anymore
+            return Ok(());
+        }
+    }
+
+    Ok(())
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const DOCUMENT: &str = "<?xml version=\"1.0\" ?>\n<PubmedArticleSet>\n<PubmedArticle>\n<PMID>1</PMID>\n\
+        </PubmedArticle>\n<PubmedArticle Status=\"x\"><PMID>2</PMID><Title>a &lt; b</Title></PubmedArticle>\n\
+        <DeleteCitation><PMID>3</PMID></DeleteCitation>\n</PubmedArticleSet>\n";
+
+    fn split(chunk_size: usize) -> Vec<String> {
+        let mut splitter = ArticleSplitter::new();
+        let mut articles = Vec::new();
+        for chunk in DOCUMENT.as_bytes().chunks(chunk_size) {
+            splitter.push(chunk, &mut articles).unwrap();
+        }
+        splitter.finish().unwrap();
+        articles
+    }
+
+    #[test]
+    fn splits_articles_cut_by_chunk_boundaries() {
+        let expected = vec![
+            "<PubmedArticle>\n<PMID>1</PMID>\n</PubmedArticle>".to_string(),
+            "<PubmedArticle Status=\"x\"><PMID>2</PMID><Title>a &lt; b</Title></PubmedArticle>".to_string(),
+        ];
+        for chunk_size in [1, 2, 3, 7, 14, 15, 16, 17, 64, DOCUMENT.len()] {
+            assert_eq!(split(chunk_size), expected, "chunks of {} bytes", chunk_size);
+        }
+    }
+
+    #[test]
+    fn does_not_take_the_set_for_an_article() {
+        assert_eq!(find_start_tag(b"<PubmedArticleSet><PubmedArticle>"), Some(18));
+        assert_eq!(find_start_tag(b"<PubmedArticleSet>"), None);
+        // The character after the tag name is not known yet
+        assert_eq!(find_start_tag(b"<PubmedArticleSet><PubmedArticle"), None);
+    }
+
+    #[test]
+    fn keeps_only_the_article_being_read() {
+        let mut splitter = ArticleSplitter::new();
+        let mut articles = Vec::new();
+        splitter.push(&b"x".repeat(1000), &mut articles).unwrap();
+        assert!(splitter.buffer.len() <= ARTICLE_START_TAG.len());
+
+        splitter.push(b"<PubmedArticle><PMID>1</PMID>", &mut articles).unwrap();
+        assert!(articles.is_empty());
+        assert!(splitter.finish().is_err());
+    }
+
+    #[tokio::test]
+    async fn streams_the_articles_of_every_gzip_member() {
+        use flate2::write::GzEncoder;
+        use flate2::Compression;
+
+        // Two files joined with `cat`, the second member starting in the middle of the set
+        let (head, tail) = DOCUMENT.split_at(DOCUMENT.find("<PubmedArticle Status").unwrap());
+        let mut stream = Vec::new();
+        for part in [head, tail] {
+            let mut encoder = GzEncoder::new(Vec::new(), Compression::fast());
+            encoder.write_all(part.as_bytes()).unwrap();
+            stream.extend(encoder.finish().unwrap());
+        }
+        let path = std::env::temp_dir().join(format!("pmcollection-stream-{}.xml.gz", std::process::id()));
+        std::fs::write(&path, stream).unwrap();
+
+        let url = path.to_string_lossy().into_owned();
+        let mut receiver = spawn_article_stream(&Handle::current(), Client::new(), url, RetryPolicy::default());
+        let mut articles = Vec::new();
+        while let Some(batch) = receiver.recv().await {
+            articles.extend(batch.unwrap());
+        }
+        std::fs::remove_file(&path).unwrap();
+
+        assert_eq!(articles, split(DOCUMENT.len()));
+    }
+}
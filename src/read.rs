@@ -0,0 +1,50 @@
+use flate2::read::MultiGzDecoder;
+use std::fs::File;
+use std::io::{self, BufReader, Read};
+use std::path::Path;
+
+
+const GZIP_MAGIC: &[u8] = &[0x1f, 0x8b];
+
+const ZSTD_MAGIC: &[u8] = &[0x28, 0xb5, 0x2f, 0xfd];
+
+
+/// Open an XML file stored in any of the output formats, decompressing it on the fly.
+///
+/// The compression is detected from the first bytes of the file rather than from its name. The seek table of a
+/// seekable zstd file is a skippable frame, so the whole file is decompressed as a plain zstd stream.
+pub fn open_xml(path: &Path) -> io::Result<Box<dyn Read + Send>> {
+    let mut file = File::open(path)?;
+    let mut magic = [0; 4];
+    let read = read_prefix(&mut file, &mut magic)?;
+    let reader = BufReader::new(io::Cursor::new(magic[..read].to_vec()).chain(file));
+
+    Ok(if magic.starts_with(ZSTD_MAGIC) {
+        Box::new(zstd::stream::read::Decoder::with_buffer(reader)?)
+    } else if magic.starts_with(GZIP_MAGIC) {
+        Box::new(MultiGzDecoder::new(reader))
+    } else {
+        Box::new(reader)
+    })
+}
+
+
+/// Read a whole XML file stored in any of the output formats into a string.
+pub fn read_xml(path: &Path) -> io::Result<String> {
+    let mut content = String::new();
+    open_xml(path)?.read_to_string(&mut content)?;
+    Ok(content)
+}
+
+
+/// Fill `buffer` from the start of `file`, short only if the file is.
+fn read_prefix(file: &mut File, buffer: &mut [u8]) -> io::Result<usize> {
+    let mut read = 0;
+    while read < buffer.len() {
+        match file.read(&mut buffer[read..])? {
+            0 => break,
+            n => read += n,
+        }
+    }
+    Ok(read)
+}
@@ -0,0 +1,685 @@
+use quick_xml::events::{BytesStart, Event};
+use quick_xml::Reader;
+use std::io::{self, BufRead, BufReader, Read};
+use std::path::Path;
+
+use crate::read::open_xml;
+
+
+const ARTICLE_TAG: &[u8] = b"PubmedArticle";
+
+const MONTHS: [&str; 12] = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+
+
+/// A field of a record, turned into the matching Python object: `None`, `bool`, `int`, `str`, `datetime.date`,
+/// `list` or `dict`.
+#[derive(Debug, PartialEq)]
+pub enum Value {
+    None,
+    Bool(bool),
+    Int(i64),
+    Str(String),
+    Date { year: i32, month: u8, day: u8 },
+    List(Vec<Value>),
+    Map(Vec<(&'static str, Value)>),
+}
+
+
+/// Parse the `<PubmedArticle>` records of an XML file stored in any of the output formats.
+pub fn parse_file(path: &Path) -> io::Result<Vec<Value>> {
+    RecordReader::open(path)?.read_all()
+}
+
+
+/// Parse the `<PubmedArticle>` records of an XML document.
+pub fn parse_reader<R: BufRead>(reader: R) -> io::Result<Vec<Value>> {
+    RecordReader::new(reader).read_all()
+}
+
+
+/// Reads the `<PubmedArticle>` records of an XML document one at a time.
+///
+/// The document is read with a pull parser, only the elements of the record being read are kept in memory, so the
+/// memory used does not depend on the size of the document. Each record is a mapping of the fields of `PubmedItem`,
+/// read the same way as `PubmedItem.from_xml` does, so that `PubmedItem.model_validate` builds the same item. Only the
+/// text of inline markup such as `<i>` or `<sub>` and of CDATA sections, which `from_xml` drops, is kept, and invalid
+/// dates, on which `from_xml` raises, are `None`. The other top-level elements, e.g. `<PubmedBookArticle>` and
+/// `<DeleteCitation>`, are skipped.
+pub struct RecordReader<R> {
+    reader: Reader<R>,
+    buffer: Vec<u8>,
+    /// The elements of the record being read, from the `<PubmedArticle>` down.
+    open: Vec<Element>,
+}
+
+impl RecordReader<BufReader<Box<dyn Read + Send>>> {
+    /// Read an XML file stored in any of the output formats.
+    pub fn open(path: &Path) -> io::Result<Self> {
+        Ok(Self::new(BufReader::new(open_xml(path)?)))
+    }
+}
+
+impl<R: BufRead> RecordReader<R> {
+    pub fn new(reader: R) -> Self {
+        Self { reader: Reader::from_reader(reader), buffer: Vec::new(), open: Vec::new() }
+    }
+
+    /// The next record of the document, `None` once it is over.
+    pub fn next_record(&mut self) -> io::Result<Option<Value>> {
+        loop {
+            self.buffer.clear();
+            match self.reader.read_event_into(&mut self.buffer).map_err(invalid_data)? {
+                Event::Start(start) => {
+                    if !self.open.is_empty() || start.name().as_ref() == ARTICLE_TAG {
+                        let offset = self.open.last().map_or(0, |parent| parent.text.len());
+                        self.open.push(Element::new(&start, offset)?);
+                    }
+                },
+                Event::Empty(start) => {
+                    if let Some(parent) = self.open.last_mut() {
+                        let offset = parent.text.len();
+                        parent.children.push(Element::new(&start, offset)?);
+                    }
+                },
+                Event::Text(text) => {
+                    if let Some(element) = self.open.last_mut() {
+                        element.text.push_str(&text.unescape().map_err(invalid_data)?);
+                    }
+                },
+                Event::CData(data) => {
+                    if let Some(element) = self.open.last_mut() {
+                        element.text.push_str(std::str::from_utf8(&data).map_err(invalid_data)?);
+                    }
+                },
+                Event::End(_) => {
+                    if let Some(element) = self.open.pop() {
+                        match self.open.last_mut() {
+                            Some(parent) => parent.children.push(element),
+                            None => return Ok(Some(pubmed_item(&element))),
+                        }
+                    }
+                },
+                Event::Eof => return Ok(None),
+                _ => {},
+            }
+        }
+    }
+
+    fn read_all(mut self) -> io::Result<Vec<Value>> {
+        let mut records = Vec::new();
+        while let Some(record) = self.next_record()? {
+            records.push(record);
+        }
+        Ok(records)
+    }
+}
+
+
+/// An element of the record being read.
+struct Element {
+    name: String,
+    attributes: Vec<(String, String)>,
+    /// Text directly inside the element, without the text of its children.
+    text: String,
+    children: Vec<Element>,
+    /// Length of the text of the parent when the element starts, where its own text goes in the text of the parent.
+    offset: usize,
+}
+
+impl Element {
+    fn new(start: &BytesStart, offset: usize) -> io::Result<Self> {
+        let mut attributes = Vec::new();
+        for attribute in start.attributes() {
+            let attribute = attribute.map_err(invalid_data)?;
+            let value = attribute.unescape_value().map_err(invalid_data)?;
+            attributes.push((String::from_utf8_lossy(attribute.key.as_ref()).into_owned(), value.into_owned()));
+        }
+
+        Ok(Self {
+            name: String::from_utf8_lossy(start.name().as_ref()).into_owned(),
+            attributes,
+            text: String::new(),
+            children: Vec::new(),
+            offset,
+        })
+    }
+
+    fn attribute(&self, name: &str) -> Option<&str> {
+        self.attributes.iter().find(|(key, _)| key == name).map(|(_, value)| value.as_str())
+    }
+
+    fn children<'a>(&'a self, name: &'a str) -> impl Iterator<Item = &'a Element> {
+        self.children.iter().filter(move |child| child.name == name)
+    }
+
+    fn child(&self, name: &str) -> Option<&Element> {
+        self.children.iter().find(|child| child.name == name)
+    }
+
+    /// The elements at the end of a path of tags, like `utils.select`.
+    fn select(&self, path: &str) -> Vec<&Element> {
+        let mut selected = vec![self];
+        for tag in path.split('/') {
+            selected = selected
+                .into_iter()
+                .flat_map(|element| &element.children)
+                .filter(|child| child.name == tag)
+                .collect();
+        }
+        selected
+    }
+
+    /// The trimmed text of the element, including the text of its inline markup such as `<i>` or `<sup>`.
+    fn text(&self) -> Option<String> {
+        let mut text = String::new();
+        self.write_text(&mut text);
+        let text = text.trim();
+        (!text.is_empty()).then(|| text.to_string())
+    }
+
+    fn write_text(&self, text: &mut String) {
+        let mut written = 0;
+        for child in &self.children {
+            text.push_str(&self.text[written..child.offset]);
+            child.write_text(text);
+            written = child.offset;
+        }
+        text.push_str(&self.text[written..]);
+    }
+
+    fn is_yes(&self, attribute: &str) -> Value {
+        Value::Bool(self.attribute(attribute) == Some("Y"))
+    }
+}
+
+
+fn text(element: Option<&Element>) -> Value {
+    element.and_then(Element::text).map_or(Value::None, Value::Str)
+}
+
+
+fn own_text(element: &Element) -> Value {
+    text(Some(element))
+}
+
+
+fn attribute(element: &Element, name: &str) -> Value {
+    element.attribute(name).map_or(Value::None, |value| Value::Str(value.to_string()))
+}
+
+
+fn int(element: Option<&Element>) -> Value {
+    element.and_then(Element::text).and_then(|text| text.parse().ok()).map_or(Value::None, Value::Int)
+}
+
+
+fn list<'a>(elements: impl IntoIterator<Item = &'a Element>, build: fn(&Element) -> Value) -> Value {
+    Value::List(elements.into_iter().map(build).collect())
+}
+
+
+/// A list of the elements, `None` when there are none.
+fn optional_list(elements: Vec<&Element>, build: fn(&Element) -> Value) -> Value {
+    match elements.is_empty() {
+        true => Value::None,
+        false => list(elements, build),
+    }
+}
+
+
+/// A list of the elements at the end of `path`, `None` when the list element the path starts with is missing.
+fn listed(element: &Element, path: &str, build: fn(&Element) -> Value) -> Value {
+    let list_tag = path.split('/').next().unwrap_or(path);
+    match element.child(list_tag) {
+        Some(_) => list(element.select(path), build),
+        None => Value::None,
+    }
+}
+
+
+fn optional(element: Option<&Element>, build: fn(&Element) -> Value) -> Value {
+    element.map_or(Value::None, build)
+}
+
+
+/// The date held by the `Year`, `Month` and `Day` children of a date element, like `define_datetime_from_node`.
+fn date(element: Option<&Element>) -> Value {
+    let Some(element) = element else {
+        return Value::None;
+    };
+    let Some(year) = element.child("Year").and_then(Element::text).and_then(|year| year.parse().ok()) else {
+        return Value::None;
+    };
+    let month = match element.child("Month").and_then(Element::text) {
+        None => Some(1),
+        Some(month) => match MONTHS.iter().position(|name| *name == month) {
+            Some(index) => Some(index as u8 + 1),
+            None => month.parse().ok(),
+        },
+    };
+    let day = match element.child("Day").and_then(Element::text) {
+        None => Some(1),
+        Some(day) => day.parse().ok(),
+    };
+
+    match (month, day) {
+        (Some(month @ 1..=12), Some(day)) if day >= 1 && day <= days_in_month(year, month) => {
+            Value::Date { year, month, day }
+        },
+        _ => Value::None,
+    }
+}
+
+
+fn days_in_month(year: i32, month: u8) -> u8 {
+    match month {
+        2 if year % 4 == 0 && (year % 100 != 0 || year % 400 == 0) => 29,
+        2 => 28,
+        4 | 6 | 9 | 11 => 30,
+        _ => 31,
+    }
+}
+
+
+fn pubmed_item(element: &Element) -> Value {
+    Value::Map(vec![
+        ("citation", optional(element.child("MedlineCitation"), medline_citation)),
+        ("data", optional(element.child("PubmedData"), pubmed_data)),
+    ])
+}
+
+
+fn medline_citation(element: &Element) -> Value {
+    let pmid = element.child("PMID");
+
+    Value::Map(vec![
+        ("pmid", int(pmid)),
+        ("pmid_version", pmid.map_or(Value::None, |pmid| int_attribute(pmid, "Version"))),
+        ("completed", date(element.child("DateCompleted"))),
+        ("revised", date(element.child("DateRevised"))),
+        ("article", optional(element.child("Article"), article)),
+        ("journal_info", optional(element.child("MedlineJournalInfo"), medline_journal_info)),
+        ("chemicals", list(element.select("ChemicalList/Chemical"), chemical)),
+        ("subset", text(element.child("CitationSubset"))),
+        ("mesh_headings", list(element.select("MeshHeadingList/MeshHeading"), mesh_heading)),
+        ("keywords", listed(element, "KeywordList/Keyword", keyword)),
+        ("personal_name_subjects", listed(element, "PersonalNameSubjectList/PersonalNameSubject", author)),
+        ("comments_corrections", listed(element, "CommentsCorrectionsList/CommentsCorrections", comment_correction)),
+        ("other_ids", optional_list(element.children("OtherID").collect(), identifier)),
+        ("other_abstracts", optional_list(element.children("OtherAbstract").collect(), other_abstract)),
+        ("general_note", optional(element.child("GeneralNote"), general_note)),
+        ("space_flight_missions", optional_list(element.children("SpaceFlightMission").collect(), own_text)),
+        ("gene_symbols", optional_list(element.select("GeneSymbolList/GeneSymbol"), own_text)),
+        ("supplemental_meshs", optional_list(element.select("SupplMeshList/SupplMeshName"), supplemental_mesh)),
+        ("investigators", optional_list(element.select("InvestigatorList/Investigator"), investigator)),
+        ("coi_statement", text(element.child("CoiStatement"))),
+    ])
+}
+
+
+fn int_attribute(element: &Element, name: &str) -> Value {
+    element.attribute(name).and_then(|value| value.parse().ok()).map_or(Value::None, Value::Int)
+}
+
+
+fn article(element: &Element) -> Value {
+    let abstract_element = element.child("Abstract");
+
+    Value::Map(vec![
+        ("publication_model", attribute(element, "PubModel")),
+        ("journal", optional(element.child("Journal"), journal)),
+        ("title", text(element.child("ArticleTitle"))),
+        ("abstract", text(abstract_element.and_then(|abstract_element| abstract_element.child("AbstractText")))),
+        ("pagination", text(element.select("Pagination/MedlinePgn").first().copied())),
+        ("authors", list(element.select("AuthorList/Author"), author)),
+        ("language", text(element.child("Language"))),
+        ("date", date(element.child("ArticleDate"))),
+        ("grants", optional_list(element.select("GrantList/Grant"), grant)),
+        ("publication_types", list(element.select("PublicationTypeList/PublicationType"), publication)),
+        ("elocation_id", optional(element.child("ELocationID"), elocation_id)),
+        ("vernacular_title", text(element.child("VernacularTitle"))),
+        ("data_banks", optional_list(element.select("DataBankList/DataBank"), data_bank)),
+        (
+            "copyright_information",
+            text(abstract_element.and_then(|abstract_element| abstract_element.child("CopyrightInformation"))),
+        ),
+    ])
+}
+
+
+fn data_bank(element: &Element) -> Value {
+    let accession_numbers = element.select("AccessionNumberList/AccessionNumber");
+
+    Value::Map(vec![
+        ("name", text(element.child("DataBankName"))),
+        (
+            "accession_numbers",
+            Value::List(accession_numbers.into_iter().filter_map(Element::text).map(Value::Str).collect()),
+        ),
+        ("complete", element.is_yes("CompleteYN")),
+    ])
+}
+
+
+fn elocation_id(element: &Element) -> Value {
+    Value::Map(vec![
+        ("id_type", attribute(element, "EIdType")),
+        ("valid", element.is_yes("ValidYN")),
+        ("value", own_text(element)),
+    ])
+}
+
+
+fn journal(element: &Element) -> Value {
+    Value::Map(vec![
+        ("issn", optional(element.child("ISSN"), issn)),
+        ("issue", optional(element.child("JournalIssue"), journal_issue)),
+        ("title", text(element.child("Title"))),
+        ("iso_abbreviation", text(element.child("ISOAbbreviation"))),
+    ])
+}
+
+
+fn journal_issue(element: &Element) -> Value {
+    let pub_date = element.child("PubDate");
+
+    Value::Map(vec![
+        ("medium", attribute(element, "CitedMedium")),
+        ("volume", text(element.child("Volume"))),
+        ("issue", text(element.child("Issue"))),
+        ("date", date(pub_date)),
+        ("season", text(pub_date.and_then(|pub_date| pub_date.child("Season")))),
+        ("medline_date", text(pub_date.and_then(|pub_date| pub_date.child("MedlineDate")))),
+    ])
+}
+
+
+fn issn(element: &Element) -> Value {
+    Value::Map(vec![("type", attribute(element, "IssnType")), ("value", own_text(element))])
+}
+
+
+fn publication(element: &Element) -> Value {
+    Value::Map(vec![("unique_identifier", attribute(element, "UI")), ("type", own_text(element))])
+}
+
+
+fn article_id(element: &Element) -> Value {
+    Value::Map(vec![("id", own_text(element)), ("id_type", attribute(element, "IdType"))])
+}
+
+
+fn author(element: &Element) -> Value {
+    Value::Map(vec![
+        ("valid", element.is_yes("ValidYN")),
+        ("last_name", text(element.child("LastName"))),
+        ("fore_name", text(element.child("ForeName"))),
+        ("initials", text(element.child("Initials"))),
+        ("collective_name", text(element.child("CollectiveName"))),
+        ("affiliation", text(element.select("AffiliationInfo/Affiliation").first().copied())),
+        ("identifier", optional(element.child("Identifier"), identifier)),
+    ])
+}
+
+
+fn chemical(element: &Element) -> Value {
+    let name_of_substance = element.child("NameOfSubstance");
+
+    Value::Map(vec![
+        ("registry_number", text(element.child("RegistryNumber"))),
+        ("unique_identifier", name_of_substance.map_or(Value::None, |name| attribute(name, "UI"))),
+        ("name_of_substance", text(name_of_substance)),
+    ])
+}
+
+
+fn investigator(element: &Element) -> Value {
+    Value::Map(vec![
+        ("last_name", text(element.child("LastName"))),
+        ("fore_name", text(element.child("ForeName"))),
+        ("initials", text(element.child("Initials"))),
+        ("suffix", text(element.child("Suffix"))),
+        ("affiliation", text(element.select("AffiliationInfo/Affiliation").first().copied())),
+        ("identifier", optional(element.child("Identifier"), identifier)),
+        ("valid", element.is_yes("ValidYN")),
+    ])
+}
+
+
+fn supplemental_mesh(element: &Element) -> Value {
+    Value::Map(vec![
+        ("type", attribute(element, "Type")),
+        ("ui", attribute(element, "UI")),
+        ("name", own_text(element)),
+    ])
+}
+
+
+fn grant(element: &Element) -> Value {
+    Value::Map(vec![
+        ("id", text(element.child("GrantID"))),
+        ("acronym", text(element.child("Acronym"))),
+        ("agency", text(element.child("Agency"))),
+        ("country", text(element.child("Country"))),
+    ])
+}
+
+
+fn other_abstract(element: &Element) -> Value {
+    Value::Map(vec![
+        ("text", text(element.child("AbstractText"))),
+        ("source", attribute(element, "Source")),
+        ("language", attribute(element, "Language")),
+    ])
+}
+
+
+fn identifier(element: &Element) -> Value {
+    Value::Map(vec![("id", own_text(element)), ("source", attribute(element, "Source"))])
+}
+
+
+fn medline_journal_info(element: &Element) -> Value {
+    Value::Map(vec![
+        ("country", text(element.child("Country"))),
+        ("title_abbreviation", text(element.child("MedlineTA"))),
+        ("nlm_unique_id", text(element.child("NlmUniqueID"))),
+        ("issn_linking", text(element.child("ISSNLinking"))),
+    ])
+}
+
+
+fn comment_correction(element: &Element) -> Value {
+    let pmid = element.child("PMID");
+
+    Value::Map(vec![
+        ("pmid", int(pmid)),
+        ("pmid_version", pmid.map_or(Value::None, |pmid| int_attribute(pmid, "Version"))),
+        ("ref_source", text(element.child("RefSource"))),
+        ("ref_type", attribute(element, "RefType")),
+    ])
+}
+
+
+fn mesh_heading(element: &Element) -> Value {
+    Value::Map(vec![
+        ("descriptor", optional(element.child("DescriptorName"), topic)),
+        ("qualifier", optional(element.child("QualifierName"), topic)),
+    ])
+}
+
+
+fn general_note(element: &Element) -> Value {
+    Value::Map(vec![("owner", attribute(element, "Owner")), ("note", own_text(element))])
+}
+
+
+fn keyword(element: &Element) -> Value {
+    Value::Map(vec![("major_topic", element.is_yes("MajorTopicYN")), ("text", own_text(element))])
+}
+
+
+fn topic(element: &Element) -> Value {
+    Value::Map(vec![
+        ("major_topic", element.is_yes("MajorTopicYN")),
+        ("unique_identifier", attribute(element, "UI")),
+        ("name", own_text(element)),
+    ])
+}
+
+
+fn pubmed_pub_date(element: &Element) -> Value {
+    Value::Map(vec![("publication_status", attribute(element, "PubStatus")), ("date", date(Some(element)))])
+}
+
+
+fn pubmed_data(element: &Element) -> Value {
+    let mut references = Vec::new();
+    for reference_list in element.children("ReferenceList") {
+        reference_items(reference_list, &mut references);
+    }
+
+    Value::Map(vec![
+        ("article_ids", list(element.select("ArticleIdList/ArticleId"), article_id)),
+        ("publication_status", text(element.child("PublicationStatus"))),
+        ("history", list(element.select("History/PubMedPubDate"), pubmed_pub_date)),
+        ("references", list(references, reference)),
+    ])
+}
+
+
+/// Collect the `Reference` elements of a `ReferenceList`, including those of the lists nested in it.
+fn reference_items<'a>(reference_list: &'a Element, references: &mut Vec<&'a Element>) {
+    for item in &reference_list.children {
+        match item.name.as_str() {
+            "Reference" => references.push(item),
+            "ReferenceList" => reference_items(item, references),
+            _ => {},
+        }
+    }
+}
+
+
+fn reference(element: &Element) -> Value {
+    Value::Map(vec![
+        ("citation", text(element.child("Citation"))),
+        ("article_ids", list(element.select("ArticleIdList/ArticleId"), article_id)),
+    ])
+}
+
+
+fn invalid_data<E: Into<Box<dyn std::error::Error + Send + Sync>>>(err: E) -> io::Error {
+    io::Error::new(io::ErrorKind::InvalidData, err)
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// The records of a document holding one `<PubmedArticle>` per citation, each with the given content.
+    fn parse(citations: &[&str]) -> Vec<Value> {
+        let articles: String = citations
+            .iter()
+            .map(|citation| format!("<PubmedArticle><MedlineCitation>{}</MedlineCitation></PubmedArticle>\n", citation))
+            .collect();
+        let document = format!("<?xml version=\"1.0\"?>\n<PubmedArticleSet>\n{}</PubmedArticleSet>\n", articles);
+        parse_reader(document.as_bytes()).unwrap()
+    }
+
+    /// The field at the end of a path of keys, e.g. `citation/article/title`.
+    fn field<'a>(value: &'a Value, path: &str) -> &'a Value {
+        path.split('/').fold(value, |value, key| match value {
+            Value::Map(fields) => &fields.iter().find(|(name, _)| *name == key).unwrap().1,
+            Value::List(items) => &items[key.parse::<usize>().unwrap()],
+            _ => panic!("no field {} in {:?}", key, value),
+        })
+    }
+
+    fn string(value: &str) -> Value {
+        Value::Str(value.to_string())
+    }
+
+    #[test]
+    fn keeps_the_text_of_inline_markup_in_place() {
+        let records = parse(&[
+            "<Article><ArticleTitle>The <i>in vivo</i> effect of H<sub>2</sub>O<sup>18</sup>.</ArticleTitle>\
+             <Abstract><AbstractText> <b>Aim</b>: <i>a</i> and <i>b</i> </AbstractText></Abstract></Article>",
+        ]);
+
+        assert_eq!(field(&records[0], "citation/article/title"), &string("The in vivo effect of H2O18."));
+        assert_eq!(field(&records[0], "citation/article/abstract"), &string("Aim: a and b"));
+    }
+
+    #[test]
+    fn reads_empty_elements() {
+        let records = parse(&[
+            "<Article><ArticleTitle>Before<br/>after</ArticleTitle><Journal><ISSN IssnType=\"Print\"/></Journal>\
+             <ELocationID EIdType=\"doi\" ValidYN=\"Y\"/></Article>\
+             <KeywordList><Keyword MajorTopicYN=\"Y\"/></KeywordList>",
+        ]);
+
+        assert_eq!(field(&records[0], "citation/article/title"), &string("Beforeafter"));
+        assert_eq!(field(&records[0], "citation/article/journal/issn/type"), &string("Print"));
+        assert_eq!(field(&records[0], "citation/article/journal/issn/value"), &Value::None);
+        assert_eq!(field(&records[0], "citation/article/elocation_id/valid"), &Value::Bool(true));
+        assert_eq!(field(&records[0], "citation/keywords/0/major_topic"), &Value::Bool(true));
+        assert_eq!(field(&records[0], "citation/keywords/0/text"), &Value::None);
+    }
+
+    #[test]
+    fn unescapes_entities() {
+        let records = parse(&[
+            "<Article><ArticleTitle>Cell &amp; tissue &lt;1&gt; &#946;-&#x3B3;</ArticleTitle>\
+             <Abstract><AbstractText><![CDATA[a < b]]> &quot;c&quot;</AbstractText></Abstract></Article>\
+             <GeneralNote Owner=\"A &amp; B\">note</GeneralNote>",
+        ]);
+
+        assert_eq!(field(&records[0], "citation/article/title"), &string("Cell & tissue <1> β-γ"));
+        assert_eq!(field(&records[0], "citation/article/abstract"), &string("a < b \"c\""));
+        assert_eq!(field(&records[0], "citation/general_note/owner"), &string("A & B"));
+    }
+
+    #[test]
+    fn skips_book_articles_and_deleted_citations() {
+        let document = "<PubmedArticleSet>\
+            <PubmedBookArticle><BookDocument><PMID Version=\"1\">1</PMID></BookDocument></PubmedBookArticle>\
+            <PubmedArticle><MedlineCitation><PMID Version=\"2\">2</PMID></MedlineCitation></PubmedArticle>\
+            <DeleteCitation><PMID Version=\"1\">3</PMID><PMID Version=\"1\">4</PMID></DeleteCitation>\
+            </PubmedArticleSet>";
+        let mut reader = RecordReader::new(document.as_bytes());
+
+        let record = reader.next_record().unwrap().unwrap();
+        assert_eq!(field(&record, "citation/pmid"), &Value::Int(2));
+        assert_eq!(field(&record, "citation/pmid_version"), &Value::Int(2));
+        assert_eq!(reader.next_record().unwrap(), None);
+    }
+
+    #[test]
+    fn reads_dates_and_drops_invalid_ones() {
+        let date = |content: &str| {
+            let records = parse(&[&format!("<DateRevised>{}</DateRevised>", content)]);
+            match field(&records[0], "citation/revised") {
+                Value::Date { year, month, day } => Some((*year, *month, *day)),
+                Value::None => None,
+                other => panic!("not a date: {:?}", other),
+            }
+        };
+
+        assert_eq!(date("<Year>2024</Year><Month>02</Month><Day>29</Day>"), Some((2024, 2, 29)));
+        assert_eq!(date("<Year>2024</Year><Month>Feb</Month>"), Some((2024, 2, 1)));
+        assert_eq!(date("<Year>2024</Year>"), Some((2024, 1, 1)));
+        assert_eq!(date("<Year>2023</Year><Month>02</Month><Day>29</Day>"), None);
+        assert_eq!(date("<Year>2024</Year><Month>04</Month><Day>31</Day>"), None);
+        assert_eq!(date("<Year>2024</Year><Month>13</Month><Day>1</Day>"), None);
+        assert_eq!(date("<Year>2024</Year><Month>Spring</Month>"), None);
+        assert_eq!(date("<Year>2024</Year><Month>1</Month><Day>0</Day>"), None);
+        assert_eq!(date("<Month>1</Month><Day>1</Day>"), None);
+    }
+
+    #[test]
+    fn rejects_malformed_documents() {
+        let err = parse_reader("<PubmedArticleSet><PubmedArticle><PMID>1</Title>".as_bytes()).unwrap_err();
+        assert_eq!(err.kind(), io::ErrorKind::InvalidData);
+    }
+}
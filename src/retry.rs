@@ -0,0 +1,78 @@
+use std::error::Error;
+use std::io;
+use std::time::Duration;
+
+use crate::download::ChecksumMismatch;
+
+
+/// HTTP status codes retried by default: timeouts, rate limiting and transient server errors.
+pub const DEFAULT_RETRY_STATUSES: [u16; 6] = [408, 429, 500, 502, 503, 504];
+
+
+/// When and how long to wait before trying to download a file again.
+///
+/// The delay before the n-th retry grows as `base_delay * 2^(n - 1)`, capped at `max_delay`. With `jitter`, the delay
+/// is drawn uniformly between zero and that value ("full jitter"), so tasks that failed together do not retry together.
+#[derive(Clone, Debug)]
+pub struct RetryPolicy {
+    /// Total number of attempts per file, the first one included.
+    pub max_attempts: u32,
+    pub base_delay: Duration,
+    pub max_delay: Duration,
+    pub jitter: bool,
+    /// HTTP status codes worth retrying, any other error status fails the file right away.
+    pub retry_statuses: Vec<u16>,
+}
+
+impl Default for RetryPolicy {
+    fn default() -> Self {
+        Self {
+            max_attempts: 5,
+            base_delay: Duration::from_secs(1),
+            max_delay: Duration::from_secs(60),
+            jitter: true,
+            retry_statuses: DEFAULT_RETRY_STATUSES.to_vec(),
+        }
+    }
+}
+
+impl RetryPolicy {
+    /// Delay to wait before the `retry`-th retry, counting from 1.
+    pub fn backoff(&self, retry: u32) -> Duration {
+        let exponent = retry.saturating_sub(1).min(31);
+        let delay = self.base_delay.saturating_mul(1 << exponent).min(self.max_delay);
+
+        match self.jitter {
+            true => delay.mul_f64(fastrand::f64()),
+            false => delay,
+        }
+    }
+
+    /// Whether a failed attempt is worth retrying.
+    ///
+    /// Network errors, the listed HTTP statuses, checksum mismatches and corrupt gzip data are retried. Local errors,
+    /// such as a full disk or an invalid URL, are not.
+    pub fn should_retry(&self, err: &(dyn Error + Send + Sync + 'static)) -> bool {
+        if let Some(err) = err.downcast_ref::<reqwest::Error>() {
+            return match err.status() {
+                Some(status) => self.retry_statuses.contains(&status.as_u16()),
+                None => !err.is_builder(),
+            };
+        }
+        if err.is::<ChecksumMismatch>() {
+            return true;
+        }
+        if let Some(err) = err.downcast_ref::<io::Error>() {
+            return is_corrupt_data(err);
+        }
+
+        false
+    }
+}
+
+
+/// Whether an I/O error comes from bytes that are not a valid gzip stream, rather than from the filesystem.
+pub fn is_corrupt_data(err: &io::Error) -> bool {
+    // flate2 reports bad gzip headers and checksums as invalid input
+    matches!(err.kind(), io::ErrorKind::InvalidData | io::ErrorKind::InvalidInput | io::ErrorKind::UnexpectedEof)
+}
@@ -0,0 +1,142 @@
+use bytes::{Bytes, BytesMut};
+use reqwest::header::{CONTENT_LENGTH, CONTENT_RANGE, RANGE};
+use reqwest::{Client, StatusCode, Url};
+use std::io::{self, SeekFrom};
+use std::path::PathBuf;
+use tokio::fs::File;
+use tokio::io::{AsyncReadExt, AsyncSeekExt};
+
+use crate::download::BoxError;
+
+
+/// Bytes read at a time from a local file.
+const FILE_CHUNK_SIZE: usize = 256 * 1024;
+
+
+/// Where the bytes of a URL handed to the downloader come from.
+///
+/// Besides HTTP(S) URLs, files can be read from a local mirror of the NCBI tree or from any directory of `.xml.gz`
+/// files, given either as `file://` URLs or as plain paths. They go through the same transfers as remote files: the
+/// same `.part` files, decoders, manifest and limits, so offline runs behave and perform like the real ones.
+pub enum Source {
+    Http(String),
+    File(PathBuf),
+}
+
+impl Source {
+    pub fn parse(url: &str) -> Result<Self, BoxError> {
+        if url.starts_with("file://") {
+            let path = Url::parse(url)?
+                .to_file_path()
+                .map_err(|()| io::Error::new(io::ErrorKind::InvalidInput, format!("not a local file URL: {}", url)))?;
+            return Ok(Source::File(path));
+        }
+
+        Ok(match url.contains("://") {
+            true => Source::Http(url.to_string()),
+            false => Source::File(PathBuf::from(url)),
+        })
+    }
+
+    /// Open the file at `offset`, returning its body and the offset the body actually starts at.
+    ///
+    /// The body starts at zero when the source cannot resume, e.g. a server ignoring the `Range` header. There is no
+    /// body when `offset` is already the end of the file.
+    pub async fn open(&self, client: &Client, offset: u64) -> Result<(Option<Body>, u64), BoxError> {
+        match self {
+            Source::Http(url) => {
+                let mut request = client.get(url);
+                if offset > 0 {
+                    request = request.header(RANGE, format!("bytes={}-", offset));
+                }
+                let response = request.send().await?;
+
+                match response.status() {
+                    StatusCode::PARTIAL_CONTENT => {
+                        if content_range_start(&response) != Some(offset) {
+                            let message = "unexpected Content-Range in response";
+                            return Err(io::Error::new(io::ErrorKind::InvalidData, message).into());
+                        }
+                        Ok((Some(Body::Http(response)), offset))
+                    },
+                    StatusCode::RANGE_NOT_SATISFIABLE if offset > 0 => Ok((None, offset)),
+                    _ => Ok((Some(Body::Http(response.error_for_status()?)), 0)),
+                }
+            },
+            Source::File(path) => {
+                let mut file = File::open(path).await?;
+                let size = file.metadata().await?.len();
+                if offset > 0 && offset == size {
+                    return Ok((None, offset));
+                }
+                // A file shorter than what was already read has changed since, it is read again from the start
+                let start = if offset <= size { offset } else { 0 };
+                file.seek(SeekFrom::Start(start)).await?;
+                Ok((Some(Body::File(file)), start))
+            },
+        }
+    }
+
+    /// Content of the file published next to this one with `suffix` appended to its name, e.g. the `.md5` sidecar.
+    pub async fn read_sidecar(&self, client: &Client, suffix: &str) -> Result<String, BoxError> {
+        match self {
+            Source::Http(url) => {
+                let response = client.get(format!("{}{}", url, suffix)).send().await?.error_for_status()?;
+                Ok(response.text().await?)
+            },
+            Source::File(path) => {
+                let mut name = path.clone().into_os_string();
+                name.push(suffix);
+                Ok(tokio::fs::read_to_string(PathBuf::from(name)).await?)
+            },
+        }
+    }
+
+    /// Size of the file, `None` if it cannot be found out, e.g. because the server does not send a `Content-Length`.
+    pub async fn size(&self, client: &Client) -> Option<u64> {
+        match self {
+            Source::Http(url) => {
+                let response = client.head(url).send().await.ok()?.error_for_status().ok()?;
+                // `Response::content_length` is the size of the body, always empty for a HEAD request
+                response.headers().get(CONTENT_LENGTH)?.to_str().ok()?.parse().ok()
+            },
+            Source::File(path) => Some(tokio::fs::metadata(path).await.ok()?.len()),
+        }
+    }
+}
+
+
+/// The bytes of a file being read from a `Source`.
+pub enum Body {
+    Http(reqwest::Response),
+    File(File),
+}
+
+impl Body {
+    /// The next chunk of the body, `None` once it is over.
+    pub async fn chunk(&mut self) -> Result<Option<Bytes>, BoxError> {
+        match self {
+            Body::Http(response) => Ok(response.chunk().await?),
+            Body::File(file) => {
+                let mut buffer = BytesMut::with_capacity(FILE_CHUNK_SIZE);
+                match file.read_buf(&mut buffer).await? {
+                    0 => Ok(None),
+                    _ => Ok(Some(buffer.freeze())),
+                }
+            },
+        }
+    }
+}
+
+
+/// Name of the file a URL or a path points to, its last segment.
+pub fn file_name(url: &str) -> &str {
+    url.rsplit(['/', std::path::MAIN_SEPARATOR]).next().unwrap_or_default()
+}
+
+
+/// First byte position of a `Content-Range: bytes <start>-<end>/<total>` header.
+fn content_range_start(response: &reqwest::Response) -> Option<u64> {
+    let value = response.headers().get(CONTENT_RANGE)?.to_str().ok()?;
+    value.strip_prefix("bytes ")?.split('-').next()?.parse().ok()
+}
@@ -0,0 +1,515 @@
+use futures::stream::{self, StreamExt};
+use reqwest::Client;
+use std::collections::{HashMap, HashSet};
+use std::error::Error;
+use std::fmt;
+use std::io;
+use std::path::{Path, PathBuf};
+use std::sync::Mutex;
+use std::time::SystemTime;
+use tokio::sync::{Mutex as AsyncMutex, Notify};
+
+use crate::download::{part_path, temp_path};
+use crate::manifest::Manifest;
+use crate::output::OutputFormat;
+use crate::source::{file_name, Source};
+use crate::throttle::Throttle;
+
+
+/// Ratio of the size of a PubMed XML file to its gzip size, on the high side, to estimate the size of inflated files.
+const XML_EXPANSION: u64 = 10;
+
+/// Free space left untouched on the volume of the cache folder.
+const FREE_SPACE_MARGIN: u64 = 256 * 1024 * 1024;
+
+/// HEAD requests sent at a time by the preflight.
+const HEAD_CONCURRENCY: usize = 16;
+
+
+/// The files of a call do not fit in the free space of the cache folder.
+#[derive(Debug)]
+pub struct InsufficientSpace {
+    /// Estimated bytes needed.
+    pub needed: u64,
+    /// Bytes that can be used, free space and evictable files included.
+    pub available: u64,
+}
+
+impl fmt::Display for InsufficientSpace {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        let (needed, available) = (self.needed as f64 / 1e6, self.available as f64 / 1e6);
+        write!(
+            f,
+            "not enough disk space in the cache folder: about {:.0} MB needed, {:.0} MB available",
+            needed, available
+        )
+    }
+}
+
+impl Error for InsufficientSpace {}
+
+
+/// Keeps the downloads of a call within the free space of the cache folder, and optionally its size under a cap.
+///
+/// `preflight` looks up the size of every file still to download, with a HEAD request for remote ones, and refuses the
+/// whole call when their estimated size does not fit on the volume, instead of letting it fail partway through. Each
+/// transfer then reserves its estimated peak size before starting, the `.part` file and the output being on disk
+/// together, and waits for the running transfers to finish while the free space cannot cover it.
+///
+/// With a `max_cache_size`, the least recently used files of the cache folder are evicted before each transfer to keep
+/// the stored files under the cap, along with their manifest entries. The files named by the call are never evicted,
+/// so the cap is exceeded if they do not fit under it on their own.
+#[derive(Default)]
+pub struct DiskSpace {
+    check: bool,
+    max_cache_size: Option<u64>,
+    /// Compressed size of the files of the call, by URL, as found by the preflight.
+    sizes: Mutex<HashMap<String, u64>>,
+    /// Names of the remote files of the call.
+    protected: Mutex<HashSet<String>>,
+    reserved: Mutex<Reserved>,
+    released: Notify,
+    /// Held while a transfer makes room, so two of them do not count the same free space.
+    evicting: AsyncMutex<()>,
+    /// Free space the tests give the volume in place of the real one.
+    #[cfg(test)]
+    free: Mutex<Option<u64>>,
+}
+
+/// Estimated bytes set aside by the running transfers.
+#[derive(Default)]
+struct Reserved {
+    peak: u64,
+    stored: u64,
+    /// The files the running transfers write to, whose bytes are both missing from the free space and reserved.
+    files: Vec<PathBuf>,
+}
+
+impl DiskSpace {
+    /// Check the free space when `check` is set, and evict files to keep the cache folder under `max_cache_size` bytes.
+    pub fn new(check: bool, max_cache_size: Option<u64>) -> Self {
+        Self { check, max_cache_size, ..Self::default() }
+    }
+
+    fn is_enabled(&self) -> bool {
+        self.check || self.max_cache_size.is_some()
+    }
+
+    fn free_space(&self, cache_folder: &Path) -> io::Result<Option<u64>> {
+        #[cfg(test)]
+        if let Some(free) = *self.free.lock().unwrap() {
+            return Ok(Some(free));
+        }
+        free_space(cache_folder)
+    }
+
+    /// Estimate the size of the files of `urls` that are not stored yet, failing if they do not fit in `cache_folder`.
+    ///
+    /// Files whose size cannot be found out, e.g. because the server does not send a `Content-Length`, are left out of
+    /// the estimate.
+    pub async fn preflight(
+        &self,
+        client: &Client,
+        urls: &[String],
+        cache_folder: &Path,
+        manifest: &Manifest,
+        format: OutputFormat,
+        throttle: &Throttle,
+    ) -> io::Result<()> {
+        if !self.is_enabled() {
+            return Ok(());
+        }
+        *self.protected.lock().unwrap() = urls.iter().map(|url| file_name(url).to_string()).collect();
+
+        let mut missing = Vec::new();
+        for url in urls {
+            let output = stored_path(cache_folder, file_name(url), format);
+            if !tokio::fs::try_exists(output).await.unwrap_or(false) {
+                missing.push(url.clone());
+            }
+        }
+        // The URLs are owned by the requests, a closure taking them by reference would make the future not `Send`
+        let sizes: HashMap<String, u64> = stream::iter(missing)
+            .map(|url| async move {
+                let size = head_size(client, &url, throttle).await?;
+                Some((url, size))
+            })
+            .buffer_unordered(HEAD_CONCURRENCY)
+            .filter_map(|size| async move { size })
+            .collect()
+            .await;
+
+        // Every file ends up stored, and the largest one also needs its `.part` file alongside while it is written
+        let footprints = sizes.values().map(|&size| footprint(size, format));
+        let needed = footprints.clone().map(|(stored, _)| stored).sum::<u64>()
+            + footprints.map(|(stored, peak)| peak - stored).max().unwrap_or(0);
+        *self.sizes.lock().unwrap() = sizes;
+
+        if !self.check {
+            return Ok(());
+        }
+        let Some(free) = self.free_space(cache_folder)? else {
+            return Ok(());
+        };
+        let mut available = free.saturating_sub(FREE_SPACE_MARGIN);
+        if self.max_cache_size.is_some() {
+            let (_, evictable) = self.stored_files(cache_folder, manifest).await;
+            available += evictable.iter().map(|file| file.size).sum::<u64>();
+        }
+
+        match needed > available {
+            true => Err(io::Error::new(io::ErrorKind::StorageFull, InsufficientSpace { needed, available })),
+            false => Ok(()),
+        }
+    }
+
+    /// Set aside room for the transfer of `url`, held until the returned reservation is dropped.
+    ///
+    /// Old files are evicted first when there is a cap. If the free space is still short, waits for the running
+    /// transfers to release theirs, and fails when none is left running.
+    pub async fn reserve(
+        &self,
+        url: &str,
+        cache_folder: &Path,
+        manifest: &Manifest,
+        format: OutputFormat,
+    ) -> io::Result<Reservation<'_>> {
+        if !self.is_enabled() {
+            return Ok(Reservation { space: self, peak: 0, stored: 0, files: Vec::new() });
+        }
+        let size = self.sizes.lock().unwrap().get(url).copied().unwrap_or(0);
+        let (stored, peak) = footprint(size, format);
+        let files = transfer_files(cache_folder, file_name(url), format);
+
+        loop {
+            // Created before checking, so a release happening in between is not missed
+            let released = self.released.notified();
+            {
+                let _evicting = self.evicting.lock().await;
+                if let Some(max_cache_size) = self.max_cache_size {
+                    let reserved = self.reserved.lock().unwrap().stored;
+                    self.evict(cache_folder, manifest, max_cache_size.saturating_sub(reserved + stored)).await?;
+                }
+
+                let free = match self.check {
+                    true => self.free_space(cache_folder)?,
+                    false => None,
+                };
+                let mut reserved = self.reserved.lock().unwrap();
+                // What the running transfers already wrote is taken from the free space, and counted again by their
+                // reservations, so it is given back
+                let written = reserved.files.iter().filter_map(|path| std::fs::metadata(path).ok()).map(|m| m.len());
+                let written = written.sum::<u64>().min(reserved.peak);
+                let available = free.map(|free| (free + written).saturating_sub(FREE_SPACE_MARGIN));
+                match available {
+                    Some(available) if reserved.peak + peak > available => {
+                        if reserved.peak == 0 {
+                            let err = InsufficientSpace { needed: peak, available };
+                            return Err(io::Error::new(io::ErrorKind::StorageFull, err));
+                        }
+                    },
+                    _ => {
+                        reserved.peak += peak;
+                        reserved.stored += stored;
+                        reserved.files.extend(files.iter().cloned());
+                        return Ok(Reservation { space: self, peak, stored, files });
+                    },
+                }
+            }
+            released.await;
+        }
+    }
+
+    /// Remove the least recently used files of the cache folder until the stored files take at most `max_size` bytes.
+    async fn evict(&self, cache_folder: &Path, manifest: &Manifest, max_size: u64) -> io::Result<()> {
+        let (mut total, mut evictable) = self.stored_files(cache_folder, manifest).await;
+        evictable.sort_by_key(|file| file.last_used);
+
+        for file in evictable {
+            if total <= max_size {
+                break;
+            }
+            match tokio::fs::remove_file(&file.path).await {
+                Err(err) if err.kind() != io::ErrorKind::NotFound => return Err(err),
+                _ => {},
+            }
+            manifest.remove(&file.name).await?;
+            total -= file.size;
+        }
+        Ok(())
+    }
+
+    /// Total size of the files of the manifest stored in the cache folder, and those that can be evicted.
+    async fn stored_files(&self, cache_folder: &Path, manifest: &Manifest) -> (u64, Vec<StoredFile>) {
+        let protected = self.protected.lock().unwrap().clone();
+        let (mut total, mut evictable) = (0, Vec::new());
+
+        for name in manifest.file_names().await {
+            for format in [OutputFormat::Xml, OutputFormat::Gzip, OutputFormat::Zstd] {
+                let path = stored_path(cache_folder, &name, format);
+                let Ok(metadata) = tokio::fs::metadata(&path).await else {
+                    continue;
+                };
+                total += metadata.len();
+                if !protected.contains(&name) {
+                    // The access time is not updated on every read on most mounts, the latest of both is used
+                    let last_used = [metadata.accessed().ok(), metadata.modified().ok()].into_iter().flatten().max();
+                    evictable.push(StoredFile { name: name.clone(), path, size: metadata.len(), last_used });
+                }
+            }
+        }
+
+        (total, evictable)
+    }
+}
+
+
+/// Room set aside for a running transfer, given back when dropped.
+pub struct Reservation<'a> {
+    space: &'a DiskSpace,
+    peak: u64,
+    stored: u64,
+    files: Vec<PathBuf>,
+}
+
+impl Drop for Reservation<'_> {
+    fn drop(&mut self) {
+        if self.peak == 0 && self.stored == 0 && self.files.is_empty() {
+            return;
+        }
+        let mut reserved = self.space.reserved.lock().unwrap();
+        reserved.peak -= self.peak;
+        reserved.stored -= self.stored;
+        for file in &self.files {
+            if let Some(index) = reserved.files.iter().position(|path| path == file) {
+                reserved.files.swap_remove(index);
+            }
+        }
+        self.space.released.notify_waiters();
+    }
+}
+
+
+/// A file of the manifest stored in the cache folder.
+struct StoredFile {
+    /// Name of the remote file, its key in the manifest.
+    name: String,
+    path: PathBuf,
+    size: u64,
+    last_used: Option<SystemTime>,
+}
+
+
+/// Estimated bytes taken by a file of `size` compressed bytes once stored in `format`, and at most while downloading.
+fn footprint(size: u64, format: OutputFormat) -> (u64, u64) {
+    match format {
+        OutputFormat::Xml => (size * XML_EXPANSION, size + size * XML_EXPANSION),
+        // Recompressing with zstd gives files about the size of the gzip ones
+        OutputFormat::Zstd => (size, 2 * size),
+        OutputFormat::Gzip => (size, size),
+    }
+}
+
+
+/// Path of the remote file `name` once stored in `format` in the cache folder.
+fn stored_path(cache_folder: &Path, name: &str, format: OutputFormat) -> PathBuf {
+    cache_folder.join(format.file_name(name.strip_suffix(".gz").unwrap_or(name)))
+}
+
+
+/// The files written by the transfer of the remote file `name`: its `.part` file, temporary output and output.
+fn transfer_files(cache_folder: &Path, name: &str, format: OutputFormat) -> Vec<PathBuf> {
+    let output_file_name = format.file_name(name.strip_suffix(".gz").unwrap_or(name));
+    vec![part_path(cache_folder, name), temp_path(cache_folder, &output_file_name), cache_folder.join(output_file_name)]
+}
+
+
+/// Size of the file of `url`, from a HEAD request for a remote one, `None` if it cannot be found out.
+async fn head_size(client: &Client, url: &str, throttle: &Throttle) -> Option<u64> {
+    let source = Source::parse(url).ok()?;
+    if let Source::Http(url) = &source {
+        throttle.request(url).await;
+    }
+    source.size(client).await
+}
+
+
+/// Bytes available to unprivileged users on the volume holding `path`, `None` where it cannot be queried.
+#[allow(clippy::unnecessary_cast)]
+fn free_space(path: &Path) -> io::Result<Option<u64>> {
+    #[cfg(unix)]
+    {
+        use std::ffi::CString;
+        use std::os::unix::ffi::OsStrExt;
+
+        let path = CString::new(path.as_os_str().as_bytes())?;
+        let mut stat: libc::statvfs = unsafe { std::mem::zeroed() };
+        if unsafe { libc::statvfs(path.as_ptr(), &mut stat) } != 0 {
+            return Err(io::Error::last_os_error());
+        }
+        // The field types vary across platforms
+        Ok(Some(stat.f_bavail as u64 * stat.f_frsize as u64))
+    }
+    #[cfg(not(unix))]
+    {
+        let _ = path;
+        Ok(None)
+    }
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use futures::FutureExt;
+    use std::fs::{File, FileTimes};
+    use std::time::Duration;
+
+    use crate::manifest::{FileStatus, ManifestEntry};
+
+    async fn folder(name: &str) -> PathBuf {
+        let folder = std::env::temp_dir().join(format!("pmcollection-space-{}-{}", std::process::id(), name));
+        let _ = tokio::fs::remove_dir_all(&folder).await;
+        tokio::fs::create_dir_all(&folder).await.unwrap();
+        folder
+    }
+
+    /// Space checks on a volume with `free` bytes available, the margin aside.
+    fn space(max_cache_size: Option<u64>, free: u64) -> DiskSpace {
+        let space = DiskSpace::new(true, max_cache_size);
+        *space.free.lock().unwrap() = Some(free + FREE_SPACE_MARGIN);
+        space
+    }
+
+    fn insufficient_space(err: &io::Error) -> (u64, u64) {
+        assert_eq!(err.kind(), io::ErrorKind::StorageFull);
+        let err = err.get_ref().unwrap().downcast_ref::<InsufficientSpace>().unwrap();
+        (err.needed, err.available)
+    }
+
+    #[test]
+    fn estimates_the_size_of_each_format() {
+        assert_eq!(footprint(100, OutputFormat::Xml), (100 * XML_EXPANSION, 100 + 100 * XML_EXPANSION));
+        assert_eq!(footprint(100, OutputFormat::Zstd), (100, 200));
+        assert_eq!(footprint(100, OutputFormat::Gzip), (100, 100));
+    }
+
+    #[tokio::test]
+    async fn refuses_calls_whose_files_do_not_fit() {
+        let cache_folder = folder("preflight").await;
+        let manifest = Manifest::load(&cache_folder).await.unwrap();
+        let mut urls = Vec::new();
+        for (name, size) in [("a.xml.gz", 100), ("b.xml.gz", 300), ("c.xml.gz", 1000)] {
+            let path = cache_folder.join("remote").join(name);
+            tokio::fs::create_dir_all(path.parent().unwrap()).await.unwrap();
+            tokio::fs::write(&path, vec![0; size]).await.unwrap();
+            urls.push(path.to_str().unwrap().to_string());
+        }
+        // Stored already, so left out of the estimate
+        tokio::fs::write(cache_folder.join("c.xml"), "<xml/>").await.unwrap();
+
+        let preflight = |space: DiskSpace| {
+            let (urls, cache_folder, manifest) = (&urls, &cache_folder, &manifest);
+            async move {
+                let (client, throttle) = (Client::new(), Throttle::new(None, None));
+                space.preflight(&client, urls, cache_folder, manifest, OutputFormat::Xml, &throttle).await?;
+                Ok::<_, io::Error>(space)
+            }
+        };
+        // Both files stored, and the largest one next to its `.part` file
+        let needed = 400 * XML_EXPANSION + 300;
+
+        let err = preflight(space(None, needed - 1)).await.err().unwrap();
+        assert_eq!(insufficient_space(&err), (needed, needed - 1));
+        let space = preflight(space(None, needed)).await.unwrap();
+        assert_eq!(space.sizes.lock().unwrap().len(), 2);
+
+        tokio::fs::remove_dir_all(&cache_folder).await.unwrap();
+    }
+
+    #[tokio::test]
+    async fn does_not_count_the_bytes_written_by_running_transfers_twice() {
+        let cache_folder = folder("written").await;
+        let manifest = Manifest::load(&cache_folder).await.unwrap();
+        let space = space(None, 1000);
+        space.sizes.lock().unwrap().extend([("a.xml.gz".to_string(), 60), ("b.xml.gz".to_string(), 30)]);
+
+        let first = space.reserve("a.xml.gz", &cache_folder, &manifest, OutputFormat::Xml).await.unwrap();
+        // The first transfer wrote most of its files, the free space of the volume went down as much
+        tokio::fs::write(cache_folder.join("a.xml.gz.part"), vec![0; 60]).await.unwrap();
+        tokio::fs::write(cache_folder.join("a.xml.tmp"), vec![0; 540]).await.unwrap();
+        *space.free.lock().unwrap() = Some(400 + FREE_SPACE_MARGIN);
+
+        // 660 + 330 bytes reserved out of 1000, the second transfer starts right away
+        let second = space.reserve("b.xml.gz", &cache_folder, &manifest, OutputFormat::Xml).now_or_never();
+        assert!(matches!(second, Some(Ok(_))));
+
+        drop((first, second));
+        assert!(space.reserved.lock().unwrap().files.is_empty());
+        tokio::fs::remove_dir_all(&cache_folder).await.unwrap();
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn waits_for_running_transfers_to_release_their_space() {
+        let cache_folder = folder("wait").await;
+        let manifest = Manifest::load(&cache_folder).await.unwrap();
+        let space = space(None, 1000);
+        space.sizes.lock().unwrap().extend([("a.xml.gz".to_string(), 60), ("b.xml.gz".to_string(), 50)]);
+
+        let first = space.reserve("a.xml.gz", &cache_folder, &manifest, OutputFormat::Xml).await.unwrap();
+        let second = space.reserve("b.xml.gz", &cache_folder, &manifest, OutputFormat::Xml);
+        tokio::pin!(second);
+        assert!(tokio::time::timeout(Duration::from_secs(60), &mut second).await.is_err());
+
+        drop(first);
+        let second = tokio::time::timeout(Duration::from_secs(1), second).await.unwrap().unwrap();
+        assert_eq!((second.peak, second.stored), (550, 500));
+
+        // Nothing left running to wait for, a transfer that cannot fit fails
+        drop(second);
+        space.sizes.lock().unwrap().insert("c.xml.gz".to_string(), 100);
+        let err = space.reserve("c.xml.gz", &cache_folder, &manifest, OutputFormat::Xml).await.err().unwrap();
+        assert_eq!(insufficient_space(&err), (1100, 1000));
+
+        tokio::fs::remove_dir_all(&cache_folder).await.unwrap();
+    }
+
+    #[tokio::test]
+    async fn evicts_the_least_recently_used_files_of_other_calls() {
+        let cache_folder = folder("evict").await;
+        let manifest = Manifest::load(&cache_folder).await.unwrap();
+        let space = DiskSpace::new(false, Some(0));
+        // From the oldest to the most recently used
+        for (age, name) in [(3, "c.xml.gz"), (2, "a.xml.gz"), (1, "b.xml.gz")] {
+            let path = stored_path(&cache_folder, name, OutputFormat::Xml);
+            tokio::fs::write(&path, vec![0; 100]).await.unwrap();
+            let time = SystemTime::now() - Duration::from_secs(3600 * age);
+            let times = FileTimes::new().set_accessed(time).set_modified(time);
+            File::options().write(true).open(&path).unwrap().set_times(times).unwrap();
+            let entry = ManifestEntry {
+                size: 10,
+                decompressed_size: 100,
+                stored_size: Some(100),
+                md5: None,
+                mtime: None,
+                status: FileStatus::Downloaded,
+            };
+            manifest.record(name, entry).await.unwrap();
+        }
+        space.protected.lock().unwrap().insert("c.xml.gz".to_string());
+
+        space.evict(&cache_folder, &manifest, 200).await.unwrap();
+        assert!(!cache_folder.join("a.xml").exists());
+        assert!(manifest.get("a.xml.gz").await.is_none());
+        assert!(cache_folder.join("b.xml").exists() && cache_folder.join("c.xml").exists());
+
+        // The files of the call stay, even over the cap
+        space.evict(&cache_folder, &manifest, 0).await.unwrap();
+        assert!(!cache_folder.join("b.xml").exists());
+        assert!(cache_folder.join("c.xml").exists());
+        assert_eq!(manifest.file_names().await, ["c.xml.gz"]);
+        assert_eq!(space.stored_files(&cache_folder, &manifest).await.0, 100);
+
+        tokio::fs::remove_dir_all(&cache_folder).await.unwrap();
+    }
+}
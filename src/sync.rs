@@ -0,0 +1,284 @@
+use futures::future::join_all;
+use reqwest::{Client, Url};
+use std::io;
+use std::path::Path;
+use std::sync::Arc;
+use std::time::{SystemTime, UNIX_EPOCH};
+use tokio::runtime::Handle;
+
+use crate::blocking::BlockingPool;
+use crate::concurrency::ConcurrencyLimiter;
+use crate::download::{open_cache, part_path, spawn_downloads, BoxError, FetchOptions, FetchReport, FetchStatus};
+use crate::manifest::{FileStatus, Manifest};
+use crate::output::OutputFormat;
+use crate::source::Source;
+
+
+/// A file found in a remote directory listing.
+#[derive(Clone, Debug)]
+pub struct RemoteFile {
+    pub name: String,
+    pub url: String,
+    /// Modification time shown next to the file, e.g. `2024-01-02 14:05`.
+    pub mtime: Option<String>,
+}
+
+
+/// List the files of a remote or local directory whose name ends with `suffix`.
+///
+/// The listing of a remote directory is the HTML index served for it, as on `ftp.ncbi.nlm.nih.gov`: one link per file,
+/// optionally followed by the modification date and time and the size of the file. A local directory, given as a
+/// `file://` URL or a plain path, is read directly, its files being listed as `file://` URLs.
+pub async fn list_directory(client: &Client, url: &str, suffix: &str) -> Result<Vec<RemoteFile>, BoxError> {
+    if let Source::File(directory) = Source::parse(url)? {
+        return list_local_directory(&directory, suffix).await;
+    }
+
+    let base = Url::parse(&directory_url(url))?;
+    let body = client.get(base.clone()).send().await?.error_for_status()?.text().await?;
+
+    let mut files = Vec::new();
+    for (href, after_link) in links(&body) {
+        let Ok(file_url) = base.join(href) else {
+            continue;
+        };
+        let Some(name) = file_url.path_segments().and_then(|mut segments| segments.next_back()) else {
+            continue;
+        };
+        if !name.ends_with(suffix) || files.iter().any(|file: &RemoteFile| file.name == name) {
+            continue;
+        }
+
+        files.push(RemoteFile { name: name.to_string(), url: file_url.to_string(), mtime: listed_mtime(after_link) });
+    }
+
+    Ok(files)
+}
+
+
+/// The files of a local directory whose name ends with `suffix`, sorted by name like a remote listing.
+async fn list_local_directory(directory: &Path, suffix: &str) -> Result<Vec<RemoteFile>, BoxError> {
+    let directory = tokio::fs::canonicalize(directory).await?;
+    let mut entries = tokio::fs::read_dir(&directory).await?;
+
+    let mut files = Vec::new();
+    while let Some(entry) = entries.next_entry().await? {
+        let Some(name) = entry.file_name().to_str().filter(|name| name.ends_with(suffix)).map(str::to_string) else {
+            continue;
+        };
+        // Mirrors are often made of symbolic links, they are followed
+        let metadata = tokio::fs::metadata(entry.path()).await?;
+        if !metadata.is_file() {
+            continue;
+        }
+        let url = Url::from_file_path(entry.path())
+            .map_err(|()| io::Error::new(io::ErrorKind::InvalidInput, "cannot make a file URL"))?;
+
+        files.push(RemoteFile { name, url: url.to_string(), mtime: metadata.modified().ok().and_then(format_mtime) });
+    }
+    files.sort_by(|a, b| a.name.cmp(&b.name));
+
+    Ok(files)
+}
+
+
+/// The files of `files` that are not already downloaded in `format`, according to the manifest, or that changed since.
+///
+/// The stored files of the files that changed are removed, along with their `.part` file, so they are downloaded again
+/// from scratch instead of being skipped as complete.
+pub async fn pending_files(
+    files: Vec<RemoteFile>,
+    cache_folder: &Path,
+    manifest: &Manifest,
+    format: OutputFormat,
+) -> io::Result<Vec<RemoteFile>> {
+    let mut pending = Vec::new();
+
+    for file in files {
+        let output = cache_folder.join(format.file_name(file.name.trim_end_matches(".gz")));
+        let up_to_date = match manifest.get(&file.name).await {
+            Some(entry) if entry.mtime.is_some() && file.mtime.is_some() && entry.mtime != file.mtime => {
+                for path in [&output, &part_path(cache_folder, &file.name)] {
+                    match tokio::fs::remove_file(path).await {
+                        Err(err) if err.kind() != io::ErrorKind::NotFound => return Err(err),
+                        _ => {},
+                    }
+                }
+                false
+            },
+            Some(entry) => {
+                matches!(entry.status, FileStatus::Downloaded | FileStatus::Verified)
+                    && (file.mtime.is_none() || entry.mtime == file.mtime)
+                    && tokio::fs::try_exists(&output).await.unwrap_or(false)
+            },
+            None => false,
+        };
+        if !up_to_date {
+            pending.push(file);
+        }
+    }
+
+    Ok(pending)
+}
+
+
+/// Bring `cache_folder` up to date with a remote directory, downloading only the files that are new or changed.
+///
+/// The remote modification time of each downloaded file is stored in the manifest, after the file itself is recorded.
+/// Interrupted runs leave either `.part` files, which are resumed, or files without a modification time, which are
+/// checked again, so running the sync again after a crash is always safe.
+#[allow(clippy::too_many_arguments)]
+pub async fn sync_directory(
+    runtime: &Handle,
+    client: &Client,
+    pool: &Arc<BlockingPool>,
+    url: &str,
+    cache_folder: &Path,
+    suffix: &str,
+    limiter: Arc<ConcurrencyLimiter>,
+    options: FetchOptions,
+) -> Result<Vec<FetchReport>, BoxError> {
+    let manifest = open_cache(cache_folder).await?;
+    options.throttle.request(url).await;
+    let files = list_directory(client, url, suffix).await?;
+    let pending = pending_files(files, cache_folder, &manifest, options.format).await?;
+
+    let urls: Vec<String> = pending.iter().map(|file| file.url.clone()).collect();
+    options.space.preflight(client, &urls, cache_folder, &manifest, options.format, &options.throttle).await?;
+    let options = FetchOptions { resume: true, ..options };
+    let tasks = spawn_downloads(runtime, client, pool, urls, cache_folder, Arc::clone(&manifest), limiter, options);
+    let reports = join_all(tasks).await;
+
+    for (file, report) in pending.iter().zip(&reports) {
+        // Skipped files were downloaded by a run interrupted before it could record their modification time
+        if matches!(report.status, FetchStatus::Downloaded | FetchStatus::Skipped) {
+            manifest.update(&file.name, |entry| entry.mtime = file.mtime.clone()).await?;
+        }
+    }
+
+    Ok(reports)
+}
+
+
+/// `url` with a trailing slash, so relative links resolve inside the directory.
+fn directory_url(url: &str) -> String {
+    match url.ends_with('/') {
+        true => url.to_string(),
+        false => format!("{}/", url),
+    }
+}
+
+
+/// The `href` values of the links of an HTML page, each with the text that follows its closing `</a>` on the same line.
+fn links(body: &str) -> impl Iterator<Item = (&str, &str)> {
+    body.split("href=\"").skip(1).filter_map(|part| {
+        let (href, rest) = part.split_once('"')?;
+        if href.starts_with('?') || href.starts_with('#') || href.ends_with('/') {
+            return None;
+        }
+        let after_link = rest.split_once("</a>").map(|(_, after)| after).unwrap_or_default();
+        Some((href, after_link.lines().next().unwrap_or_default()))
+    })
+}
+
+
+/// The `YYYY-MM-DD HH:MM` date printed after a link in a directory listing, if any.
+fn listed_mtime(after_link: &str) -> Option<String> {
+    let mut tokens = after_link.split_whitespace();
+    let date = tokens.next()?;
+    let time = tokens.next()?;
+
+    let is_date = date.len() == 10 && date.chars().all(|c| c.is_ascii_digit() || c == '-');
+    let is_time = time.contains(':') && time.chars().all(|c| c.is_ascii_digit() || c == ':');
+    (is_date && is_time).then(|| format!("{} {}", date, time))
+}
+
+
+/// `time` in the format of the dates of remote listings, `YYYY-MM-DD HH:MM`, in UTC.
+fn format_mtime(time: SystemTime) -> Option<String> {
+    let seconds = time.duration_since(UNIX_EPOCH).ok()?.as_secs();
+    let (days, minutes) = (seconds / 86400, seconds % 86400 / 60);
+
+    // Civil date of a number of days since 1970-01-01, from Howard Hinnant's `civil_from_days`
+    let days = days + 719468;
+    let era = days / 146097;
+    let day_of_era = days % 146097;
+    let year_of_era = (day_of_era - day_of_era / 1460 + day_of_era / 36524 - day_of_era / 146096) / 365;
+    let day_of_year = day_of_era - (365 * year_of_era + year_of_era / 4 - year_of_era / 100);
+    let month_index = (5 * day_of_year + 2) / 153;
+    let day = day_of_year - (153 * month_index + 2) / 5 + 1;
+    let month = if month_index < 10 { month_index + 3 } else { month_index - 9 };
+    let year = era * 400 + year_of_era + u64::from(month <= 2);
+
+    Some(format!("{:04}-{:02}-{:02} {:02}:{:02}", year, month, day, minutes / 60, minutes % 60))
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::time::Duration;
+
+    use crate::manifest::ManifestEntry;
+
+    #[test]
+    fn reads_links_and_their_dates() {
+        let body = "<a href=\"?C=N;O=D\">Name</a>\n<a href=\"/pubmed/\">Parent Directory</a>       -\n\
+            <a href=\"pubmed24n0001.xml.gz\">pubmed24n0001.xml.gz</a>   2023-12-14 14:05   19M  \n\
+            <a href=\"pubmed24n0001.xml.gz.md5\">pubmed24n0001.xml.gz.md5</a>\n";
+
+        let links: Vec<_> = links(body).collect();
+        assert_eq!(links, [("pubmed24n0001.xml.gz", "   2023-12-14 14:05   19M  "), ("pubmed24n0001.xml.gz.md5", "")]);
+        assert_eq!(listed_mtime(links[0].1).as_deref(), Some("2023-12-14 14:05"));
+        assert_eq!(listed_mtime(links[1].1), None);
+        assert_eq!(listed_mtime("   19M  2023-12-14"), None);
+    }
+
+    #[test]
+    fn formats_times_like_listings() {
+        let format = |seconds| format_mtime(UNIX_EPOCH + Duration::from_secs(seconds));
+        assert_eq!(format(0).as_deref(), Some("1970-01-01 00:00"));
+        assert_eq!(format(951834180).as_deref(), Some("2000-02-29 14:23"));
+        assert_eq!(format(1735689599).as_deref(), Some("2024-12-31 23:59"));
+        assert_eq!(format_mtime(UNIX_EPOCH - Duration::from_secs(60)), None);
+    }
+
+    #[tokio::test]
+    async fn downloads_again_the_files_that_changed() {
+        let cache_folder = std::env::temp_dir().join(format!("pmcollection-sync-{}", std::process::id()));
+        tokio::fs::create_dir_all(&cache_folder).await.unwrap();
+        let manifest = Manifest::load(&cache_folder).await.unwrap();
+        for name in ["a.xml.gz", "b.xml.gz"] {
+            tokio::fs::write(cache_folder.join(name.trim_end_matches(".gz")), "<xml/>").await.unwrap();
+            let entry = ManifestEntry {
+                size: 1,
+                decompressed_size: 6,
+                stored_size: None,
+                md5: None,
+                mtime: Some("2024-01-01 00:00".to_string()),
+                status: FileStatus::Downloaded,
+            };
+            manifest.record(name, entry).await.unwrap();
+        }
+
+        let file = |name: &str, mtime: &str| RemoteFile {
+            name: name.to_string(),
+            url: format!("https://example.org/{}", name),
+            mtime: Some(mtime.to_string()),
+        };
+        let files = vec![
+            file("a.xml.gz", "2024-01-01 00:00"),
+            file("b.xml.gz", "2024-02-01 00:00"),
+            file("c.xml.gz", "2024-01-01 00:00"),
+        ];
+        let pending = pending_files(files, &cache_folder, &manifest, OutputFormat::Xml).await.unwrap();
+
+        let names: Vec<_> = pending.iter().map(|file| file.name.as_str()).collect();
+        assert_eq!(names, ["b.xml.gz", "c.xml.gz"]);
+        // The stale file is removed, so the download does not skip it as complete
+        assert!(cache_folder.join("a.xml").exists());
+        assert!(!cache_folder.join("b.xml").exists());
+
+        tokio::fs::remove_dir_all(&cache_folder).await.unwrap();
+    }
+}
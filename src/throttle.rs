@@ -0,0 +1,158 @@
+use reqwest::Url;
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex};
+use std::time::Duration;
+use tokio::time::Instant;
+
+
+/// Tokens a bucket holds at most, in seconds of its rate.
+const BANDWIDTH_BURST: f64 = 1.0;
+
+
+/// A token bucket refilled at a constant rate, shared by concurrent tasks.
+///
+/// Takers never wait for each other: a take that the bucket cannot cover leaves it in debt and sleeps for as long as
+/// the refill needs to pay the debt back, so each taker waits behind the tokens taken before it.
+pub struct TokenBucket {
+    /// Tokens added per second.
+    rate: f64,
+    capacity: f64,
+    state: Mutex<BucketState>,
+}
+
+struct BucketState {
+    /// Negative while in debt.
+    tokens: f64,
+    updated: Instant,
+}
+
+impl TokenBucket {
+    /// A full bucket of `capacity` tokens refilled with `rate` tokens per second.
+    pub fn new(rate: f64, capacity: f64) -> Self {
+        Self { rate, capacity, state: Mutex::new(BucketState { tokens: capacity, updated: Instant::now() }) }
+    }
+
+    /// Take `amount` tokens, waiting until the bucket has refilled enough to cover them.
+    pub async fn take(&self, amount: f64) {
+        let wait = {
+            let mut state = self.state.lock().unwrap();
+            let now = Instant::now();
+            let refill = now.duration_since(state.updated).as_secs_f64() * self.rate;
+            state.tokens = (state.tokens + refill).min(self.capacity) - amount;
+            state.updated = now;
+
+            match state.tokens < 0.0 {
+                true => Duration::from_secs_f64(-state.tokens / self.rate),
+                false => Duration::ZERO,
+            }
+        };
+
+        if !wait.is_zero() {
+            tokio::time::sleep(wait).await;
+        }
+    }
+}
+
+
+/// Bandwidth and request rate limits shared by all the transfers of one call.
+#[derive(Default)]
+pub struct Throttle {
+    bandwidth: Option<TokenBucket>,
+    requests_per_host: Option<f64>,
+    hosts: Mutex<HashMap<String, Arc<TokenBucket>>>,
+}
+
+impl Throttle {
+    /// Limit the transfers to `bandwidth` bytes per second in total and to `requests_per_host` requests per second to
+    /// each host, `None` meaning no limit.
+    pub fn new(bandwidth: Option<f64>, requests_per_host: Option<f64>) -> Self {
+        Self {
+            bandwidth: bandwidth.map(|rate| TokenBucket::new(rate, rate * BANDWIDTH_BURST)),
+            requests_per_host,
+            hosts: Mutex::new(HashMap::new()),
+        }
+    }
+
+    /// Wait until a request can be sent to the host of `url`.
+    pub async fn request(&self, url: &str) {
+        let Some(rate) = self.requests_per_host else {
+            return;
+        };
+        let host = Url::parse(url).ok().and_then(|url| url.host_str().map(str::to_string)).unwrap_or_default();
+        // No burst, the requests to a host are evenly spaced
+        let bucket = Arc::clone(
+            self.hosts.lock().unwrap().entry(host).or_insert_with(|| Arc::new(TokenBucket::new(rate, 1.0))),
+        );
+
+        bucket.take(1.0).await;
+    }
+
+    /// Account for `bytes` received, waiting if they go over the bandwidth limit.
+    pub async fn receive(&self, bytes: usize) {
+        if let Some(bucket) = &self.bandwidth {
+            bucket.take(bytes as f64).await;
+        }
+    }
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use futures::future::join_all;
+
+    /// Seconds elapsed on the paused clock of the test runtime, which jumps ahead whenever every task is sleeping.
+    fn elapsed(start: Instant) -> f64 {
+        start.elapsed().as_secs_f64()
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn waits_for_the_refill_once_empty() {
+        let bucket = TokenBucket::new(1000.0, 1000.0);
+        let start = Instant::now();
+
+        bucket.take(1000.0).await;
+        assert_eq!(elapsed(start), 0.0);
+        bucket.take(500.0).await;
+        assert!((0.49..=0.5).contains(&elapsed(start)), "waited {}s", elapsed(start));
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn holds_at_most_its_capacity() {
+        let bucket = TokenBucket::new(1000.0, 1000.0);
+        tokio::time::advance(Duration::from_secs(10)).await;
+        let start = Instant::now();
+
+        bucket.take(2000.0).await;
+        assert!((0.99..=1.0).contains(&elapsed(start)), "waited {}s", elapsed(start));
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn takers_queue_behind_the_debt() {
+        let bucket = TokenBucket::new(100.0, 100.0);
+        let start = Instant::now();
+        bucket.take(100.0).await;
+
+        let takes = (0..3).map(|_| async {
+            bucket.take(100.0).await;
+            elapsed(start)
+        });
+        let done = join_all(takes).await;
+
+        for (waited, expected) in done.into_iter().zip([1.0, 2.0, 3.0]) {
+            assert!((expected - 0.01..=expected).contains(&waited), "waited {}s instead of {}s", waited, expected);
+        }
+    }
+
+    #[tokio::test(start_paused = true)]
+    async fn spaces_the_requests_to_each_host() {
+        let throttle = Throttle::new(None, Some(2.0));
+        let start = Instant::now();
+
+        for url in ["https://a.org/1", "https://b.org/1", "https://a.org/2", "https://a.org/3"] {
+            throttle.request(url).await;
+        }
+        // The first request to each host goes through, the next ones to a.org come every half second
+        assert!((0.99..=1.0).contains(&elapsed(start)), "waited {}s", elapsed(start));
+    }
+}
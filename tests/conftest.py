@@ -0,0 +1,92 @@
+"""Fixtures shared by the tests: a local HTTP server and a sample PubMed file."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+
+DATA_FOLDER = Path(__file__).parent / "data"
+
+
+class FileServer(ThreadingHTTPServer):
+    """HTTP server of in-memory files, recording the requests it receives.
+
+    Attributes:
+        files (dict[str, bytes]): The content of the files served, by path.
+        ignore_range (bool): Whether to answer `Range` requests with the whole file, as some servers do.
+        truncate (int): The number of bytes left out at the end of each body, whose full length is still announced.
+        requests (list[tuple[str, str, str | None]]): The method, path and `Range` header of the requests received.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), RangeRequestHandler)
+        self.files: dict[str, bytes] = {}
+        self.ignore_range = False
+        self.truncate = 0
+        self.requests: list[tuple[str, str, str | None]] = []
+
+    def url(self, path: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}{path}"
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves the files of a `FileServer`, answering `Range: bytes=<start>-` requests with partial content."""
+
+    server: FileServer
+
+    def do_HEAD(self) -> None:
+        self.respond(send_body=False)
+
+    def do_GET(self) -> None:
+        self.respond(send_body=True)
+
+    def respond(self, send_body: bool) -> None:
+        range_header = self.headers.get("Range")
+        self.server.requests.append((self.command, self.path, range_header))
+        content = self.server.files.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+
+        start = 0
+        if range_header is not None and not self.server.ignore_range:
+            start = int(range_header.removeprefix("bytes=").split("-")[0])
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        else:
+            self.send_response(200)
+
+        body = content[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body[: max(len(body) - self.server.truncate, 0)])
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def http_server() -> Iterator[FileServer]:
+    server = FileServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture(scope="session")
+def sample_xml() -> bytes:
+    return (DATA_FOLDER / "pubmed_sample.xml").read_bytes()
@@ -0,0 +1,160 @@
+"""Tests of the downloader against a local HTTP server, in particular resuming transfers from their `.part` file."""
+
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from pmcollection import RetryPolicy, download_files_sync
+from tests.conftest import FileServer
+
+
+FILE_NAME = "pubmed24n0001.xml.gz"
+
+
+@pytest.fixture
+def compressed(http_server: FileServer, sample_xml: bytes) -> bytes:
+    content = gzip.compress(sample_xml)
+    http_server.files[f"/{FILE_NAME}"] = content
+    return content
+
+
+@pytest.fixture
+def url(http_server: FileServer, compressed: bytes) -> str:
+    return http_server.url(f"/{FILE_NAME}")
+
+
+def get_requests(server: FileServer) -> list[str | None]:
+    """The `Range` headers of the `GET` requests received by the server."""
+    return [range_header for method, _, range_header in server.requests if method == "GET"]
+
+
+def test_download(url: str, compressed: bytes, sample_xml: bytes, tmp_path: Path) -> None:
+    [result] = download_files_sync([url], str(tmp_path), 1)
+
+    assert result.ok
+    assert result.status == "downloaded"
+    assert result.bytes_transferred == len(compressed)
+    assert result.decompressed_size == len(sample_xml)
+    assert result.path == str(tmp_path / "pubmed24n0001.xml")
+    assert Path(result.path).read_bytes() == sample_xml
+    assert not (tmp_path / f"{FILE_NAME}.part").exists()
+    assert (tmp_path / "manifest.json").exists()
+
+
+def test_skip_complete_file(http_server: FileServer, url: str, sample_xml: bytes, tmp_path: Path) -> None:
+    download_files_sync([url], str(tmp_path), 1)
+    http_server.requests.clear()
+
+    [result] = download_files_sync([url], str(tmp_path), 1)
+
+    assert result.status == "skipped"
+    assert result.decompressed_size == len(sample_xml)
+    assert get_requests(http_server) == []
+
+
+def test_download_again_without_resume(http_server: FileServer, url: str, compressed: bytes, tmp_path: Path) -> None:
+    download_files_sync([url], str(tmp_path), 1)
+
+    [result] = download_files_sync([url], str(tmp_path), 1, resume=False)
+
+    assert result.status == "downloaded"
+    assert result.bytes_transferred == len(compressed)
+
+
+def test_resume_from_part_file(
+    http_server: FileServer, url: str, compressed: bytes, sample_xml: bytes, tmp_path: Path
+) -> None:
+    offset = len(compressed) // 2
+    (tmp_path / f"{FILE_NAME}.part").write_bytes(compressed[:offset])
+
+    [result] = download_files_sync([url], str(tmp_path), 1)
+
+    assert result.status == "downloaded"
+    assert get_requests(http_server) == [f"bytes={offset}-"]
+    assert result.bytes_transferred == len(compressed) - offset
+    assert Path(result.path).read_bytes() == sample_xml
+    assert not (tmp_path / f"{FILE_NAME}.part").exists()
+
+
+def test_part_file_holding_whole_body(
+    http_server: FileServer, url: str, compressed: bytes, sample_xml: bytes, tmp_path: Path
+) -> None:
+    (tmp_path / f"{FILE_NAME}.part").write_bytes(compressed)
+
+    # The server answers 416 Range Not Satisfiable, the file is rebuilt from the `.part` file alone
+    [result] = download_files_sync([url], str(tmp_path), 1)
+
+    assert result.status == "downloaded"
+    assert get_requests(http_server) == [f"bytes={len(compressed)}-"]
+    assert result.bytes_transferred == 0
+    assert Path(result.path).read_bytes() == sample_xml
+
+
+def test_server_ignoring_range(
+    http_server: FileServer, url: str, compressed: bytes, sample_xml: bytes, tmp_path: Path
+) -> None:
+    http_server.ignore_range = True
+    (tmp_path / f"{FILE_NAME}.part").write_bytes(compressed[: len(compressed) // 2])
+
+    [result] = download_files_sync([url], str(tmp_path), 1)
+
+    assert result.status == "downloaded"
+    assert result.bytes_transferred == len(compressed)
+    assert Path(result.path).read_bytes() == sample_xml
+
+
+def test_truncated_body_is_rejected(http_server: FileServer, url: str, sample_xml: bytes, tmp_path: Path) -> None:
+    http_server.truncate = 100
+
+    [result] = download_files_sync([url], str(tmp_path), 1, retry=RetryPolicy(max_attempts=2, base_delay=0.0))
+
+    assert result.status == "failed"
+    assert result.error is not None
+    assert result.retries == 1
+    assert not (tmp_path / "pubmed24n0001.xml").exists()
+
+    http_server.truncate = 0
+    [result] = download_files_sync([url], str(tmp_path), 1)
+
+    assert result.status == "downloaded"
+    assert Path(result.path).read_bytes() == sample_xml
+
+
+def test_truncated_gzip_is_rejected(http_server: FileServer, compressed: bytes, tmp_path: Path) -> None:
+    http_server.files[f"/{FILE_NAME}"] = compressed[:-20]
+
+    [result] = download_files_sync(
+        [http_server.url(f"/{FILE_NAME}")], str(tmp_path), 1, retry=RetryPolicy(max_attempts=1)
+    )
+
+    assert result.status == "failed"
+    assert not (tmp_path / "pubmed24n0001.xml").exists()
+    # Bytes that cannot be inflated are not kept to resume from
+    assert not (tmp_path / f"{FILE_NAME}.part").exists()
+
+
+def test_max_cache_size_evicts_least_recently_used_files(
+    http_server: FileServer, compressed: bytes, sample_xml: bytes, tmp_path: Path
+) -> None:
+    names = ["pubmed24n0001", "pubmed24n0002", "pubmed24n0003"]
+    for name in names:
+        http_server.files[f"/{name}.xml.gz"] = compressed
+    download_files_sync([http_server.url(f"/{name}.xml.gz") for name in names[:2]], str(tmp_path), 1)
+    for age, name in [(2, names[0]), (1, names[1])]:
+        used = time.time() - 3600 * age
+        os.utime(tmp_path / f"{name}.xml", (used, used))
+
+    # Room for one stored file next to the new one, whose size is estimated as ten times the compressed size
+    max_cache_size = len(sample_xml) + 10 * len(compressed)
+    [result] = download_files_sync(
+        [http_server.url(f"/{names[2]}.xml.gz")], str(tmp_path), 1, max_cache_size=max_cache_size
+    )
+
+    assert result.status == "downloaded"
+    assert sorted(path.name for path in tmp_path.glob("*.xml")) == ["pubmed24n0002.xml", "pubmed24n0003.xml"]
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert sorted(manifest["files"]) == ["pubmed24n0002.xml.gz", "pubmed24n0003.xml.gz"]
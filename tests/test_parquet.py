@@ -0,0 +1,36 @@
+"""Tests of the Parquet export of PubMed files."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from pmcollection import parse_bytes
+
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from pmcollection.parquet import write_parquet  # noqa: E402
+
+
+def test_write_parquet(sample_xml: bytes, tmp_path: Path) -> None:
+    (tmp_path / "pubmed24n0001.xml").write_bytes(sample_xml)
+
+    count = write_parquet([tmp_path / "pubmed24n0001.xml"], tmp_path / "items.parquet", row_group_size=2)
+
+    table = pq.read_table(tmp_path / "items.parquet")
+    assert count == table.num_rows == len(parse_bytes(sample_xml))
+    assert table.to_pylist() == parse_bytes(sample_xml)
+
+
+def test_write_parquet_with_missing_required_fields(sample_xml: bytes, tmp_path: Path) -> None:
+    # The native parser gives `None` for the empty titles, that `PubmedItem` would reject
+    path = tmp_path / "pubmed24n0001.xml"
+    path.write_bytes(re.sub(rb"<ArticleTitle>.*?</ArticleTitle>", b"<ArticleTitle/>", sample_xml))
+
+    count = write_parquet([path], tmp_path / "items.parquet")
+
+    items = pq.read_table(tmp_path / "items.parquet").to_pylist()
+    assert count == len(items) == len(parse_bytes(sample_xml))
+    assert [item["citation"]["article"]["title"] for item in items] == [None] * count
@@ -0,0 +1,43 @@
+"""Tests of the process pool writing JSON Lines shards of PubMed files."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from pmcollection.pipeline import iter_pubmed_items, parse_files
+from pmcollection.schemas import PubmedItem
+
+
+def test_parse_files(sample_xml: bytes, tmp_path: Path) -> None:
+    (tmp_path / "pubmed24n0001.xml").write_bytes(sample_xml)
+    (tmp_path / "pubmed24n0002.xml.gz").write_bytes(gzip.compress(sample_xml))
+    paths = [tmp_path / "pubmed24n0001.xml", tmp_path / "pubmed24n0002.xml.gz"]
+
+    shards = list(parse_files(paths, tmp_path / "shards", workers=2))
+
+    assert shards == [tmp_path / "shards" / "pubmed24n0001.jsonl", tmp_path / "shards" / "pubmed24n0002.jsonl"]
+    expected = list(iter_pubmed_items(paths[0]))
+    for shard in shards:
+        lines = shard.read_text(encoding="utf-8").splitlines()
+        assert [PubmedItem.model_validate_json(line) for line in lines] == expected
+
+
+def test_parse_files_rejects_files_sharing_a_shard(tmp_path: Path) -> None:
+    paths = [tmp_path / "a" / "pubmed24n0001.xml.gz", tmp_path / "b" / "pubmed24n0001.xml"]
+
+    with pytest.raises(ValueError, match="pubmed24n0001.jsonl"):
+        parse_files(paths, tmp_path / "shards")
+    assert not (tmp_path / "shards").exists()
+
+
+def test_parse_files_cancels_pending_files_on_error(sample_xml: bytes, tmp_path: Path) -> None:
+    paths = [tmp_path / "missing.xml"]
+    for index in range(20):
+        paths.append(tmp_path / f"pubmed24n{index:04}.xml")
+        paths[-1].write_bytes(sample_xml)
+
+    with pytest.raises(FileNotFoundError):
+        list(parse_files(paths, tmp_path / "shards", workers=1))
+    # Only the files already handed to the worker when the first one failed are parsed
+    assert len(list((tmp_path / "shards").glob("*.jsonl"))) < 5
@@ -0,0 +1,27 @@
+"""Tests of the native record parser against `PubmedItem.from_xml`."""
+
+import gzip
+from pathlib import Path
+
+from pmcollection import iter_records, parse_bytes, parse_file
+from pmcollection.schemas import PubmedItem
+from pmcollection.utils import read_pubmed_file
+
+
+def test_parse_bytes_matches_from_xml(sample_xml: bytes, tmp_path: Path) -> None:
+    path = tmp_path / "pubmed24n0001.xml"
+    path.write_bytes(sample_xml)
+    nodes = read_pubmed_file(path).children
+    records = parse_bytes(sample_xml)
+
+    assert len(records) == len(nodes) > 0
+    for record, node in zip(records, nodes, strict=True):
+        assert PubmedItem.model_validate(record) == PubmedItem.from_xml(node)
+
+
+def test_parse_file_reads_compressed_files(sample_xml: bytes, tmp_path: Path) -> None:
+    path = tmp_path / "pubmed24n0001.xml.gz"
+    path.write_bytes(gzip.compress(sample_xml))
+
+    assert parse_file(str(path)) == parse_bytes(sample_xml)
+    assert list(iter_records(str(path))) == parse_bytes(sample_xml)
@@ -0,0 +1,75 @@
+"""Tests of the models built from the nodes of PubMed XML files."""
+
+import datetime
+
+from rxml import read_string
+
+from pmcollection.schemas import MedlineCitation
+
+
+CITATION = """<MedlineCitation Status="MEDLINE" Owner="NLM">
+  <PMID Version="1">42</PMID>
+  <DateRevised><Year>2019</Year><Month>02</Month><Day>08</Day></DateRevised>
+  <Article PubModel="Print-Electronic">
+    <Journal>
+      <JournalIssue CitedMedium="Internet">
+        <Volume>12</Volume>
+        <PubDate><Year>2020</Year><Month>Mar</Month></PubDate>
+      </JournalIssue>
+      <Title>Journal of tests</Title>
+    </Journal>
+    <ArticleTitle>A title.</ArticleTitle>
+    <Language>eng</Language>
+    <PublicationTypeList>
+      <PublicationType UI="D016428">Journal Article</PublicationType>
+    </PublicationTypeList>
+    <ArticleDate DateType="Electronic"><Year>2020</Year><Month>Feb</Month><Day>14</Day></ArticleDate>
+  </Article>
+  <MedlineJournalInfo><NlmUniqueID>0001</NlmUniqueID></MedlineJournalInfo>
+  <ChemicalList>
+    <Chemical>
+      <RegistryNumber>0</RegistryNumber>
+      <NameOfSubstance UI="D000432">Methanol</NameOfSubstance>
+    </Chemical>
+  </ChemicalList>
+  <SupplMeshList>
+    <SupplMeshName Type="Disease" UI="C000657245">COVID-19</SupplMeshName>
+    <SupplMeshName Type="Organism" UI="C000656484">SARS-CoV-2</SupplMeshName>
+  </SupplMeshList>
+  <InvestigatorList>
+    <Investigator ValidYN="Y">
+      <LastName>Doe</LastName>
+      <ForeName>Jane</ForeName>
+      <AffiliationInfo><Affiliation>Somewhere</Affiliation></AffiliationInfo>
+    </Investigator>
+  </InvestigatorList>
+</MedlineCitation>"""
+
+
+def test_medline_citation_lists() -> None:
+    citation = MedlineCitation.from_xml(read_string(CITATION, "MedlineCitation"))
+
+    assert [(chemical.unique_identifier, chemical.name_of_substance) for chemical in citation.chemicals] == [
+        ("D000432", "Methanol")
+    ]
+    assert citation.supplemental_meshs is not None
+    assert [(mesh.type, mesh.ui, mesh.name) for mesh in citation.supplemental_meshs] == [
+        ("Disease", "C000657245", "COVID-19"),
+        ("Organism", "C000656484", "SARS-CoV-2"),
+    ]
+    assert citation.investigators is not None
+    assert [(item.last_name, item.fore_name, item.affiliation) for item in citation.investigators] == [
+        ("Doe", "Jane", "Somewhere")
+    ]
+    # Lists that are absent are None rather than empty
+    assert citation.keywords is None
+    assert citation.gene_symbols is None
+
+
+def test_medline_citation_dates() -> None:
+    citation = MedlineCitation.from_xml(read_string(CITATION, "MedlineCitation"))
+
+    assert citation.revised == datetime.date(2019, 2, 8)
+    assert citation.completed is None
+    assert citation.article.journal.issue.date == datetime.date(2020, 3, 1)
+    assert citation.article.date == datetime.date(2020, 2, 14)
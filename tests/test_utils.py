@@ -0,0 +1,135 @@
+"""Tests of the helpers reading the nodes of PubMed XML files."""
+
+from datetime import datetime
+
+import pytest
+from rxml import read_string
+
+from pmcollection.schemas import Author, JournalIssue
+from pmcollection.utils import (
+    children_by_tag,
+    compile_path,
+    define_datetime_from_node,
+    first_text,
+    select,
+    select_text,
+)
+
+
+ARTICLE = """<Article>
+  <Journal>
+    <JournalIssue><Volume>7</Volume><Title>Issue title</Title></JournalIssue>
+    <Title>Journal title</Title>
+  </Journal>
+  <ArticleTitle>Article title</ArticleTitle>
+  <AuthorList>
+    <Author><LastName>Doe</LastName></Author>
+    <Author><LastName>Roe</LastName></Author>
+  </AuthorList>
+</Article>"""
+
+
+def test_children_by_tag() -> None:
+    article = read_string(ARTICLE, "Article")
+
+    fields = children_by_tag(article)
+
+    assert list(fields) == ["Journal", "ArticleTitle", "AuthorList"]
+    assert [node.name for node in fields["Journal"][0].children] == ["JournalIssue", "Title"]
+    # Only the direct children are grouped, the authors stay below their list
+    assert "Author" not in fields
+    assert [node.name for node in children_by_tag(fields["AuthorList"][0])["Author"]] == ["Author", "Author"]
+
+
+def test_first_text() -> None:
+    fields = children_by_tag(read_string(ARTICLE, "Article"))
+
+    assert first_text(fields, "ArticleTitle") == "Article title"
+    assert first_text(fields, "Title") is None
+    assert first_text(fields, "VernacularTitle") is None
+
+
+def test_compile_path() -> None:
+    assert compile_path("Journal/JournalIssue/Volume") == ("Journal", "JournalIssue", "Volume")
+    assert compile_path("Title") == ("Title",)
+    for path in ["", "/Journal", "Journal/", "Journal//Title"]:
+        with pytest.raises(ValueError, match="Invalid path"):
+            compile_path(path)
+
+
+def test_select_is_anchored_to_the_starting_node() -> None:
+    article = read_string(ARTICLE, "Article")
+
+    assert [node.text for node in select(article, "Journal/Title")] == ["Journal title"]
+    assert select_text(article, "Journal/JournalIssue/Title") == "Issue title"
+    assert select_text(article, "ArticleTitle") == "Article title"
+    # A `Title` below the starting node but not at the end of the path is never matched
+    assert select(article, "Title") == []
+    assert select_text(article, "JournalIssue/Volume") is None
+
+
+def test_select_starts_from_several_nodes() -> None:
+    article = read_string(ARTICLE, "Article")
+
+    assert [node.text for node in select(article.children, "Author/LastName")] == ["Doe", "Roe"]
+    assert select([], "Author/LastName") == []
+
+
+def test_select_with_a_missing_intermediate_node() -> None:
+    article = read_string(ARTICLE, "Article")
+
+    assert select(article, "Pagination/MedlinePgn") == []
+    assert select_text(article, "Pagination/MedlinePgn") is None
+    assert select_text(article, "Journal/ISSN/Value") is None
+
+
+def test_author_affiliation_and_identifier_are_read_at_their_own_level() -> None:
+    node = read_string(
+        """<Author ValidYN="Y">
+          <LastName>Doe</LastName>
+          <AffiliationInfo>
+            <Affiliation>Department of Biochemistry</Affiliation>
+            <Identifier Source="ROR">https://ror.org/00000000</Identifier>
+          </AffiliationInfo>
+        </Author>""",
+        "Author",
+    )
+
+    author = Author.from_xml(node)
+
+    assert author.affiliation == "Department of Biochemistry"
+    # The identifier of the affiliation is not the one of the author
+    assert author.identifier is None
+
+
+@pytest.mark.parametrize(
+    ("xml", "expected"),
+    [
+        ("<Year>2024</Year><Month>02</Month><Day>29</Day>", datetime(2024, 2, 29)),
+        ("<Year>2024</Year><Month>Feb</Month>", datetime(2024, 2, 1)),
+        ("<Year>2024</Year>", datetime(2024, 1, 1)),
+        ("<Year>2024</Year><Month>Spring</Month>", None),
+        ("<Year>2024</Year><Month>Dec-Jan</Month>", None),
+        ("<Year>2023</Year><Month>02</Month><Day>29</Day>", None),
+        ("<Month>01</Month><Day>01</Day>", None),
+    ],
+)
+def test_define_datetime_from_node(xml: str, expected: datetime | None) -> None:
+    node = read_string(f"<PubDate>{xml}</PubDate>", "PubDate")
+
+    assert define_datetime_from_node(node.children) == expected
+
+
+def test_journal_issue_with_a_seasonal_pub_date() -> None:
+    node = read_string(
+        """<JournalIssue CitedMedium="Print">
+          <Volume>12</Volume>
+          <PubDate><Year>1998</Year><Month>Spring</Month></PubDate>
+        </JournalIssue>""",
+        "JournalIssue",
+    )
+
+    issue = JournalIssue.from_xml(node)
+
+    assert issue.volume == "12"
+    assert issue.date is None